@@ -0,0 +1,232 @@
+﻿// Copyright (c) 2026 Nenkai
+// SPDX-License-Identifier: MIT
+
+using System;
+using System.Diagnostics;
+using System.IO;
+using System.Text;
+using System.Text.Json;
+using System.Text.Json.Nodes;
+
+using NLog;
+using NLog.Config;
+using NLog.Targets;
+
+namespace GTAdhocToolchain.CLI;
+
+/// <summary>
+/// Long-lived worker that runs build/disassemble jobs read from stdin, so that callers building many files
+/// only pay for runtime startup once.
+/// </summary>
+/// <remarks>
+/// Protocol: one JSON object per line in both directions.<br/>
+/// Requests: <c>{"id": 1, "command": "build", "args": {"input": "...", "output": "...", "version": 12, "baseIncludeFolder": "...", "writeExceptionsToFile": false}}</c>,
+/// <c>{"id": 2, "command": "disassemble", "args": {"input": "...", "convertGpbFiles": true}}</c> or <c>{"command": "exit"}</c>.<br/>
+/// Responses: <c>{"event": "ready", "version": "..."}</c> once on startup, then for each job any number of
+/// <c>{"id": 1, "event": "log", "level": "Info", "message": "..."}</c> followed by
+/// <c>{"id": 1, "event": "done", "exitCode": 0, "elapsedMs": 12, "peakWorkingSet": 104857600, "peakIsPerJob": true}</c>.<br/>
+/// Anything the toolchain logs or writes to the console while a job runs is forwarded as log events,
+/// stdout only ever carries protocol lines once the ready event has been sent.<br/>
+/// <c>peakWorkingSet</c> is the peak working set of the worker in bytes. <c>peakIsPerJob</c> tells whether it was reset
+/// before the job (Linux only) and covers that job only, otherwise it is the peak since the worker started.
+/// </remarks>
+public class AdhocWorker
+{
+    private readonly Stream _output;
+    private readonly Lock _outputLock = new();
+    private long _currentJobId;
+
+    public AdhocWorker(Stream output)
+    {
+        _output = output;
+    }
+
+    public static int Run()
+    {
+        var worker = new AdhocWorker(Console.OpenStandardOutput());
+        return worker.Loop(Console.In);
+    }
+
+    public int Loop(TextReader input)
+    {
+        var loggingConfig = new LoggingConfiguration();
+        loggingConfig.AddRuleForAllLevels(new MethodCallTarget("worker", (logEvent, _) =>
+        {
+            string message = logEvent.Exception is null ? logEvent.FormattedMessage : $"{logEvent.FormattedMessage} {logEvent.Exception}";
+            WriteLog(logEvent.Level.Name, $"[{logEvent.LoggerName}] : {message}");
+        }));
+        LogManager.Configuration = loggingConfig;
+
+        Console.SetOut(new LineForwardingWriter(line => WriteLog("Info", line)));
+
+        WriteEvent(null, "ready", writer => writer.WriteString("version", Program.GetExecutableVersion()?.ToString() ?? "vUnknown"));
+
+        string? line;
+        while ((line = input.ReadLine()) is not null)
+        {
+            if (string.IsNullOrWhiteSpace(line))
+                continue;
+
+            JsonNode? request;
+            try
+            {
+                request = JsonNode.Parse(line);
+            }
+            catch (JsonException e)
+            {
+                WriteLog("Error", $"Invalid request - {e.Message}");
+                continue;
+            }
+
+            long id = request?["id"]?.GetValue<long>() ?? 0;
+            string? command = request?["command"]?.GetValue<string>();
+            if (command == "exit")
+                break;
+
+            _currentJobId = id;
+            bool peakIsPerJob = ResetPeakWorkingSet();
+            var stopwatch = Stopwatch.StartNew();
+            int exitCode;
+            try
+            {
+                exitCode = RunJob(command, request?["args"]);
+            }
+            catch (Exception e)
+            {
+                LogManager.GetCurrentClassLogger().Fatal(e, "Internal error while running worker job");
+                exitCode = -1;
+            }
+
+            Console.Out.Flush();
+            WriteEvent(id, "done", writer =>
+            {
+                writer.WriteNumber("exitCode", exitCode);
+                writer.WriteNumber("elapsedMs", stopwatch.ElapsedMilliseconds);
+                using (var process = Process.GetCurrentProcess())
+                    writer.WriteNumber("peakWorkingSet", process.PeakWorkingSet64);
+                writer.WriteBoolean("peakIsPerJob", peakIsPerJob);
+            });
+            _currentJobId = 0;
+        }
+
+        LogManager.Flush();
+        return 0;
+    }
+
+    /// <summary>
+    /// Resets the peak working set, returns whether it could be.
+    /// </summary>
+    private static bool ResetPeakWorkingSet()
+    {
+        if (!OperatingSystem.IsLinux())
+            return false;
+
+        try
+        {
+            // Resets VmHWM, the peak resident set size
+            File.WriteAllText("/proc/self/clear_refs", "5");
+            return true;
+        }
+        catch (Exception)
+        {
+            // Not allowed or not supported by the kernel, the peak then covers the worker's lifetime
+            return false;
+        }
+    }
+
+    private static int RunJob(string? command, JsonNode? args)
+    {
+        string? input = args?["input"]?.GetValue<string>();
+        if (string.IsNullOrWhiteSpace(input) || !File.Exists(input))
+        {
+            LogManager.GetCurrentClassLogger().Error($"Input file does not exist: {input}");
+            return -1;
+        }
+
+        switch (command)
+        {
+            case "build":
+                return Program.BuildFile(input,
+                    args?["output"]?.GetValue<string>(),
+                    args?["version"]?.GetValue<uint>() ?? 12,
+                    args?["writeExceptionsToFile"]?.GetValue<bool>() ?? false,
+                    preprocessOnly: false,
+                    args?["baseIncludeFolder"]?.GetValue<string>());
+
+            case "disassemble":
+                return Program.ProcessFile(input, args?["convertGpbFiles"]?.GetValue<bool>() ?? true);
+
+            default:
+                LogManager.GetCurrentClassLogger().Error($"Unknown worker command '{command}'.");
+                return -1;
+        }
+    }
+
+    private void WriteLog(string level, string message)
+    {
+        WriteEvent(_currentJobId, "log", writer =>
+        {
+            writer.WriteString("level", level);
+            writer.WriteString("message", message);
+        });
+    }
+
+    private void WriteEvent(long? id, string eventName, Action<Utf8JsonWriter> writeFields)
+    {
+        lock (_outputLock)
+        {
+            using (var writer = new Utf8JsonWriter(_output))
+            {
+                writer.WriteStartObject();
+                if (id is not null)
+                    writer.WriteNumber("id", id.Value);
+                writer.WriteString("event", eventName);
+                writeFields(writer);
+                writer.WriteEndObject();
+            }
+
+            _output.WriteByte((byte)'\n');
+            _output.Flush();
+        }
+    }
+
+    /// <summary>
+    /// Console writer that hands out complete lines, used to keep console output off the protocol stream.
+    /// </summary>
+    private class LineForwardingWriter : TextWriter
+    {
+        private readonly Action<string> _onLine;
+        private readonly StringBuilder _line = new();
+
+        public LineForwardingWriter(Action<string> onLine)
+        {
+            _onLine = onLine;
+        }
+
+        public override Encoding Encoding => Encoding.UTF8;
+
+        public override void Write(char value)
+        {
+            if (value == '\n')
+            {
+                EmitLine();
+            }
+            else if (value != '\r')
+            {
+                _line.Append(value);
+            }
+        }
+
+        public override void Flush()
+        {
+            if (_line.Length > 0)
+                EmitLine();
+        }
+
+        private void EmitLine()
+        {
+            _onLine(_line.ToString());
+            _line.Clear();
+        }
+    }
+}
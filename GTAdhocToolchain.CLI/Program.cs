@@ -41,7 +41,7 @@ public class Program
         Console.WriteLine("- https://github.com/Nenkai");
         Console.WriteLine("---------------------------------------------");
 
-        if (args.Length == 1 && args[0] != "build")
+        if (args.Length == 1 && args[0] != "build" && args[0] != "worker")
         {
             if (Directory.Exists(args[0]))
             {
@@ -115,6 +115,9 @@ public class Program
         };
         mprojectToTextCommand.SetAction(MProjectToText);
 
+        var workerCommand = new Command("worker", "Starts a long-lived worker that reads build/disassemble jobs as JSON lines from stdin. Used by the scripts to avoid starting a process per file.");
+        workerCommand.SetAction(parseResult => AdhocWorker.Run());
+
         var rootCommand = new RootCommand("adhoc")
         {
             buildCommand,
@@ -122,13 +125,14 @@ public class Program
             packCommand,
             unpackCommand,
             mprojectToBinCommand,
-            mprojectToTextCommand
+            mprojectToTextCommand,
+            workerCommand
         };
 
         return await rootCommand.Parse(args).InvokeAsync();
     }
 
-    private static int ProcessFile(string file)
+    public static int ProcessFile(string file, bool convertGpbFiles = true)
     {
         try
         {
@@ -165,7 +169,7 @@ public class Program
                 string fileName = Path.GetFileNameWithoutExtension(file);
                 string? dir = Path.GetDirectoryName(file);
 
-                gpb.Unpack(Path.GetFileNameWithoutExtension(file), Path.Combine(dir ?? string.Empty, fileName), convertImages: true);
+                gpb.Unpack(Path.GetFileNameWithoutExtension(file), Path.Combine(dir ?? string.Empty, fileName), convertImages: convertGpbFiles);
             }
         }
         catch (Exception e)
@@ -234,6 +238,11 @@ public class Program
         bool preprocessOnly = parseResult.GetValue<bool>("--preprocess-only");
         string? baseIncludeFolder = parseResult.GetValue<string>("--base-include-folder");
 
+        return BuildFile(inputPath, outputPath, version, writeExceptionsToFile, preprocessOnly, baseIncludeFolder);
+    }
+
+    public static int BuildFile(string inputPath, string? outputPath, uint version = 12, bool writeExceptionsToFile = false, bool preprocessOnly = false, string? baseIncludeFolder = "")
+    {
         if (Path.GetExtension(inputPath) == ".yaml")
         {
             return BuildProject(inputPath, outputPath, writeExceptionsToFile);
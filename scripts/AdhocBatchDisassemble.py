@@ -0,0 +1,183 @@
+#/usr/bin/env python3
+"""Disassembles every .adc of a folder (recursively) to .ad.diss, spread across several adhoc.exe workers.
+
+Files whose .ad.diss is newer than the .adc are skipped, so an interrupted run picks up where it stopped.
+Larger files are started first so that no worker is left with a big one at the end.
+"""
+import argparse, os, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from AdhocBuildJobs import Job
+from AdhocWorker import get_worker, format_message
+
+PROGRESS_INTERVAL = 0.2
+
+def find_adc_files(folder:str):
+    files = []
+    for dirpath, _, filenames in os.walk(folder):
+        files.extend(os.path.join(dirpath, filename) for filename in filenames if filename.lower().endswith(".adc"))
+    return files
+
+def get_diss_path(path:str):
+    """Where adhoc.exe writes the disassembly of a .adc."""
+    return os.path.splitext(path)[0] + ".ad.diss"
+
+def is_up_to_date(path:str):
+    try:
+        return os.path.getmtime(get_diss_path(path)) >= os.path.getmtime(path)
+    except OSError:
+        return False
+
+class BatchProgress:
+    """Counts of a batch so far, thread-safe."""
+
+    def __init__(self, total:int):
+        self.total = total
+        self.done = 0
+        self.skipped = 0
+        self.failed = []
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @property
+    def ok(self):
+        return not self.failed
+
+    @property
+    def finished(self):
+        return self.done + self.skipped + len(self.failed)
+
+    def add(self, path:str, state:str):
+        with self._lock:
+            if state == "done":
+                self.done += 1
+            elif state == "skipped":
+                self.skipped += 1
+            else:
+                self.failed.append(path)
+
+    def files_per_second(self):
+        """Disassembled (not skipped) files per second so far."""
+        elapsed = time.perf_counter() - self.start
+        processed = self.done + len(self.failed)
+        return processed / elapsed if elapsed > 0 and processed else 0.0
+
+    def eta(self):
+        """Estimated seconds left, None until there is a rate to go by."""
+        rate = self.files_per_second()
+        return (self.total - self.finished) / rate if rate else None
+
+    def describe(self):
+        eta = self.eta()
+        eta_text = f", ETA {format_duration(eta)}" if eta is not None and self.finished < self.total else ""
+        failed_text = f", {len(self.failed)} failed" if self.failed else ""
+        return (f"{self.finished}/{self.total} files ({self.skipped} up to date{failed_text}), "
+                f"{self.files_per_second():.1f} files/s{eta_text}")
+
+def format_duration(seconds:float):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+def disassemble_folder(adhoc_path:str, folder:str, max_workers:int, force:bool=False,
+                       on_progress:Callable[[BatchProgress], None]=None, on_log:Callable[[str, str], None]=None, job=None):
+    """Disassembles every .adc under folder with up to max_workers workers, returns the BatchProgress.
+
+    on_progress is called every PROGRESS_INTERVAL seconds and once at the end, from a worker thread. on_log
+    gets the errors of files that failed. Cancelling job stops queued files and kills running ones."""
+    files = find_adc_files(folder)
+    progress = BatchProgress(len(files))
+    pending = []
+    for path in files:
+        if not force and is_up_to_date(path):
+            progress.add(path, "skipped")
+        else:
+            pending.append(path)
+    # Biggest first, so the last files to finish are small ones
+    pending.sort(key=lambda path: os.path.getsize(path), reverse=True)
+
+    worker = get_worker(adhoc_path, max_workers)
+    last_report = [0.0]
+    report_lock = threading.Lock()
+
+    def report(final=False):
+        if on_progress is None:
+            return
+        with report_lock:
+            now = time.perf_counter()
+            if not final and now - last_report[0] < PROGRESS_INTERVAL:
+                return
+            last_report[0] = now
+        on_progress(progress)
+
+    def disassemble(path):
+        if job is not None and job.cancelled:
+            return
+        result = worker.disassemble(path, job=job)
+        if result.cancelled:
+            return
+        if result.ok:
+            progress.add(path, "done")
+        else:
+            progress.add(path, "failed")
+            if on_log:
+                on_log("ERROR", f"Failed to disassemble {path} (exit {result.exit_code})")
+                for level, message in result.messages:
+                    on_log(level, message)
+        report()
+
+    report(True)
+    with ThreadPoolExecutor(max_workers, thread_name_prefix="AdhocDisassemble") as executor:
+        futures = [executor.submit(disassemble, path) for path in pending]
+        try:
+            for future in futures:
+                future.result()
+        except KeyboardInterrupt:
+            # Otherwise leaving the executor waits for every queued file
+            executor.shutdown(wait=False, cancel_futures=True)
+            if job is not None:
+                job.cancel()
+            raise
+    report(True)
+    return progress
+
+def main():
+    parser = argparse.ArgumentParser(description="Disassembles all .adc files of a folder (recursively) to .ad.diss with parallel adhoc.exe workers.")
+    parser.add_argument("folder", help="Folder of .adc files")
+    parser.add_argument("-a", "--adhoc", default="adhoc.exe", help="Path to adhoc.exe (default is 'adhoc.exe')")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Amount of workers (default is the cpu count)")
+    parser.add_argument("-f", "--force", action="store_true", help="When set, also disassembles files whose .ad.diss is up to date")
+    out = parser.parse_args()
+
+    if not os.path.isdir(out.folder):
+        print(f"==> Folder not found: {out.folder}")
+        exit(1)
+
+    def on_progress(progress):
+        print(f"\r{progress.describe()}".ljust(100), end="", flush=True)
+
+    def on_log(level, message):
+        print(f"\r{format_message(level, message)}".ljust(100), flush=True)
+
+    job = Job(0, "Disassemble", None)
+    try:
+        progress = disassemble_folder(out.adhoc, out.folder, max(1, out.jobs), out.force, on_progress, on_log, job)
+    except FileNotFoundError:
+        print(f"\n==> adhoc.exe not found at: {out.adhoc}")
+        exit(1)
+    except KeyboardInterrupt:
+        print("\nCancelled.")
+        exit(1)
+
+    print()
+    print(f"Disassembled {progress.done} files in {format_duration(time.perf_counter() - progress.start)}, "
+          f"{progress.skipped} were up to date, {len(progress.failed)} failed")
+    if progress.failed:
+        exit(1)
+
+if __name__ == "__main__":
+    main()
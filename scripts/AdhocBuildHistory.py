@@ -0,0 +1,152 @@
+#/usr/bin/env python3
+"""Build timing history, kept in a small SQLite database next to the GUI profile.
+
+Each build appends its wall time, the peak resident memory of the process that ran it, the size of its
+output and its exit code. A build is flagged as slow when it took more than a given percentage longer
+than the median of the previous successful builds of the same input/output.
+"""
+import os, sqlite3, statistics, threading, time
+from typing import List
+
+# Successful runs the median is taken from, and how many are needed before flagging anything
+MEDIAN_WINDOW = 10
+MIN_RUNS = 3
+DEFAULT_SLOW_THRESHOLD = 20
+# Builds looked up per query by get_trends, below SQLite's oldest limit of 999 parameters
+MAX_QUERY_KEYS = 500
+
+SPARKLINE_CHARS = "▁▂▃▄▅▆▇█"
+
+# Raised by BuildHistory when the database cannot be read or written, so callers need not import sqlite3
+HistoryError = sqlite3.Error
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    build_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    started REAL NOT NULL,
+    wall_time REAL NOT NULL,
+    peak_rss INTEGER,
+    output_size INTEGER,
+    exit_code INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_build_key ON runs (build_key, id);
+"""
+
+class BuildRun:
+    __slots__ = ("name", "kind", "started", "wall_time", "peak_rss", "output_size", "exit_code")
+
+    def __init__(self, name:str, kind:str, started:float, wall_time:float, peak_rss:int, output_size:int, exit_code:int):
+        self.name = name
+        self.kind = kind
+        self.started = started
+        self.wall_time = wall_time
+        self.peak_rss = peak_rss
+        self.output_size = output_size
+        self.exit_code = exit_code
+
+def get_slower_percent(wall_time:float, previous:List[float], threshold:float):
+    """How much slower (in %) wall_time is than the median of the previous times, None if within threshold
+    or if there are not enough of them to tell."""
+    if len(previous) < MIN_RUNS:
+        return None
+    median = statistics.median(previous[-MEDIAN_WINDOW:])
+    if median <= 0:
+        return None
+    slower = (wall_time / median - 1) * 100
+    return slower if slower > threshold else None
+
+def sparkline(values:List[float]):
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    if high - low < 1e-9:
+        return SPARKLINE_CHARS[len(SPARKLINE_CHARS) // 2] * len(values)
+    scale = (len(SPARKLINE_CHARS) - 1) / (high - low)
+    return "".join(SPARKLINE_CHARS[round((value - low) * scale)] for value in values)
+
+class BuildHistory:
+    """Thread-safe store of build runs, the database is only opened once it is used.
+
+    Successful runs more than slow_threshold % slower than the median of the previous ones are flagged."""
+
+    def __init__(self, path:str, slow_threshold:float=DEFAULT_SLOW_THRESHOLD):
+        self.path = path
+        self.slow_threshold = slow_threshold
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Called with the lock held
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            # Lets a GUI and a command line build share the file
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def record(self, key:str, name:str, kind:str, wall_time:float, peak_rss:int, output_size:int, exit_code:int):
+        """Adds a run, returns how much slower (in %) than usual it was if it was a slow successful run, else None."""
+        previous = self.wall_times(key)
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                connection.execute(
+                    "INSERT INTO runs (build_key, name, kind, started, wall_time, peak_rss, output_size, exit_code) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, name, kind, time.time() - wall_time, wall_time, peak_rss, output_size, exit_code))
+        return get_slower_percent(wall_time, previous, self.slow_threshold) if exit_code == 0 else None
+
+    def runs(self, key:str, limit:int=MEDIAN_WINDOW):
+        """The last runs of a build, oldest first."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT name, kind, started, wall_time, peak_rss, output_size, exit_code FROM runs WHERE build_key = ? ORDER BY id DESC LIMIT ?",
+                (key, limit)).fetchall()
+        return [BuildRun(*row) for row in reversed(rows)]
+
+    def wall_times(self, key:str, limit:int=MEDIAN_WINDOW):
+        """Wall times of the last successful runs of a build, oldest first."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT wall_time FROM runs WHERE build_key = ? AND exit_code = 0 ORDER BY id DESC LIMIT ?",
+                (key, limit)).fetchall()
+        return [row[0] for row in reversed(rows)]
+
+    def get_trend(self, key:str, limit:int=20):
+        """Returns (wall times of the last successful runs oldest first, how much slower than usual the last one was or None)."""
+        times = self.wall_times(key, limit)
+        if not times:
+            return times, None
+        return times, get_slower_percent(times[-1], times[:-1], self.slow_threshold)
+
+    def get_trends(self, keys:List[str], limit:int=20):
+        """get_trend of many builds in one query (per MAX_QUERY_KEYS builds), returns {key: (wall times, slower)}."""
+        times = {key: [] for key in keys}
+        keys = list(times)
+        with self._lock:
+            connection = self._connect()
+            for start in range(0, len(keys), MAX_QUERY_KEYS):
+                batch = keys[start:start + MAX_QUERY_KEYS]
+                rows = connection.execute(
+                    "SELECT build_key, wall_time FROM ("
+                    "SELECT build_key, wall_time, id, ROW_NUMBER() OVER (PARTITION BY build_key ORDER BY id DESC) AS recent FROM runs "
+                    f"WHERE build_key IN ({', '.join('?' * len(batch))}) AND exit_code = 0) WHERE recent <= ? ORDER BY id",
+                    (*batch, limit)).fetchall()
+                for key, wall_time in rows:
+                    times[key].append(wall_time)
+        return {key: (values, get_slower_percent(values[-1], values[:-1], self.slow_threshold) if values else None)
+                for key, values in times.items()}
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+def get_output_size(path:str):
+    try:
+        return os.path.getsize(path) if path else None
+    except OSError:
+        return None
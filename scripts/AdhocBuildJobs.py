@@ -0,0 +1,255 @@
+#/usr/bin/env python3
+"""Background job scheduler for the toolchain scripts.
+
+Jobs run on a bounded pool of threads and can be cancelled whether they are queued or running. A job
+can depend on others, it then only starts once they are done and is skipped if any of them did not succeed.
+Nothing here touches tkinter: state changes are queued, and the UI drains them from its own thread
+with JobScheduler.poll() (i.e through `after()`), which is also where on_done callbacks run. Job
+output goes to a LogBuffer, a bounded ring buffer the UI reads new lines from the same way.
+"""
+import collections, queue, threading, time
+from typing import Callable, List
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+SKIPPED = "skipped"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED, SKIPPED)
+
+class Job:
+    """A unit of work, func is called with the job itself so it can check or react to cancellation."""
+
+    def __init__(self, job_id:int, name:str, func:Callable, on_done:Callable=None, depends_on:List["Job"]=None):
+        self.id = job_id
+        self.name = name
+        self.func = func
+        self.on_done = on_done
+        self.depends_on = list(depends_on or [])
+        self.state = QUEUED
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+        self._cancel_event = threading.Event()
+        self._cancel_callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    @property
+    def finished_state(self):
+        return self.state in FINISHED_STATES
+
+    @property
+    def elapsed(self):
+        """Seconds spent running so far, None while queued."""
+        if self.started is None:
+            return None
+        return (self.finished or time.perf_counter()) - self.started
+
+    def cancel(self):
+        with self._lock:
+            if self._cancel_event.is_set():
+                return
+            self._cancel_event.set()
+            callbacks = list(self._cancel_callbacks)
+        for callback in callbacks:
+            callback()
+
+    def add_cancel_callback(self, callback:Callable):
+        """Calls callback when the job is cancelled, or right away if it already is."""
+        with self._lock:
+            if not self._cancel_event.is_set():
+                self._cancel_callbacks.append(callback)
+                return
+        callback()
+
+    def remove_cancel_callback(self, callback:Callable):
+        with self._lock:
+            if callback in self._cancel_callbacks:
+                self._cancel_callbacks.remove(callback)
+
+class JobScheduler:
+    """Runs jobs on up to max_workers threads, in submission order once their dependencies are done.
+
+    A job's success is decided by the job itself: it is DONE if func returned, unless the optional
+    succeeded(job) callable given to the scheduler says otherwise."""
+
+    def __init__(self, max_workers:int=2, succeeded:Callable=None):
+        self.max_workers = max(1, max_workers)
+        self.succeeded = succeeded
+        self._pending = collections.deque()
+        self._jobs = []
+        self._threads = 0
+        self._busy = 0
+        self._next_id = 1
+        self._condition = threading.Condition()
+        self._events = queue.SimpleQueue()
+
+    def submit(self, name:str, func:Callable, on_done:Callable=None, depends_on:List[Job]=None):
+        """Queues func(job), on_done(job) is called from poll() once the job has finished."""
+        with self._condition:
+            job = Job(self._next_id, name, func, on_done, depends_on)
+            self._next_id += 1
+            self._pending.append(job)
+            self._jobs.append(job)
+            self._spawn()
+        self._events.put(job)
+        return job
+
+    def set_max_workers(self, max_workers:int):
+        with self._condition:
+            self.max_workers = max(1, max_workers)
+            self._spawn()
+
+    def cancel(self, job:Job):
+        with self._condition:
+            queued = job in self._pending
+            if queued:
+                self._pending.remove(job)
+        job.cancel()
+        if queued:
+            self._finish(job, CANCELLED)
+
+    def cancel_all(self):
+        for job in self.active_jobs():
+            self.cancel(job)
+
+    def active_jobs(self):
+        """Queued and running jobs, in submission order."""
+        with self._condition:
+            return [job for job in self._jobs if not job.finished_state]
+
+    def counts(self):
+        """Returns (running, queued)."""
+        jobs = self.active_jobs()
+        running = sum(1 for job in jobs if job.state == RUNNING)
+        return running, len(jobs) - running
+
+    def poll(self):
+        """Returns the jobs whose state changed since the last call and runs their on_done callbacks.
+
+        Call it from the thread that owns the UI."""
+        changed = []
+        while True:
+            try:
+                job = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if job in changed:
+                continue
+            changed.append(job)
+
+        for job in changed:
+            if job.finished_state and job.on_done is not None:
+                on_done, job.on_done = job.on_done, None
+                on_done(job)
+        return changed
+
+    def shutdown(self):
+        """Cancels everything, running jobs are interrupted through their cancel callbacks."""
+        self.cancel_all()
+
+    def _spawn(self):
+        # Called with the condition held
+        while self._threads < self.max_workers and self._threads - self._busy < len(self._pending):
+            self._threads += 1
+            threading.Thread(target=self._worker, name="AdhocJob", daemon=True).start()
+
+    def _next_job(self):
+        # Called with the condition held, returns the first queued job whose dependencies are done
+        if self._threads > self.max_workers:
+            return None
+        for job in list(self._pending):
+            if any(dependency.state != DONE for dependency in job.depends_on if dependency.finished_state):
+                self._pending.remove(job)
+                job.error = "A job it depends on did not succeed"
+                self._finish(job, SKIPPED)
+            elif all(dependency.finished_state for dependency in job.depends_on):
+                self._pending.remove(job)
+                return job
+        return None
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                job = self._next_job()
+                if job is None:
+                    self._threads -= 1
+                    return
+                job.state = RUNNING
+                job.started = time.perf_counter()
+                self._busy += 1
+            self._events.put(job)
+            self._run(job)
+            with self._condition:
+                self._busy -= 1
+
+    def _run(self, job:Job):
+        try:
+            job.result = job.func(job)
+            state = DONE if self.succeeded is None or self.succeeded(job) else FAILED
+        except Exception as e:
+            job.error = e
+            state = FAILED
+        self._finish(job, CANCELLED if job.cancelled else state)
+
+    def _finish(self, job:Job, state:str):
+        with self._condition:
+            job.state = state
+            job.finished = time.perf_counter()
+            self._jobs.remove(job)
+            # Dependents of this job may be able to start now
+            self._spawn()
+        self._events.put(job)
+
+class LogLine:
+    __slots__ = ("seq", "job_id", "job_name", "level", "text")
+
+    def __init__(self, seq:int, job_id:int, job_name:str, level:str, text:str):
+        self.seq = seq
+        self.job_id = job_id
+        self.job_name = job_name
+        self.level = level
+        self.text = text
+
+class LogBuffer:
+    """Thread-safe ring buffer of job output, only the last max_lines lines are kept.
+
+    Lines are numbered so readers can ask for what they have not seen yet with since()."""
+
+    def __init__(self, max_lines:int=10000):
+        self.max_lines = max_lines
+        self._lines = collections.deque(maxlen=max_lines)
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def write(self, job:Job, level:str, text:str):
+        with self._lock:
+            self._seq += 1
+            self._lines.append(LogLine(self._seq, job.id if job else 0, job.name if job else "", level, text))
+
+    def writer(self, job:Job):
+        """Returns an on_log(level, text) callable writing lines for job."""
+        return lambda level, text: self.write(job, level, text)
+
+    def since(self, seq:int):
+        """Lines numbered after seq that are still in the buffer, oldest first."""
+        with self._lock:
+            if not self._lines or self._lines[-1].seq <= seq:
+                return []
+            first = self._lines[0].seq
+            return list(self._lines)[max(0, seq + 1 - first):]
+
+    def lines(self, job_id:int=None):
+        with self._lock:
+            return [line for line in self._lines if job_id is None or line.job_id == job_id]
+
+    def clear(self):
+        with self._lock:
+            self._lines.clear()
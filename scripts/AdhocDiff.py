@@ -0,0 +1,283 @@
+#/usr/bin/env python3
+"""Diff engine for normalized instruction listings.
+
+Lines are interned to integers and split into sections at function/method headers. Sections are
+aligned by name first, then each pair is diffed with a histogram diff (falling back to Myers for
+regions with no rare lines), so cost follows the amount of changes rather than the file size.
+Opcodes use the same (tag, i1, i2, j1, j2) form as difflib.SequenceMatcher.get_opcodes().
+"""
+from typing import List
+
+# Lines occurring more often than this in a region are never used as histogram anchors
+MAX_CHAIN_LENGTH = 64
+
+SECTION_HEADERS = ("FUNCTION_DEFINE - ", "METHOD_DEFINE - ")
+SCOPE_PUSHES = ("MODULE_DEFINE: ", "CLASS_DEFINE: ")
+
+TOP_LEVEL = "TopLevel"
+
+class Section:
+    """A run of lines from one function/method header up to the next one."""
+    __slots__ = ("name", "start", "end")
+
+    def __init__(self, name:str, start:int, end:int):
+        self.name = name
+        self.start = start
+        self.end = end
+
+class SectionDiff:
+    """One aligned section pair, its opcodes are only computed when first accessed."""
+    __slots__ = ("name", "a_start", "a_end", "b_start", "b_end", "_a", "_b", "_opcodes")
+
+    def __init__(self, name:str, a:List[int], a_start:int, a_end:int, b:List[int], b_start:int, b_end:int):
+        self.name = name
+        self.a_start = a_start
+        self.a_end = a_end
+        self.b_start = b_start
+        self.b_end = b_end
+        self._a = a
+        self._b = b
+        self._opcodes = None
+
+    @property
+    def opcodes(self):
+        if self._opcodes is None:
+            self._opcodes = diff_ids(self._a, self._b, self.a_start, self.a_end, self.b_start, self.b_end)
+        return self._opcodes
+
+    def get_relative_opcodes(self):
+        """Opcodes relative to the section starts, to be reused once the section has moved."""
+        return [(tag, i1 - self.a_start, i2 - self.a_start, j1 - self.b_start, j2 - self.b_start) for tag, i1, i2, j1, j2 in self.opcodes]
+
+    def set_relative_opcodes(self, opcodes:List[tuple]):
+        """Reuses opcodes of an identical section pair instead of diffing it."""
+        self._opcodes = [(tag, i1 + self.a_start, i2 + self.a_start, j1 + self.b_start, j2 + self.b_start) for tag, i1, i2, j1, j2 in opcodes]
+
+    def is_equal(self):
+        return all(opcode[0] == "equal" for opcode in self.opcodes)
+
+    def matched(self):
+        return sum(i2 - i1 for tag, i1, i2, _, _ in self.opcodes if tag == "equal")
+
+##########
+# interning
+
+def intern_lines(*sequences:List[str]):
+    """Maps every distinct line to an integer, returns the sequences as lists of ids."""
+    ids = {}
+    return [[ids.setdefault(line, len(ids)) for line in lines] for lines in sequences]
+
+##########
+# sections
+
+def split_sections(lines:List[str]):
+    """Splits a normalized listing at function/method headers.
+
+    Section names are qualified with the enclosing modules/classes, tracked the same way the
+    disassembler does (MODULE_DEFINE/CLASS_DEFINE/TRY_CATCH/MODULE_CONSTRUCTOR push, [EXIT] pops).
+    The first section holds everything before the first header and is always present."""
+    sections = [Section(TOP_LEVEL, 0, 0)]
+    scope = []
+    for i, line in enumerate(lines):
+        if line.startswith(SECTION_HEADERS):
+            name = line.split(" - ", 1)[1].split("(", 1)[0]
+            sections[-1].end = i
+            sections.append(Section("::".join([scope_name for scope_name in scope if scope_name] + [name]), i, i))
+        elif line.startswith(SCOPE_PUSHES):
+            value = line.split(": ", 1)[1]
+            scope.append(value.split(" extends ", 1)[0] if line.startswith("CLASS") else value.rsplit(",", 1)[-1])
+        elif line.startswith("TRY_CATCH") or line == "MODULE_CONSTRUCTOR":
+            # Unnamed, only keeps the stack balanced
+            scope.append(None)
+        elif "  [EXIT " in line and scope:
+            scope.pop()
+    sections[-1].end = len(lines)
+    return sections
+
+##########
+# sequence diff
+
+def _histogram_anchor(a:List[int], alo:int, ahi:int, b:List[int], blo:int, bhi:int):
+    """Finds the longest common run made of the rarest lines of the region, as (i, j, size), or None."""
+    positions = {}
+    for i in range(alo, ahi):
+        positions.setdefault(a[i], []).append(i)
+
+    best_count = MAX_CHAIN_LENGTH
+    best = None
+    j = blo
+    while j < bhi:
+        chain = positions.get(b[j])
+        next_j = j + 1
+        if chain is None or len(chain) > best_count:
+            j = next_j
+            continue
+
+        for i in chain:
+            # Extend the match both ways, tracking the rarest line within it
+            count = len(chain)
+            si, sj = i, j
+            while si > alo and sj > blo and a[si - 1] == b[sj - 1]:
+                si -= 1
+                sj -= 1
+                count = min(count, len(positions[a[si]]))
+            ei, ej = i + 1, j + 1
+            while ei < ahi and ej < bhi and a[ei] == b[ej]:
+                count = min(count, len(positions[a[ei]]))
+                ei += 1
+                ej += 1
+
+            if ej > next_j:
+                next_j = ej
+            if best is None or count < best_count or (count == best_count and ei - si > best[2]):
+                best = (si, sj, ei - si)
+                best_count = count
+        j = next_j
+    return best
+
+def _middle_snake(a:List[int], alo:int, ahi:int, b:List[int], blo:int, bhi:int):
+    """Myers' linear space middle snake, returns (x0, y0, x1, y1) relative to alo/blo."""
+    n = ahi - alo
+    m = bhi - blo
+    delta = n - m
+    odd = delta & 1
+    offset = n + m + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+    for d in range((n + m + 1) // 2 + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            if odd and delta - (d - 1) <= k <= delta + (d - 1) and x + backward[offset + delta - k] >= n:
+                return x0, y0, x, y
+
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            if not odd and -d <= delta - k <= d and x + forward[offset + delta - k] >= n:
+                return n - x, m - y, n - x0, m - y0
+    raise AssertionError("No middle snake found")
+
+def matching_blocks(a:List[int], b:List[int]):
+    """Returns the common runs of two id sequences as sorted (i, j, size) triples."""
+    blocks = []
+    regions = [(0, len(a), 0, len(b))]
+    while regions:
+        alo, ahi, blo, bhi = regions.pop()
+
+        # Common prefix and suffix
+        start = 0
+        while alo + start < ahi and blo + start < bhi and a[alo + start] == b[blo + start]:
+            start += 1
+        if start:
+            blocks.append((alo, blo, start))
+            alo += start
+            blo += start
+        end = 0
+        while alo < ahi - end and blo < bhi - end and a[ahi - 1 - end] == b[bhi - 1 - end]:
+            end += 1
+        if end:
+            blocks.append((ahi - end, bhi - end, end))
+            ahi -= end
+            bhi -= end
+        if alo == ahi or blo == bhi:
+            continue
+
+        anchor = _histogram_anchor(a, alo, ahi, b, blo, bhi)
+        if anchor is not None:
+            i, j, size = anchor
+            blocks.append(anchor)
+            regions.append((alo, i, blo, j))
+            regions.append((i + size, ahi, j + size, bhi))
+            continue
+
+        x0, y0, x1, y1 = _middle_snake(a, alo, ahi, b, blo, bhi)
+        if x1 > x0:
+            blocks.append((alo + x0, blo + y0, x1 - x0))
+        regions.append((alo, alo + x0, blo, blo + y0))
+        regions.append((alo + x1, ahi, blo + y1, bhi))
+
+    blocks.sort()
+    return blocks
+
+def get_opcodes(blocks:List[tuple], alo:int, ahi:int, blo:int, bhi:int):
+    """Turns matching blocks into difflib style opcodes covering [alo, ahi) and [blo, bhi)."""
+    opcodes = []
+    i, j = alo, blo
+    for ai, bj, size in blocks + [(ahi, bhi, 0)]:
+        if i < ai and j < bj:
+            opcodes.append(("replace", i, ai, j, bj))
+        elif i < ai:
+            opcodes.append(("delete", i, ai, j, bj))
+        elif j < bj:
+            opcodes.append(("insert", i, ai, j, bj))
+        if size:
+            if opcodes and opcodes[-1][0] == "equal":
+                opcodes[-1] = ("equal", opcodes[-1][1], ai + size, opcodes[-1][3], bj + size)
+            else:
+                opcodes.append(("equal", ai, ai + size, bj, bj + size))
+        i, j = ai + size, bj + size
+    return opcodes
+
+def diff_ids(a:List[int], b:List[int], alo:int=0, ahi:int=None, blo:int=0, bhi:int=None):
+    """Opcodes between a[alo:ahi] and b[blo:bhi], with absolute indices."""
+    ahi = len(a) if ahi is None else ahi
+    bhi = len(b) if bhi is None else bhi
+    blocks = matching_blocks(a[alo:ahi], b[blo:bhi])
+    return get_opcodes([(i + alo, j + blo, size) for i, j, size in blocks], alo, ahi, blo, bhi)
+
+##########
+# instruction listings
+
+def diff_sections(a_lines:List[str], b_lines:List[str]):
+    """Aligns two normalized listings section by section, returns SectionDiffs in listing order."""
+    a, b = intern_lines(a_lines, b_lines)
+    a_sections = split_sections(a_lines)
+    b_sections = split_sections(b_lines)
+    a_keys, b_keys = intern_lines([section.name for section in a_sections], [section.name for section in b_sections])
+
+    # [name, a_start, a_end, b_start, b_end]
+    ranges = []
+    a_carry = b_carry = 0
+    for tag, i1, i2, j1, j2 in get_opcodes(matching_blocks(a_keys, b_keys), 0, len(a_keys), 0, len(b_keys)):
+        # Renamed or reordered sections are paired up positionally
+        for k in range(min(i2 - i1, j2 - j1)):
+            a_section, b_section = a_sections[i1 + k], b_sections[j1 + k]
+            ranges.append([b_section.name, a_carry, a_section.end, b_carry, b_section.end])
+            a_carry, b_carry = a_section.end, b_section.end
+
+        # Sections only on one side (or whose header line changed) are merged into the previous pair,
+        # diffing them against nothing would lose every line that merely moved between sections
+        a_end = a_sections[i2 - 1].end if i2 - i1 > j2 - j1 else a_carry
+        b_end = b_sections[j2 - 1].end if j2 - j1 > i2 - i1 else b_carry
+        if ranges:
+            ranges[-1][2] = a_end
+            ranges[-1][4] = b_end
+            a_carry, b_carry = a_end, b_end
+
+    if not ranges:
+        ranges.append([TOP_LEVEL, 0, 0, 0, 0])
+    ranges[-1][2] = len(a_lines)
+    ranges[-1][4] = len(b_lines)
+
+    return [SectionDiff(name, a, a_start, a_end, b, b_start, b_end) for name, a_start, a_end, b_start, b_end in ranges]
+
+def diff_lines(a_lines:List[str], b_lines:List[str]):
+    """Flat opcodes of diff_sections."""
+    return [opcode for section in diff_sections(a_lines, b_lines) for opcode in section.opcodes]
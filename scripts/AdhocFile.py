@@ -0,0 +1,562 @@
+#/usr/bin/env python3
+"""Pure python reader for compiled adhoc scripts (.adc).
+
+Mirrors GTAdhocToolchain.Disasm.AdhocFile and AdhocCodeFrame.Read, so scripts can be
+disassembled without starting adhoc.exe. Instruction texts match the ones written to
+.ad.diss files by the toolchain.
+"""
+import argparse, math, struct
+from decimal import Decimal
+from typing import List
+
+# Bump when instruction reading or texts change, used to invalidate anything derived from the output
+READER_VERSION = 1
+
+MAGIC = b"ADCH"
+
+INSTRUCTION_NAMES = [
+    "ARRAY_CONST_OLD", "ASSIGN_OLD", "ATTRIBUTE_DEFINE", "ATTRIBUTE_PUSH", "BINARY_ASSIGN_OPERATOR",
+    "BINARY_OPERATOR", "CALL", "CLASS_DEFINE", "EVAL", "FLOAT_CONST",
+    "FUNCTION_DEFINE", "IMPORT", "INT_CONST", "JUMP", "JUMP_IF_TRUE",
+    "JUMP_IF_FALSE", "LIST_ASSIGN_OLD", "LOCAL_DEFINE", "LOGICAL_AND_OLD", "LOGICAL_OR_OLD",
+    "METHOD_DEFINE", "MODULE_DEFINE", "NIL_CONST", "NOP", "POP_OLD",
+    "PRINT", "REQUIRE", "SET_STATE_OLD", "STATIC_DEFINE", "STRING_CONST",
+    "STRING_PUSH", "THROW", "TRY_CATCH", "UNARY_ASSIGN_OPERATOR", "UNARY_OPERATOR",
+    "UNDEF", "VARIABLE_PUSH", "ATTRIBUTE_EVAL", "VARIABLE_EVAL", "SOURCE_FILE",
+    "FUNCTION_CONST", "METHOD_CONST", "MAP_CONST_OLD", "LONG_CONST", "ASSIGN",
+    "LIST_ASSIGN", "CALL_OLD", "OBJECT_SELECTOR", "SYMBOL_CONST", "LEAVE",
+    "ARRAY_CONST", "ARRAY_PUSH", "MAP_CONST", "MAP_INSERT", "POP",
+    "SET_STATE", "VOID_CONST", "ASSIGN_POP", "U_INT_CONST", "U_LONG_CONST",
+    "DOUBLE_CONST", "ELEMENT_PUSH", "ELEMENT_EVAL", "LOGICAL_AND", "LOGICAL_OR",
+    "BOOL_CONST", "MODULE_CONSTRUCTOR", "VA_CALL", "CODE_EVAL", "DELEGATE_DEFINE",
+    "JUMP_IF_NIL", "LOGICAL_OPTIONAL", "BYTE_CONST", "U_BYTE_CONST", "SHORT_CONST",
+    "U_SHORT_CONST",
+]
+INS = {name: i for i, name in enumerate(INSTRUCTION_NAMES)}
+
+SUBROUTINE_TYPES = {INS["METHOD_DEFINE"], INS["FUNCTION_DEFINE"], INS["METHOD_CONST"], INS["FUNCTION_CONST"]}
+
+RUN_STATES = ["EXIT", "RETURN", "YIELD", "EXCEPTION", "CALL", "RUN"]
+
+OPERATOR_PUNCTUATORS = {
+    "__elem__": "[]",
+    "__eq__": "==", "__ge__": ">=", "__gt__": ">", "__le__": "<=", "__ne__": "!=", "__lt__": "<",
+    "__invert__": "~", "__or__": "|",
+    "__lshift__": "<<", "__rshift__": ">>",
+    "__not__": "!",
+    "__post_decr__": "@--", "__post_incr__": "@++", "__pre_decr__": "--@", "__pre_incr__": "++@",
+    "__pow__": "** (power)",
+    "__minus__": "-", "__uminus__": "-@", "__uplus__": "+@",
+    "__xor__": "^", "__div__": "/", "__mul__": "*", "__add__": "+", "__min__": "-", "__mod__": "%",
+}
+
+_U8 = struct.Struct("<B")
+_S8 = struct.Struct("<b")
+_S16 = struct.Struct("<h")
+_U16 = struct.Struct("<H")
+_S32 = struct.Struct("<i")
+_U32 = struct.Struct("<I")
+_S64 = struct.Struct("<q")
+_U64 = struct.Struct("<Q")
+_F32 = struct.Struct("<f")
+_F64 = struct.Struct("<d")
+
+class AdhocFileError(Exception):
+    pass
+
+##########
+# value formatting, matches .NET's default ToString() output
+
+def _format_real(value:float, single:bool):
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "∞" if value > 0 else "-∞"
+    if value == 0:
+        return "-0" if math.copysign(1.0, value) < 0 else "0"
+
+    if single:
+        # Shortest representation that round-trips as a float
+        for precision in range(1, 10):
+            text = f"{value:.{precision}g}"
+            if _F32.unpack(_F32.pack(float(text)))[0] == value:
+                break
+    else:
+        text = repr(value)
+
+    sign, digit_tuple, exponent = Decimal(text).as_tuple()
+    scale = len(digit_tuple) + exponent
+    digits = "".join(map(str, digit_tuple)).rstrip("0")
+    max_digits = max(len(digits), 7 if single else 15)
+
+    result = "-" if sign else ""
+    if scale > max_digits or scale < -3:
+        result += digits[0]
+        if len(digits) > 1:
+            result += "." + digits[1:]
+        exp = scale - 1
+        result += f"E{'-' if exp < 0 else '+'}{abs(exp):02d}"
+    elif scale <= 0:
+        result += "0." + "0" * -scale + digits
+    else:
+        result += digits[:scale].ljust(scale, "0")
+        if len(digits) > scale:
+            result += "." + digits[scale:]
+    return result
+
+def _format_hex(value:int, bits:int, width:int):
+    return f"{value} (0x{value & ((1 << bits) - 1):0{width}X})"
+
+def _format_state(state:int):
+    name = RUN_STATES[state] if state < len(RUN_STATES) else str(state)
+    return f"State={name} ({state})"
+
+def _operator(name:str):
+    return f"{OPERATOR_PUNCTUATORS.get(name, name)} ({name})"
+
+##########
+# reading
+
+class AdhocStream:
+    """Little endian reader over a compiled script, mirrors GTAdhocToolchain.Core.AdhocStream."""
+    def __init__(self, data, version:int = 12):
+        self.data = memoryview(data)
+        self.position = 0
+        self.version = version
+        self.symbols = []
+
+    def _unpack(self, s:struct.Struct):
+        try:
+            value = s.unpack_from(self.data, self.position)[0]
+        except struct.error:
+            raise AdhocFileError(f"Unexpected end of file at 0x{self.position:X}")
+        self.position += s.size
+        return value
+
+    def read_byte(self): return self._unpack(_U8)
+    def read_sbyte(self): return self._unpack(_S8)
+    def read_boolean(self): return self._unpack(_U8) != 0
+    def read_int16(self): return self._unpack(_S16)
+    def read_uint16(self): return self._unpack(_U16)
+    def read_int32(self): return self._unpack(_S32)
+    def read_uint32(self): return self._unpack(_U32)
+    def read_int64(self): return self._unpack(_S64)
+    def read_uint64(self): return self._unpack(_U64)
+    def read_single(self): return self._unpack(_F32)
+    def read_double(self): return self._unpack(_F64)
+
+    def read_bytes(self, count:int):
+        if self.position + count > len(self.data):
+            raise AdhocFileError(f"Unexpected end of file at 0x{self.position:X}")
+        value = bytes(self.data[self.position:self.position + count])
+        self.position += count
+        return value
+
+    def read_zero_terminated(self):
+        end = self.position
+        while end < len(self.data) and self.data[end] != 0:
+            end += 1
+        value = bytes(self.data[self.position:end])
+        self.position = end + 1
+        return value
+
+    def decode_bits_and_advance(self):
+        value = self.read_byte()
+        mask = 0x80
+        while value & mask:
+            value = ((value - mask) << 8) | self.read_byte()
+            mask <<= 7
+        return value
+
+    def read_symbol_table(self):
+        count = self.decode_bits_and_advance()
+        self.symbols = [self.read_bytes(self.decode_bits_and_advance()).decode("utf-8", errors="replace") for _ in range(count)]
+
+    def read_symbol(self):
+        if self.version >= 9:
+            index = self.decode_bits_and_advance()
+            if index >= len(self.symbols):
+                raise AdhocFileError(f"Symbol index {index} out of range at 0x{self.position:X}")
+            return self.symbols[index]
+        length = self.read_int16()
+        return self.read_bytes(length).decode("utf-8", errors="replace")
+
+    def read_symbols(self):
+        return [self.read_symbol() for _ in range(self.read_uint32())]
+
+def _variable(stream:AdhocStream):
+    symbols = stream.read_symbols()
+    index = stream.read_int32()
+    return f"{','.join(symbols)}, {'Static' if len(symbols) > 1 else 'Local'}:{index}"
+
+def _attribute_push(stream:AdhocStream):
+    if stream.version <= 5:
+        return stream.read_symbol()
+    return ",".join(stream.read_symbols())
+
+def _import(stream:AdhocStream):
+    path = stream.read_symbols()
+    value = stream.read_symbol()
+    text = f"Path:{path[-1]}, Property:{value}"
+    if stream.version >= 10:
+        text += f", ImportAs:{stream.read_symbol()}"
+    return text
+
+def _list_assign(stream:AdhocStream):
+    count = stream.read_int32()
+    rest = stream.read_boolean() if stream.version >= 12 else False
+    return f"ElemCount={count}, HasRestElement={rest}"
+
+def _leave(stream:AdhocStream):
+    depth = stream.read_int32()
+    rewind = stream.read_int32()
+    return f"Depth:{depth}, RewindLocalsStorageTo:{rewind}"
+
+# Instruction type -> operand reader returning the text after "NAME: ", None for instructions without operands
+_OPERAND_READERS = {
+    INS["ARRAY_CONST_OLD"]: lambda s: f"[{s.read_uint32()}]",
+    INS["ASSIGN_OLD"]: None,
+    INS["ATTRIBUTE_DEFINE"]: lambda s: s.read_symbol(),
+    INS["ATTRIBUTE_PUSH"]: _attribute_push,
+    INS["BINARY_ASSIGN_OPERATOR"]: lambda s: _operator(s.read_symbol()),
+    INS["BINARY_OPERATOR"]: lambda s: _operator(s.read_symbol()),
+    INS["CALL"]: lambda s: f"ArgCount={s.read_int32()}",
+    INS["EVAL"]: None,
+    INS["IMPORT"]: _import,
+    INS["FLOAT_CONST"]: lambda s: f"Value={_format_real(s.read_single(), True)}",
+    INS["INT_CONST"]: lambda s: _format_hex(s.read_int32(), 32, 2),
+    INS["JUMP"]: lambda s: f"JumpTo={s.read_int32()}",
+    INS["JUMP_IF_TRUE"]: lambda s: f"Jump To Func Ins {s.read_int32()}",
+    INS["JUMP_IF_FALSE"]: lambda s: f"Jump To Func Ins {s.read_int32()}",
+    INS["LIST_ASSIGN_OLD"]: lambda s: f"ElemCount={s.read_int32()}",
+    INS["LOGICAL_AND_OLD"]: lambda s: f"Jump={s.read_int32()}",
+    INS["LOGICAL_OR_OLD"]: lambda s: f"Jump={s.read_int32()}",
+    INS["NIL_CONST"]: None,
+    INS["NOP"]: None,
+    INS["POP_OLD"]: None,
+    INS["PRINT"]: lambda s: f"ArgCount={s.read_int32()}",
+    INS["REQUIRE"]: None,
+    INS["STATIC_DEFINE"]: lambda s: s.read_symbol(),
+    INS["STRING_CONST"]: lambda s: s.read_symbol(),
+    INS["STRING_PUSH"]: lambda s: f"StringIndex={s.read_int32()}",
+    INS["THROW"]: None,
+    INS["TRY_CATCH"]: lambda s: str(s.read_int32()),
+    INS["UNARY_ASSIGN_OPERATOR"]: lambda s: _operator(s.read_symbol()),
+    INS["UNARY_OPERATOR"]: lambda s: _operator(s.read_symbol()),
+    INS["UNDEF"]: lambda s: ",".join(s.read_symbols()),
+    INS["VARIABLE_PUSH"]: _variable,
+    INS["ATTRIBUTE_EVAL"]: lambda s: ",".join(s.read_symbols()),
+    INS["VARIABLE_EVAL"]: _variable,
+    INS["SOURCE_FILE"]: lambda s: s.read_symbol(),
+    INS["MAP_CONST_OLD"]: lambda s: str(s.read_int32()),
+    INS["LONG_CONST"]: lambda s: _format_hex(s.read_int64(), 64, 2),
+    INS["ASSIGN"]: None,
+    INS["LIST_ASSIGN"]: _list_assign,
+    INS["CALL_OLD"]: lambda s: f"ArgCount={s.read_int32()}",
+    INS["OBJECT_SELECTOR"]: None,
+    INS["SYMBOL_CONST"]: lambda s: s.read_symbol(),
+    INS["LEAVE"]: _leave,
+    INS["ARRAY_CONST"]: lambda s: f"[{s.read_uint32()}]",
+    INS["ARRAY_PUSH"]: None,
+    INS["MAP_CONST"]: None,
+    INS["MAP_INSERT"]: None,
+    INS["POP"]: None,
+    INS["VOID_CONST"]: None,
+    INS["ASSIGN_POP"]: None,
+    INS["U_INT_CONST"]: lambda s: str(s.read_uint32()),
+    INS["U_LONG_CONST"]: lambda s: f"{s.read_uint64()})",
+    INS["DOUBLE_CONST"]: lambda s: f"Value={_format_real(s.read_double(), False)}",
+    INS["ELEMENT_PUSH"]: None,
+    INS["ELEMENT_EVAL"]: None,
+    INS["LOGICAL_AND"]: lambda s: f"Jump={s.read_int32()}",
+    INS["LOGICAL_OR"]: lambda s: f"Jump={s.read_int32()}",
+    INS["BOOL_CONST"]: lambda s: str(s.read_boolean()),
+    INS["MODULE_CONSTRUCTOR"]: None,
+    INS["VA_CALL"]: lambda s: f"Value={s.read_uint32()}",
+    INS["DELEGATE_DEFINE"]: lambda s: f"(0) {s.read_symbol()}",
+    INS["JUMP_IF_NIL"]: lambda s: f"Jump={s.read_int32()}",
+    INS["LOGICAL_OPTIONAL"]: None,
+    INS["BYTE_CONST"]: lambda s: _format_hex(s.read_sbyte(), 8, 2),
+    INS["U_BYTE_CONST"]: lambda s: _format_hex(s.read_byte(), 8, 2),
+    INS["SHORT_CONST"]: lambda s: _format_hex(s.read_int16(), 16, 4),
+    INS["U_SHORT_CONST"]: lambda s: _format_hex(s.read_uint16(), 16, 4),
+}
+
+_UNIMPLEMENTED = {INS["LOCAL_DEFINE"], INS["CODE_EVAL"]}
+
+class AdhocInstruction:
+    """One decoded instruction. text is what InstructionBase.Disassemble() returns (first line only for subroutines)."""
+    __slots__ = ("type", "offset", "line_number", "text", "frame", "scope_name", "state")
+
+    def __init__(self, type:int, offset:int, line_number:int):
+        self.type = type
+        self.offset = offset
+        self.line_number = line_number
+        self.text = INSTRUCTION_NAMES[type]
+        self.frame = None       # AdhocCodeFrame for subroutines
+        self.scope_name = None  # module/class name pushed by MODULE_DEFINE/CLASS_DEFINE
+        self.state = None       # SET_STATE/SET_STATE_OLD run state
+
+    @property
+    def name(self):
+        return INSTRUCTION_NAMES[self.type]
+
+    def is_function_or_method(self):
+        return self.type in SUBROUTINE_TYPES
+
+    def disassemble(self):
+        if self.frame is not None:
+            return self.text + self.frame.disassemble()
+        return self.text
+
+class AdhocCodeFrame:
+    """Mirrors AdhocCodeFrame.Read."""
+    def __init__(self, version:int):
+        self.version = version
+        self.has_debugging_information = False
+        self.source_file_path = None
+        self.has_rest_element = False
+        self.function_parameters = []
+        self.captured_callback_variables = []
+        self.stack_size = 0
+        self.local_variable_storage_size = 0
+        self.static_variable_storage_size = 0
+        self.instruction_count_offset = 0
+        self.instructions = []
+
+    def uses_new_split_stack(self):
+        return self.version >= 11
+
+    def read(self, stream:AdhocStream):
+        if self.version < 8:
+            self.has_debugging_information = True
+            self.source_file_path = stream.read_symbol()
+            if self.version > 3:
+                self.function_parameters = [stream.read_symbol() for _ in range(stream.read_uint32())]
+        else:
+            self.has_debugging_information = stream.read_boolean()
+            self.version = stream.read_byte()
+            if self.version != 8 and self.has_debugging_information:
+                self.source_file_path = stream.read_symbol()
+
+            if self.version >= 12:
+                self.has_rest_element = stream.read_boolean()
+
+            for _ in range(stream.read_uint32()):
+                symbol = stream.read_symbol()
+                stream.read_int32() # Symbol id
+                self.function_parameters.append(symbol)
+
+            for _ in range(stream.read_uint32()):
+                symbol = stream.read_symbol()
+                stream.read_int32() # Stack index
+                self.captured_callback_variables.append(symbol)
+
+            stream.read_uint32() # Unknown variable stack index
+
+        if not self.uses_new_split_stack():
+            self.local_variable_storage_size = stream.read_int32()
+            self.stack_size = stream.read_int32()
+        else:
+            self.stack_size = stream.read_int32()
+            self.local_variable_storage_size = stream.read_int32()
+            self.static_variable_storage_size = stream.read_int32()
+
+        self.instruction_count_offset = stream.position
+        instruction_count = stream.read_uint32()
+        if instruction_count < 0x40000000:
+            for _ in range(instruction_count):
+                line_number = stream.read_uint32() if self.has_debugging_information else 0
+                self.instructions.append(self.read_instruction(stream, line_number, stream.read_byte()))
+
+    def read_instruction(self, stream:AdhocStream, line_number:int, type:int):
+        if type >= len(INSTRUCTION_NAMES):
+            raise AdhocFileError(f"Unknown instruction type {type} at 0x{stream.position - 1:X}.")
+        if type in _UNIMPLEMENTED:
+            raise AdhocFileError(f"Encountered unimplemented {INSTRUCTION_NAMES[type]} instruction.")
+
+        ins = AdhocInstruction(type, stream.position + 4, line_number)
+        if type in SUBROUTINE_TYPES:
+            ins.text += " - "
+            if type == INS["FUNCTION_DEFINE"] or type == INS["METHOD_DEFINE"]:
+                ins.text += stream.read_symbol()
+            ins.frame = AdhocCodeFrame(stream.version)
+            ins.frame.read(stream)
+        elif type == INS["MODULE_DEFINE"]:
+            names = stream.read_symbols()
+            ins.scope_name = names[-1] if names else ""
+            ins.text += ": " + ",".join(names)
+        elif type == INS["CLASS_DEFINE"]:
+            ins.scope_name = stream.read_symbol()
+            ins.text += f": {ins.scope_name} extends {','.join(stream.read_symbols())}"
+        elif type == INS["SET_STATE"] or type == INS["SET_STATE_OLD"]:
+            ins.state = stream.read_byte()
+            ins.text += ": " + _format_state(ins.state)
+        else:
+            reader = _OPERAND_READERS[type]
+            if reader is not None:
+                ins.text += ": " + reader(stream)
+        return ins
+
+    def signature(self):
+        """Parameter and captured variable list, the first line of the subroutine header."""
+        text = "(" + ", ".join(self.function_parameters)
+        if self.function_parameters and self.has_rest_element:
+            text += "..."
+        text += ")"
+        if self.captured_callback_variables:
+            text += "[" + ", ".join(self.captured_callback_variables) + "]"
+        return text
+
+    def disassemble(self):
+        """Subroutine header text, mirrors AdhocCodeFrame.Dissasemble."""
+        text = self.signature()
+        text += f"\n  > Instruction Count: {len(self.instructions)} ({self.instruction_count_offset:02X})\n"
+        static = "=Variable Heap Size" if not self.uses_new_split_stack() else self.static_variable_storage_size
+        text += f"  > Stack Size: {self.stack_size} - Variable Heap Size: {self.local_variable_storage_size} - Variable Heap Size Static: {static}"
+        return text
+
+class AdhocInstructionRecord:
+    """An instruction in listing order, as walked by AdhocFile.Disassemble."""
+    __slots__ = ("depth", "if_depth", "index", "instruction", "suffix")
+
+    def __init__(self, depth:int, if_depth:int, index:int, instruction:AdhocInstruction, suffix:str):
+        self.depth = depth
+        self.if_depth = if_depth
+        self.index = index
+        self.instruction = instruction
+        self.suffix = suffix
+
+    @property
+    def type(self):
+        return self.instruction.type
+
+    @property
+    def text(self):
+        """Same as what GTAdhocCompare's RE_INSTRUCTION captures from the instruction's .ad.diss line."""
+        ins = self.instruction
+        if ins.frame is not None:
+            return ins.text + ins.frame.signature()
+        return ins.text.partition("\n")[0] + self.suffix
+
+class AdhocFile:
+    def __init__(self, version:int):
+        self.version = version
+        self.symbol_table = None
+        self.top_level_frame = None
+
+    @staticmethod
+    def read_from_file(path:str):
+        with open(path, "rb") as f:
+            return AdhocFile.read(f.read())
+
+    @staticmethod
+    def read(data):
+        stream = AdhocStream(data)
+        magic = stream.read_zero_terminated()
+        if magic[:4] != MAGIC:
+            raise AdhocFileError("Invalid MAGIC, doesn't match ADCH.")
+        try:
+            version = int(magic[4:7])
+        except ValueError:
+            raise AdhocFileError(f"Invalid version in magic: {magic!r}")
+        stream.version = version
+
+        adhoc = AdhocFile(version)
+        if 9 <= version <= 12:
+            stream.read_symbol_table()
+            adhoc.symbol_table = stream.symbols
+
+        adhoc.top_level_frame = AdhocCodeFrame(version)
+        adhoc.top_level_frame.read(stream)
+        return adhoc
+
+    @property
+    def root_instruction_count(self):
+        return len(self.top_level_frame.instructions)
+
+    def walk(self):
+        """Yields (AdhocInstructionRecord, None) for every instruction and (None, depth) when a subroutine ends,
+        in the order and with the module/class tracking of AdhocFile.Disassemble."""
+        mod_or_class = ["TopLevel"]
+        yield from self._walk_frame(self.top_level_frame, 0, mod_or_class)
+
+    def _walk_frame(self, frame:AdhocCodeFrame, depth:int, mod_or_class:List[str]):
+        if_depth = 0
+        for i, ins in enumerate(frame.instructions):
+            type = ins.type
+            suffix = ""
+            if type == INS["SET_STATE"] or (type == INS["SET_STATE_OLD"] and depth == 0):
+                if ins.state == 0: # EXIT
+                    suffix = f"  [EXIT {mod_or_class.pop() if mod_or_class else ''}]"
+            yield AdhocInstructionRecord(depth, if_depth, i, ins, suffix), None
+
+            if ins.frame is not None:
+                yield from self._walk_frame(ins.frame, depth + 1, mod_or_class)
+                yield None, depth + 1
+            elif type == INS["JUMP_IF_FALSE"] or type == INS["JUMP_IF_TRUE"]:
+                if_depth += 1
+            elif type == INS["LEAVE"]:
+                if_depth -= 1
+            elif type == INS["JUMP"] and self.version < 10:
+                if_depth -= 1
+            elif ins.scope_name is not None:
+                mod_or_class.append(ins.scope_name)
+            elif type == INS["TRY_CATCH"]:
+                mod_or_class.append("TryCatch")
+            elif type == INS["MODULE_CONSTRUCTOR"]:
+                mod_or_class.append("Module Constructor")
+
+    def iter_instructions(self):
+        """Yields every instruction record in listing order."""
+        for record, _ in self.walk():
+            if record is not None:
+                yield record
+
+    def disassemble(self, out_path:str):
+        """Writes the same .ad.diss listing as adhoc.exe."""
+        frame = self.top_level_frame
+        with open(out_path, "w", encoding="utf-8") as sw:
+            sw.write("==== Disassembly generated by GTAdhocToolchain ====\n")
+            if frame.source_file_path:
+                sw.write(f"Original File Name: {frame.source_file_path}\n")
+            sw.write(f"Version: {self.version}\n")
+            if self.symbol_table is not None:
+                sw.write(f"({len(self.symbol_table)} strings)\n")
+            sw.write(f"Root Instructions: {len(frame.instructions)}\n")
+            static = "=Variable Storage Size" if not frame.uses_new_split_stack() else frame.static_variable_storage_size
+            sw.write(f"  > Stack Size: {frame.stack_size} - Variable Storage Size: {frame.local_variable_storage_size} - "
+                     f"Variable Storage Size Static: {static}\n")
+
+            for record, ended_depth in self.walk():
+                if record is None:
+                    sw.write("\n")
+                    if ended_depth > 1:
+                        sw.write("\n")
+                    continue
+
+                ins = record.instruction
+                if record.depth == 0 and ins.frame is not None:
+                    sw.write("\n")
+                sw.write("  " * record.depth + "  " * max(record.if_depth, 0))
+                sw.write(f"{ins.offset - 5:02X}".rjust(6) + f"|{ins.line_number:4}|{record.index:3}| ")
+                sw.write(ins.disassemble())
+                if ins.frame is not None:
+                    if record.depth == 0:
+                        sw.write("\n")
+                    continue
+                sw.write(record.suffix + "\n")
+
+##########
+# main
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Disassembles compiled adhoc scripts (.adc) to .ad.diss without adhoc.exe.")
+    parser.add_argument("input_files", nargs="+", help="Input .adc files")
+    out = parser.parse_args()
+
+    for path in out.input_files:
+        adc = AdhocFile.read_from_file(path)
+        out_path = path[:-4] + ".ad.diss" if path.lower().endswith(".adc") else path + ".ad.diss"
+        print(f"Dissasembling {out_path}...")
+        adc.disassemble(out_path)
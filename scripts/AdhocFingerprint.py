@@ -0,0 +1,236 @@
+#/usr/bin/env python3
+"""Input fingerprints for builds, to skip the ones whose inputs did not change.
+
+A fingerprint covers everything a build reads: the .ad or .yaml itself, the project's sources and
+extra resources, every file they include (recursively, resolved like the preprocessor does), the
+version and the adhoc executable. Files are hashed by content, but a hash is reused for as long as
+the file's size and mtime stay the same, so checking an unchanged build only costs a stat per file.
+"""
+import hashlib, json, os, re, threading
+from typing import List
+
+FINGERPRINT_VERSION = 1
+
+RE_INCLUDE = re.compile(r'^\s*#?\s*include\s*"([^"]+)"', re.MULTILINE)
+
+##########
+# dependencies
+
+def get_dependencies(path:str, include_dirs:List[str]=()):
+    """Returns a script and every file it includes, recursively, resolved like the preprocessor does.
+
+    Includes are looked up in include_dirs first (the base include folder), then next to the
+    script, then next to the including file."""
+    root_dir = os.path.dirname(os.path.abspath(path))
+    search_dirs = [os.path.abspath(directory) for directory in include_dirs] + [root_dir]
+    dependencies = set()
+    pending = [os.path.abspath(path)]
+    while pending:
+        current = pending.pop()
+        if current in dependencies:
+            continue
+        dependencies.add(current)
+        if not current.endswith(".ad"):
+            continue
+        try:
+            with open(current, "r", encoding= 'utf-8', errors="replace") as f:
+                source = f.read()
+        except OSError:
+            continue
+        for include in RE_INCLUDE.findall(source):
+            for directory in search_dirs + [os.path.dirname(current)]:
+                candidate = os.path.normpath(os.path.join(directory, include))
+                if os.path.isfile(candidate):
+                    pending.append(candidate)
+                    break
+    return dependencies
+
+##########
+# projects
+
+def _parse_scalar(value:str):
+    value = value.strip()
+    if value[:1] in ('"', "'"):
+        return value[1:value.rfind(value[0])] if value.rfind(value[0]) > 0 else value[1:]
+    if value.startswith("[") and value.endswith("]"):
+        return [_parse_scalar(item) for item in value[1:-1].split(",") if item.strip()]
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+def _strip_comment(line:str):
+    if line.lstrip().startswith("#"):
+        return ""
+    index = line.find(" #")
+    return line[:index] if index != -1 and line.count('"', 0, index) % 2 == 0 else line
+
+def parse_project_yaml(text:str):
+    """Reads the subset of YAML project files use: top level scalars, flow lists, and block lists of
+    scalars or of mappings (files_to_compile, extra_widget_resources)."""
+    project = {}
+    key = None
+    item = None
+    for raw_line in text.splitlines():
+        line = _strip_comment(raw_line).rstrip()
+        if not line.strip():
+            continue
+
+        indent = len(line) - len(line.lstrip())
+        stripped = line.strip()
+        if indent == 0 and not stripped.startswith("- "):
+            key, _, value = stripped.partition(":")
+            key = key.strip()
+            item = None
+            if value.strip():
+                project[key] = _parse_scalar(value)
+            else:
+                project[key] = []
+        elif key is not None and isinstance(project.get(key), list):
+            if stripped.startswith("- ") or stripped == "-":
+                entry = stripped[1:].strip()
+                name, separator, value = entry.partition(":")
+                if separator and not entry.startswith(('"', "'")):
+                    item = {name.strip(): _parse_scalar(value)}
+                    project[key].append(item)
+                else:
+                    item = None
+                    project[key].append(_parse_scalar(entry))
+            elif item is not None:
+                name, _, value = stripped.partition(":")
+                item[name.strip()] = _parse_scalar(value)
+    return project
+
+def read_project(path:str):
+    """Reads a .yaml project, with paths resolved the way AdhocProject.Read does."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        project = parse_project_yaml(f.read())
+
+    # Like Path.Combine(ProjectFilePath, ...): relative to the project file's path itself
+    project_dir = os.path.normpath(os.path.join(os.path.abspath(path), str(project.get("project_folder", ""))))
+    base_include = os.path.normpath(os.path.join(os.path.abspath(path), str(project.get("base_include_folder", ""))))
+    project["project_dir"] = project_dir
+    project["base_include_dir"] = base_include
+
+    def resolve(items):
+        return [os.path.normpath(os.path.join(project_dir, item["name"] if isinstance(item, dict) else str(item)))
+                for item in items or [] if not isinstance(item, dict) or "name" in item]
+    project["source_paths"] = resolve(project.get("files_to_compile"))
+    project["resource_paths"] = resolve(project.get("extra_widget_resources"))
+    return project
+
+def get_project_output(project:dict, output_path:str):
+    """The .adc a project build writes, given the output passed to `adhoc build -o`."""
+    output_dir = os.path.dirname(output_path) if output_path else project["project_dir"]
+    return os.path.join(output_dir, str(project.get("output_name", ""))) + ".adc"
+
+def get_build_inputs(input_path:str):
+    """Files read by `adhoc build -i input_path`, and the project's contents for .yaml inputs (else None)."""
+    if not input_path.lower().endswith(".yaml"):
+        return get_dependencies(input_path), None
+
+    project = read_project(input_path)
+    inputs = {os.path.abspath(input_path)}
+    include_dirs = [project["base_include_dir"], project["project_dir"]]
+    for source in project["source_paths"]:
+        inputs |= get_dependencies(source, include_dirs)
+    for resource in project["resource_paths"]:
+        if os.path.isdir(resource):
+            for dirpath, _, filenames in os.walk(resource):
+                inputs.update(os.path.join(dirpath, filename) for filename in filenames)
+        else:
+            inputs.add(resource)
+    return inputs, project
+
+##########
+# fingerprints
+
+class FingerprintStore:
+    """Last successful fingerprint per build, plus the file hash memo, kept in a JSON file.
+
+    Safe to use from several threads, call save() to write it out."""
+
+    def __init__(self, path:str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._builds = {}
+        self._files = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == FINGERPRINT_VERSION:
+                self._builds = data["builds"]
+                self._files = data["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def hash_file(self, path:str):
+        """Content hash of a file, None if it does not exist."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            memo = self._files.get(path)
+        if memo is not None and memo[0] == stat.st_size and memo[1] == stat.st_mtime_ns:
+            return memo[2]
+
+        digest = hashlib.sha1()
+        try:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        with self._lock:
+            self._files[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+            self._dirty = True
+        return digest.hexdigest()
+
+    def fingerprint(self, input_path:str, version, adhoc_path:str, extra:dict=None):
+        """Returns (fingerprint, project) for a build, project being the parsed .yaml or None."""
+        inputs, project = get_build_inputs(input_path)
+        data = {
+            "version": str(project.get("version", 12) if project is not None else version),
+            "adhoc": self.hash_file(adhoc_path),
+            "files": sorted((path, self.hash_file(path)) for path in inputs),
+            "extra": extra or {},
+        }
+        return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest(), project
+
+    def get(self, key:str):
+        with self._lock:
+            return self._builds.get(key)
+
+    def set(self, key:str, fingerprint:str):
+        with self._lock:
+            if fingerprint is None:
+                self._dirty |= self._builds.pop(key, None) is not None
+            elif self._builds.get(key) != fingerprint:
+                self._builds[key] = fingerprint
+                self._dirty = True
+
+    def save(self):
+        with self._save_lock:
+            self._save()
+
+    def _save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            # Forget hashes of files no longer around, so the memo does not grow forever
+            self._files = {path: memo for path, memo in self._files.items() if os.path.exists(path)}
+            data = json.dumps({"version": FINGERPRINT_VERSION, "builds": self._builds, "files": self._files})
+            self._dirty = False
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(temp_path, self.path)
+
+def get_build_key(*parts):
+    """Identifies a build by what it reads and writes, not by its label."""
+    return hashlib.sha1("|".join(os.path.abspath(part) if part else "" for part in parts).encode("utf-8")).hexdigest()
@@ -0,0 +1,509 @@
+#/usr/bin/env python3
+"""Reader, extractor and incremental packer for GPB menu resource archives (GpbData2/3/4).
+
+Mirrors GTAdhocToolchain.Menu.Resources. Every variant is a header, a table of entries (name offset,
+data offset, size), the zero-terminated names, then each file's data, aligned to 0x80 with 0x5E bytes:
+
+    GpbData2 (GT4)      "2bpg" big endian / "gpb2" little, 0x10 header, 0x10 byte entries right after it
+    GpbData3 (PS3 GTs)  "3bpg" big endian / "gpb3" little, 0x20 header with the table offsets, 0x10 byte entries
+    GpbData4 (PS4/5)    "4bpg" little endian / "gpb4" big, 0x20 header with the table offsets, 0x20 byte entries
+
+Entries are sorted by name, the game bsearches them. Opening a GPB only reads its header and entries, the
+file being memory mapped, and files are read when asked for. Converting textures (and inflating PS2ZIP
+files) is left to adhoc.exe, only for the files that need it: they are copied to small temporary GPBs,
+unpacked by a pool of adhoc.exe workers at once.
+
+Packing over a previous GPB copies the data of unchanged files from it (in the kernel where possible)
+and only reads the files that changed, see AdhocPackage.pack_folder.
+"""
+import argparse, hashlib, mmap, os, struct, tempfile, time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from AdhocPackage import copy_range, hash_file, is_unchanged, read_package_hashes, write_package_hashes
+from AdhocWorker import format_message, get_worker
+
+ALIGNMENT = 0x80
+PADDING = b"\x5E"
+
+# First 4 bytes (little endian, whatever the GPB's endianness) of files adhoc.exe converts when unpacking
+PS2ZIP_MAGIC = 0xFFF7EEC5
+TEXTURE_MAGICS = {
+    "GpbData2": 0x31786554, # Tex1
+    "GpbData3": 0x33535854, # TXS3
+    "GpbData4": 0x30504449, # PDI0
+}
+
+class GpbError(Exception):
+    pass
+
+class GpbEntry:
+    __slots__ = ("name", "data_offset", "size")
+
+    def __init__(self, name:str, data_offset:int, size:int):
+        self.name = name
+        self.data_offset = data_offset
+        self.size = size
+
+    def __repr__(self):
+        return f"GpbEntry({self.name!r}, offset=0x{self.data_offset:X}, size={self.size})"
+
+class GpbBase(Mapping):
+    """A memory mapped GPB, a read-only dict of name to GpbEntry. Use as a context manager or close() it."""
+
+    # Magic to whether it is big endian
+    MAGICS = {}
+    HEADER_SIZE = 0
+    ENTRY_SIZE = 0
+
+    def __init__(self, path:str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < self.HEADER_SIZE:
+                raise GpbError(f"{path} is too small to be a GPB")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic = self._map[:4]
+            if magic not in self.MAGICS:
+                raise GpbError(f"{path} is not a {type(self).__name__} file")
+            self.big_endian = self.MAGICS[magic]
+            self._endian = ">" if self.big_endian else "<"
+            count, entries_offset = self._read_table_location()
+            if count < 0 or entries_offset < 0 or entries_offset + count * self.ENTRY_SIZE > size:
+                raise GpbError(f"Entries of {path} are out of bounds")
+            self.entries = []
+            for i in range(count):
+                name_offset, data_offset, entry_size = self._read_entry(entries_offset + i * self.ENTRY_SIZE)
+                if name_offset < 0 or name_offset >= size:
+                    raise GpbError(f"Invalid file name offset 0x{name_offset:X} in {path}")
+                if data_offset < 0 or entry_size < 0 or data_offset + entry_size > size:
+                    raise GpbError(f"Data of file #{i} of {path} is out of bounds")
+                self.entries.append(GpbEntry(self._read_name(name_offset), data_offset, entry_size))
+        except BaseException:
+            self.close()
+            raise
+        self._index = {entry.name: entry for entry in self.entries}
+
+    def _read_table_location(self):
+        """Returns (entry count, offset of the entries)."""
+        raise NotImplementedError
+
+    def _read_entry(self, offset:int):
+        """Returns (name offset, data offset, size) of the entry at offset."""
+        raise NotImplementedError
+
+    def _read_name(self, offset:int):
+        end = self._map.find(b"\0", offset)
+        if end == -1:
+            raise GpbError(f"Invalid file name offset 0x{offset:X} in {self.path}")
+        return self._map[offset:end].decode("utf-8", errors="replace")
+
+    @classmethod
+    def pack_header(cls, endian:str, magic:bytes, count:int, entries_offset:int, names_offset:int, data_offset:int):
+        raise NotImplementedError
+
+    @classmethod
+    def pack_entry(cls, endian:str, name_offset:int, data_offset:int, size:int):
+        raise NotImplementedError
+
+    @classmethod
+    def get_magic(cls, big_endian:bool):
+        return next(magic for magic, big in cls.MAGICS.items() if big == big_endian)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __getitem__(self, name:str):
+        return self._index[name]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def find(self, name:str):
+        return self._index.get(name)
+
+    def _get_entry(self, entry):
+        return entry if isinstance(entry, GpbEntry) else self[entry]
+
+    def read(self, entry):
+        """The data of a file (entry or name), as stored."""
+        entry = self._get_entry(entry)
+        return self._map[entry.data_offset:entry.data_offset + entry.size]
+
+    def hash(self, entry):
+        """Content sha1 of a file, as AdhocPackage.hash_file would give for it."""
+        return hashlib.sha1(self.read(entry)).hexdigest()
+
+    def copy_data(self, entry, destination):
+        """Copies the data of a file to an unbuffered file, see AdhocPackage.copy_range."""
+        entry = self._get_entry(entry)
+        copy_range(self._file, destination, entry.data_offset, entry.size)
+
+    def _starts_with(self, entry:GpbEntry, magic:int):
+        return entry.size >= 4 and struct.unpack_from("<I", self._map, entry.data_offset)[0] == magic
+
+    def is_texture(self, entry):
+        entry = self._get_entry(entry)
+        return self._starts_with(entry, TEXTURE_MAGICS[type(self).__name__])
+
+    def needs_adhoc(self, entry, convert:bool):
+        """Whether adhoc.exe has to unpack a file: PS2ZIP compressed ones, and textures if converting."""
+        entry = self._get_entry(entry)
+        return self._starts_with(entry, PS2ZIP_MAGIC) or (convert and self.is_texture(entry))
+
+    def get_output_name(self, entry):
+        """Where a file is unpacked, relative to the output folder (before converting it)."""
+        name = self._get_entry(entry).name
+        return name[1:] if name.startswith("/") else name
+
+    def extract(self, entry, output_dir:str):
+        """Writes a file (entry or name) as stored under output_dir, returns its path."""
+        entry = self._get_entry(entry)
+        output_path = os.path.normpath(os.path.join(output_dir, self.get_output_name(entry)))
+        if os.path.commonpath([os.path.abspath(output_dir), os.path.abspath(output_path)]) != os.path.abspath(output_dir):
+            raise GpbError(f"Refusing to extract {entry.name} outside of {output_dir}")
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with open(output_path, "wb", buffering=0) as f:
+            self.copy_data(entry, f)
+        return output_path
+
+class GpbData2(GpbBase):
+    MAGICS = {b"2bpg": True, b"gpb2": False}
+    HEADER_SIZE = 0x10
+    ENTRY_SIZE = 0x10
+
+    def _read_table_location(self):
+        return struct.unpack_from(f"{self._endian}i", self._map, 0x0C)[0], self.HEADER_SIZE
+
+    def _read_entry(self, offset:int):
+        return struct.unpack_from(f"{self._endian}3i", self._map, offset)
+
+    @classmethod
+    def pack_header(cls, endian:str, magic:bytes, count:int, entries_offset:int, names_offset:int, data_offset:int):
+        return struct.pack(f"{endian}4s3i", magic, 0, cls.HEADER_SIZE, count)
+
+    @classmethod
+    def pack_entry(cls, endian:str, name_offset:int, data_offset:int, size:int):
+        return struct.pack(f"{endian}4i", name_offset, data_offset, size, 0)
+
+class GpbData3(GpbBase):
+    MAGICS = {b"3bpg": True, b"gpb3": False}
+    HEADER_SIZE = 0x20
+    ENTRY_SIZE = 0x10
+
+    def _read_table_location(self):
+        return struct.unpack_from(f"{self._endian}2i", self._map, 0x0C)
+
+    def _read_entry(self, offset:int):
+        return struct.unpack_from(f"{self._endian}3i", self._map, offset)
+
+    @classmethod
+    def pack_header(cls, endian:str, magic:bytes, count:int, entries_offset:int, names_offset:int, data_offset:int):
+        return struct.pack(f"{endian}4s7i", magic, 0, cls.HEADER_SIZE, count, entries_offset, names_offset, data_offset, 0)
+
+    @classmethod
+    def pack_entry(cls, endian:str, name_offset:int, data_offset:int, size:int):
+        return struct.pack(f"{endian}4i", name_offset, data_offset, size, 0)
+
+class GpbData4(GpbBase):
+    # Unlike the older versions, the reversed magic is the little endian one
+    MAGICS = {b"4bpg": False, b"gpb4": True}
+    HEADER_SIZE = 0x20
+    ENTRY_SIZE = 0x20
+
+    def _read_table_location(self):
+        return struct.unpack_from(f"{self._endian}2i", self._map, 0x10)
+
+    def _read_entry(self, offset:int):
+        name_offset, data_offset, _, size = struct.unpack_from(f"{self._endian}4q", self._map, offset)
+        return name_offset, data_offset, size
+
+    @classmethod
+    def pack_header(cls, endian:str, magic:bytes, count:int, entries_offset:int, names_offset:int, data_offset:int):
+        return struct.pack(f"{endian}4si8x4i", magic, cls.HEADER_SIZE, count, entries_offset, names_offset, data_offset)
+
+    @classmethod
+    def pack_entry(cls, endian:str, name_offset:int, data_offset:int, size:int):
+        return struct.pack(f"{endian}4q", name_offset, data_offset, 0, size)
+
+GPB_TYPES = (GpbData2, GpbData3, GpbData4)
+
+def read_gpb(path:str):
+    """Opens a GPB of any version, like GpbBase.ReadFile. Raises GpbError if it is not one."""
+    with open(path, "rb") as f:
+        magic = f.read(4)
+    for gpb_type in GPB_TYPES:
+        if magic in gpb_type.MAGICS:
+            return gpb_type(path)
+    raise GpbError(f"{path} is not a GPB (unknown magic {magic!r})")
+
+##########
+# writing
+
+def _pad(f):
+    f.write(PADDING * (-f.tell() % ALIGNMENT))
+
+def write_gpb(path:str, gpb_type:type, big_endian:bool, files:List[tuple]):
+    """Writes a GPB the way GpbData3.Pack lays it out. files are (name, write_data) sorted by name,
+    write_data(f) writing a file's data to the unbuffered output and returning nothing."""
+    endian = ">" if big_endian else "<"
+    entries_offset = gpb_type.HEADER_SIZE
+    names_offset = entries_offset + gpb_type.ENTRY_SIZE * len(files)
+    with open(path, "wb", buffering=0) as f:
+        f.write(b"\0" * names_offset)
+        name_offsets = []
+        for name, _ in files:
+            name_offsets.append(f.tell())
+            f.write(name.encode("utf-8") + b"\0")
+        _pad(f)
+        data_offset = f.tell()
+
+        entries = []
+        for (_, write_data), name_offset in zip(files, name_offsets):
+            file_offset = f.tell()
+            write_data(f)
+            size = f.tell() - file_offset
+            _pad(f)
+            if f.tell() > 0x7FFFFFFF:
+                raise GpbError("GPB would be larger than 2GB")
+            entries.append(gpb_type.pack_entry(endian, name_offset, file_offset, size))
+
+        f.seek(0)
+        f.write(gpb_type.pack_header(endian, gpb_type.get_magic(big_endian), len(files), entries_offset, names_offset, data_offset))
+        f.seek(entries_offset)
+        f.write(b"".join(entries))
+
+def find_gpb_files(folder:str, gt5:bool=False):
+    """(name, path) of the files of a folder in the order GpbData3.Pack writes them, sorted by name.
+
+    Names are paths relative to the folder with '/' separators, starting with '/' except for GT5."""
+    folder = os.path.abspath(folder)
+    files = []
+    for dirpath, _, filenames in os.walk(folder):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            name = os.path.relpath(path, folder).replace("\\", "/")
+            files.append((name if gt5 else "/" + name, path))
+    files.sort()
+    return files
+
+def pack_folder(folder:str, output_path:str, previous_path:str=None, big_endian:bool=True, gt5:bool=False,
+                on_file:Callable[[str, bool], None]=None):
+    """Packs a folder into a GpbData3 like `adhoc pack` does for .gpb outputs. Returns (files, reused).
+
+    Files with the same name, size and contents as in previous_path (a GpbData3, usually the previous
+    build of this one) have their data copied from it. A file whose size and mtime did not change since
+    that GPB was written is not even read. The GPB is written to a temp file first, so previous_path may
+    be output_path."""
+    files = find_gpb_files(folder, gt5)
+
+    previous = None
+    previous_hashes = {}
+    if previous_path is not None and os.path.isfile(previous_path):
+        previous = GpbData3(previous_path)
+        previous_hashes = read_package_hashes(previous_path) or {}
+
+    hashes = {}
+    reused = 0
+
+    def get_writer(name, path):
+        def write_data(f):
+            nonlocal reused
+            stat = os.stat(path)
+            entry = previous.find(name) if previous is not None else None
+            unchanged, digest = False, None
+            if entry is not None and entry.size == stat.st_size:
+                known = previous_hashes.get(name) or [previous.hash(entry), entry.size, None]
+                unchanged, digest = is_unchanged(path, stat, known)
+
+            if unchanged:
+                previous.copy_data(entry, f)
+                reused += 1
+            else:
+                digest = hash_file(path)
+                with open(path, "rb") as source:
+                    copy_range(source, f, 0, stat.st_size)
+            hashes[name] = [digest, stat.st_size, stat.st_mtime_ns]
+            if on_file:
+                on_file(name, unchanged)
+        return write_data
+
+    temp_path = output_path + ".tmp"
+    try:
+        write_gpb(temp_path, GpbData3, big_endian, [(name, get_writer(name, path)) for name, path in files])
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        if previous is not None:
+            previous.close()
+
+    os.replace(temp_path, output_path)
+    write_package_hashes(output_path, hashes)
+    return len(files), reused
+
+##########
+# unpacking
+
+def _split_batches(entries:List[GpbEntry], count:int):
+    """Splits entries into up to count batches of about the same total size, biggest first."""
+    batches = [[] for _ in range(min(count, len(entries)))]
+    sizes = [0] * len(batches)
+    for entry in sorted(entries, key=lambda entry: entry.size, reverse=True):
+        smallest = sizes.index(min(sizes))
+        batches[smallest].append(entry)
+        sizes[smallest] += entry.size
+    return [sorted(batch, key=lambda entry: entry.name) for batch in batches]
+
+def _move_tree(source_dir:str, output_dir:str):
+    for dirpath, _, filenames in os.walk(source_dir):
+        target_dir = os.path.join(output_dir, os.path.relpath(dirpath, source_dir))
+        os.makedirs(target_dir, exist_ok=True)
+        for filename in filenames:
+            os.replace(os.path.join(dirpath, filename), os.path.join(target_dir, filename))
+
+def unpack_with_adhoc(gpb:GpbBase, entries:List[GpbEntry], output_dir:str, adhoc_path:str="adhoc.exe", max_workers:int=None,
+                      on_log:Callable[[str, str], None]=None, job=None, convert:bool=True):
+    """Has adhoc.exe unpack entries of a GPB into output_dir, spread across max_workers workers.
+
+    The entries are copied into one temporary GPB per worker, of the same version, which are unpacked like
+    `adhoc unpack` does: PS2ZIP files are inflated, textures are only converted if convert is set.
+    Returns the entries that failed."""
+    max_workers = max_workers or os.cpu_count()
+    worker = get_worker(adhoc_path, max_workers)
+    failed = []
+    os.makedirs(output_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="AdhocGpb", dir=output_dir) as temp_dir:
+        def unpack(index, batch):
+            batch_path = os.path.join(temp_dir, f"batch{index}.gpb")
+            write_gpb(batch_path, type(gpb), gpb.big_endian,
+                      [(entry.name, lambda f, entry=entry: gpb.copy_data(entry, f)) for entry in batch])
+            result = worker.disassemble(batch_path, job=job, convert_gpb_files=convert)
+            if result.cancelled:
+                return
+            # adhoc.exe unpacks next to the GPB, in a folder named after it
+            _move_tree(os.path.join(temp_dir, f"batch{index}"), output_dir)
+            if not result.ok:
+                failed.extend(batch)
+                if on_log:
+                    on_log("ERROR", f"adhoc.exe failed to unpack {len(batch)} files of {gpb.path} (exit {result.exit_code})")
+                    for level, message in result.messages:
+                        on_log(level, message)
+
+        with ThreadPoolExecutor(max_workers, thread_name_prefix="AdhocGpb") as executor:
+            for future in [executor.submit(unpack, i, batch) for i, batch in enumerate(_split_batches(entries, max_workers))]:
+                future.result()
+    return failed
+
+def unpack(gpb:GpbBase, output_dir:str, names:List[str]=None, convert:bool=False, adhoc_path:str="adhoc.exe",
+           max_workers:int=None, on_log:Callable[[str, str], None]=None, job=None):
+    """Extracts files (every one by default) like `adhoc unpack` does, textures being converted if convert is set.
+
+    Files adhoc.exe does not need to touch are written from Python right away. Returns the entries that failed."""
+    entries = list(gpb.values()) if names is None else [gpb[name] for name in names]
+    with_adhoc = []
+    for entry in entries:
+        if gpb.needs_adhoc(entry, convert):
+            with_adhoc.append(entry)
+        else:
+            gpb.extract(entry, output_dir)
+    if not with_adhoc:
+        return []
+    return unpack_with_adhoc(gpb, with_adhoc, output_dir, adhoc_path, max_workers, on_log, job, convert)
+
+##########
+# main
+
+def pack(out):
+    if not os.path.isdir(out.pack):
+        print(f"==> Folder not found: {out.pack}")
+        exit(1)
+    previous_path = None if out.no_reuse else (out.previous or out.gpb)
+
+    start = time.perf_counter()
+    def on_file(name, reused):
+        print(f"[:] GPB: Adding {name}" + (" (unchanged)" if reused else ""))
+
+    try:
+        count, reused = pack_folder(out.pack, out.gpb, previous_path, not out.le, out.gt5, on_file)
+    except GpbError as e:
+        print(f"==> {e}")
+        exit(1)
+    print(f"Packed {count} files to {out.gpb} in {time.perf_counter() - start:.3f}s, {reused} were copied unchanged")
+
+def main():
+    parser = argparse.ArgumentParser(description="Lists or extracts the files of a GPB (GpbData2/3/4), or packs a folder into a GpbData3.")
+    parser.add_argument("gpb", help="Input .gpb, or output one with --pack")
+    parser.add_argument("names", nargs="*", help="Files to extract (default is all of them)")
+    parser.add_argument("-l", "--list", action="store_true", help="Lists the files of the GPB and their size")
+    parser.add_argument("-o", "--output", help="Output folder (default is a folder named after the GPB, next to it)")
+    parser.add_argument("-c", "--convert", action="store_true", help="Converts textures to their original formats (png, dds) with adhoc.exe")
+    parser.add_argument("-a", "--adhoc", default="adhoc.exe", help="Path to adhoc.exe (default is 'adhoc.exe')")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Amount of adhoc.exe workers (default is the cpu count)")
+    parser.add_argument("-p", "--pack", metavar="FOLDER", help="Packs this folder into the GPB")
+    parser.add_argument("--le", action="store_true", help="With --pack, writes a little endian GPB (gpb3) instead of a big endian one (3bpg)")
+    parser.add_argument("--gt5", action="store_true", help="With --pack, file names do not start with '/', like GT5 expects")
+    parser.add_argument("--previous", help="With --pack, GPB to copy unchanged files from (default is the output GPB, if it exists)")
+    parser.add_argument("--no-reuse", action="store_true", help="With --pack, reads every file again")
+    out = parser.parse_intermixed_args()
+
+    if out.pack:
+        pack(out)
+        return
+
+    try:
+        gpb = read_gpb(out.gpb)
+    except FileNotFoundError:
+        print(f"==> File not found: {out.gpb}")
+        exit(1)
+    except GpbError as e:
+        print(f"==> {e}")
+        exit(1)
+
+    with gpb:
+        missing = [name for name in out.names if name not in gpb]
+        if missing:
+            for name in missing:
+                print(f"==> Not in GPB: {name}")
+            exit(1)
+
+        if out.list:
+            for name in out.names or gpb:
+                entry = gpb[name]
+                print(f"{entry.size:10} {entry.name}" + (" (texture)" if gpb.is_texture(entry) else ""))
+            return
+
+        output_dir = out.output or os.path.splitext(out.gpb)[0]
+        start = time.perf_counter()
+        try:
+            failed = unpack(gpb, output_dir, out.names or None, out.convert, out.adhoc, max(1, out.jobs),
+                            lambda level, message: print(format_message(level, message)))
+        except FileNotFoundError:
+            print(f"==> adhoc.exe not found at: {out.adhoc}")
+            exit(1)
+        except GpbError as e:
+            print(f"==> {e}")
+            exit(1)
+        count = len(out.names) if out.names else len(gpb)
+        print(f"Extracted {count - len(failed)} files to {output_dir} in {time.perf_counter() - start:.2f}s"
+              + (f", {len(failed)} failed" if failed else ""))
+        if failed:
+            exit(1)
+
+if __name__ == "__main__":
+    main()
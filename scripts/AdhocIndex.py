@@ -0,0 +1,371 @@
+#/usr/bin/env python3
+"""Index of the files inside every .mpackage, .gpb and .adc of a game dump, kept in a SQLite database.
+
+Each archive's entries are recorded with their name, size, offset and content sha1, so finding which
+archives contain a widget, texture or script is a query instead of unpacking them one by one. Scans
+are incremental: archives whose size and mtime did not change are not opened again, the others are
+indexed in a process pool. Archives whose contents changed (or that were added or removed) are
+timestamped, to tell what changed since a given scan.
+"""
+import argparse, hashlib, os, sqlite3, threading, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, List
+
+from AdhocGpb import read_gpb
+from AdhocPackage import MPackage, get_package_hashes, get_project_name, hash_file, limit_processes, read_package_hashes
+
+DEFAULT_INDEX_PATH = "adhoc_index.sqlite"
+
+# Archive kind by extension
+ARCHIVE_KINDS = {".mpackage": "mpackage", ".gpb": "gpb", ".adc": "adc"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archives (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    changed REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    archive_id INTEGER NOT NULL REFERENCES archives (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    base_name TEXT NOT NULL COLLATE NOCASE,
+    size INTEGER,
+    offset INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_base_name ON entries (base_name);
+CREATE INDEX IF NOT EXISTS entries_hash ON entries (hash);
+CREATE INDEX IF NOT EXISTS entries_archive ON entries (archive_id);
+CREATE TABLE IF NOT EXISTS removed (
+    path TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    removed REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    root TEXT NOT NULL,
+    started REAL NOT NULL,
+    duration REAL NOT NULL
+);
+"""
+
+def get_archive_kind(path:str):
+    return ARCHIVE_KINDS.get(os.path.splitext(path)[1].lower())
+
+def find_archives(root:str):
+    archives = []
+    for dirpath, _, filenames in os.walk(root):
+        archives.extend(os.path.join(dirpath, filename) for filename in filenames if get_archive_kind(filename))
+    return archives
+
+def read_archive_entries(path:str, root:str):
+    """(name, size, offset, content sha1) of each file of an archive. A .adc is its only file, named by
+    its path relative to root."""
+    kind = get_archive_kind(path)
+    if kind == "adc":
+        return [(os.path.relpath(path, root).replace("\\", "/"), os.path.getsize(path), 0, hash_file(path))]
+
+    if kind == "mpackage":
+        hashes = get_package_hashes(path)
+        with MPackage(path) as package:
+            return [(entry.name, hashes[entry.name][1], entry.data_offset, hashes[entry.name][0]) for entry in package]
+
+    hashes = read_package_hashes(path) or {}
+    with read_gpb(path) as gpb:
+        return [(entry.name, entry.size, entry.data_offset, hashes[entry.name][0] if entry.name in hashes else gpb.hash(entry))
+                for entry in gpb.values()]
+
+def _index_archive(path:str, root:str):
+    """Runs in a worker process: returns (path, entries, error). Any failure is returned rather than raised,
+    a single corrupt archive must not abort the whole scan."""
+    try:
+        return path, read_archive_entries(path, root), None
+    except Exception as e:
+        return path, None, str(e) or type(e).__name__
+
+def get_archive_digest(entries:List[tuple]):
+    """Identifies an archive's contents, regardless of how it was packed."""
+    digest = hashlib.sha1()
+    for name, _, _, content_hash in sorted(entries):
+        digest.update(f"{name}\0{content_hash}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def get_base_name(name:str):
+    return name.replace("\\", "/").rsplit("/", 1)[-1]
+
+def get_search_name(kind:str, name:str):
+    """The name an entry is looked up by, mpackage ones having "%P" back to "gt6"."""
+    return get_project_name(name) if kind == "mpackage" else name
+
+class IndexedEntry:
+    __slots__ = ("archive", "kind", "name", "size", "offset", "hash")
+
+    def __init__(self, archive:str, kind:str, name:str, size:int, offset:int, hash:str):
+        self.archive = archive
+        self.kind = kind
+        self.name = name
+        self.size = size
+        self.offset = offset
+        self.hash = hash
+
+class ArchiveChange:
+    __slots__ = ("path", "kind", "time", "removed")
+
+    def __init__(self, path:str, kind:str, time:float, removed:bool):
+        self.path = path
+        self.kind = kind
+        self.time = time
+        self.removed = removed
+
+class ScanResult:
+    def __init__(self):
+        self.added = []
+        self.changed = []
+        self.touched = []
+        self.removed = []
+        self.failed = []
+        self.unchanged = 0
+
+class AssetIndex:
+    """Thread-safe index of archive entries, the database is only opened once it is used."""
+
+    def __init__(self, path:str=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # Called with the lock held
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute("PRAGMA foreign_keys=ON")
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def scan(self, root:str, max_workers:int=None, on_progress:Callable[[int, int], None]=None,
+             on_log:Callable[[str, str], None]=None):
+        """Indexes the archives under root that are new or whose size or mtime changed, and forgets
+        the ones no longer there. on_progress(done, total) is called as archives are indexed."""
+        root = os.path.abspath(root)
+        started = time.time()
+        result = ScanResult()
+
+        with self._lock:
+            rows = self._connect().execute("SELECT path, size, mtime_ns, digest FROM archives").fetchall()
+        known = {path: (size, mtime_ns, digest) for path, size, mtime_ns, digest in rows
+                 if path == root or path.startswith(root.rstrip(os.sep) + os.sep)}
+
+        pending = []
+        stats = {}
+        for path in find_archives(root):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = stat
+            previous = known.get(path)
+            if previous is not None and previous[0] == stat.st_size and previous[1] == stat.st_mtime_ns:
+                result.unchanged += 1
+            else:
+                pending.append(path)
+        # Biggest first, so the last ones to finish are small
+        pending.sort(key=lambda path: stats[path].st_size, reverse=True)
+
+        def store(path, entries):
+            stat = stats[path]
+            digest = get_archive_digest(entries)
+            previous = known.get(path)
+            if previous is None:
+                result.added.append(path)
+            elif previous[2] != digest:
+                result.changed.append(path)
+            else:
+                result.touched.append(path)
+            kind = get_archive_kind(path)
+            with self._lock:
+                connection = self._connect()
+                with connection:
+                    if previous is not None and previous[2] == digest:
+                        connection.execute("UPDATE archives SET size = ?, mtime_ns = ? WHERE path = ?", (stat.st_size, stat.st_mtime_ns, path))
+                        return
+                    connection.execute("DELETE FROM archives WHERE path = ?", (path,))
+                    archive_id = connection.execute(
+                        "INSERT INTO archives (path, kind, size, mtime_ns, digest, changed) VALUES (?, ?, ?, ?, ?, ?)",
+                        (path, kind, stat.st_size, stat.st_mtime_ns, digest, time.time())).lastrowid
+                    connection.executemany(
+                        "INSERT INTO entries (archive_id, name, base_name, size, offset, hash) VALUES (?, ?, ?, ?, ?, ?)",
+                        ((archive_id, name, get_base_name(get_search_name(kind, name)), size, offset, content_hash)
+                         for name, size, offset, content_hash in entries))
+
+        def index_result(path, entries, error):
+            if error is not None:
+                result.failed.append(path)
+                if on_log:
+                    on_log("ERROR", f"Could not index {path}: {error}")
+            else:
+                store(path, entries)
+
+        done = 0
+        max_workers = limit_processes(max_workers or os.cpu_count())
+        if len(pending) > 1 and max_workers > 1:
+            with ProcessPoolExecutor(max_workers) as executor:
+                for future in as_completed([executor.submit(_index_archive, path, root) for path in pending]):
+                    index_result(*future.result())
+                    done += 1
+                    if on_progress:
+                        on_progress(done, len(pending))
+        else:
+            for path in pending:
+                index_result(*_index_archive(path, root))
+                done += 1
+                if on_progress:
+                    on_progress(done, len(pending))
+
+        removed = [path for path in known if path not in stats]
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                for path in removed:
+                    kind = get_archive_kind(path) or ""
+                    connection.execute("DELETE FROM archives WHERE path = ?", (path,))
+                    connection.execute("INSERT INTO removed (path, kind, removed) VALUES (?, ?, ?)", (path, kind, time.time()))
+                connection.execute("INSERT INTO scans (root, started, duration) VALUES (?, ?, ?)", (root, started, time.time() - started))
+        result.removed = removed
+        return result
+
+    def _entries(self, where:str, args:tuple):
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT archives.path, archives.kind, entries.name, entries.size, entries.offset, entries.hash "
+                f"FROM entries JOIN archives ON archives.id = entries.archive_id WHERE {where} ORDER BY archives.path, entries.name",
+                args).fetchall()
+        return [IndexedEntry(*row) for row in rows]
+
+    def where(self, name:str):
+        """Entries named name, or whose path ends with it ("x.png", "icon/x.png"), ignoring case. * and ?
+        are wildcards, matched case sensitively against whole stored names (e.g. "*/icon/*.png")."""
+        if "*" in name or "?" in name:
+            return self._entries("entries.name GLOB ?", (name,))
+        name = name.replace("\\", "/")
+        entries = self._entries("entries.base_name = ?", (get_base_name(name),))
+        if "/" not in name:
+            return entries
+
+        # Whole path components only
+        suffix = "/" + name.lstrip("/").lower()
+        return [entry for entry in entries if ("/" + get_search_name(entry.kind, entry.name).lstrip("/")).lower().endswith(suffix)]
+
+    def with_hash(self, content_hash:str):
+        """Every copy of some contents, by sha1 (or the start of it)."""
+        return self._entries("entries.hash >= ? AND entries.hash < ?", (content_hash.lower(), content_hash.lower() + "g"))
+
+    def get_last_scan_start(self):
+        with self._lock:
+            row = self._connect().execute("SELECT started FROM scans ORDER BY id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def changes(self, since:float):
+        """Archives added, changed or removed since a time, oldest first."""
+        with self._lock:
+            connection = self._connect()
+            changed = connection.execute("SELECT path, kind, changed FROM archives WHERE changed >= ?", (since,)).fetchall()
+            removed = connection.execute("SELECT path, kind, removed FROM removed WHERE removed >= ?", (since,)).fetchall()
+        changes = [ArchiveChange(*row, False) for row in changed] + [ArchiveChange(*row, True) for row in removed]
+        changes.sort(key=lambda change: change.time)
+        return changes
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+##########
+# main
+
+def format_time(timestamp:float):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+def print_entries(entries:List[IndexedEntry]):
+    for entry in entries:
+        size = "" if entry.size is None else entry.size
+        print(f"{entry.archive}  {entry.name}  ({size} bytes at 0x{entry.offset:X}, {entry.hash[:12]})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexes the files inside the .mpackage, .gpb and .adc files of a folder, and finds them.")
+    parser.add_argument("names", nargs="*", help="Files to find, by name, end of path (icon/x.png) or pattern (*/icon/*.png)")
+    parser.add_argument("-d", "--database", default=DEFAULT_INDEX_PATH, help=f"Index file (default is '{DEFAULT_INDEX_PATH}')")
+    parser.add_argument("-s", "--scan", metavar="FOLDER", help="Indexes new and modified archives of this folder (recursively) first")
+    parser.add_argument("-j", "--jobs", type=int, default=limit_processes(os.cpu_count()),
+                        help="With --scan, amount of archives read at once (default is the cpu count, at most 61 on Windows)")
+    parser.add_argument("--hash", help="Finds every file with these contents (sha1, or the start of it)")
+    parser.add_argument("-c", "--changed", action="store_true", help="Lists archives added, changed or removed by the last scan (or since --since)")
+    parser.add_argument("--since", help="With --changed, lists changes since this date/time (YYYY-MM-DD[ HH:MM])")
+    out = parser.parse_intermixed_args()
+
+    if not (out.scan or out.names or out.hash or out.changed):
+        parser.print_help()
+        exit(1)
+
+    index = AssetIndex(out.database)
+    try:
+        if out.scan:
+            if not os.path.isdir(out.scan):
+                print(f"==> Folder not found: {out.scan}")
+                exit(1)
+
+            def on_progress(done, total):
+                print(f"\rIndexing {done}/{total} archives...".ljust(60), end="", flush=True)
+
+            start = time.perf_counter()
+            try:
+                result = index.scan(out.scan, max(1, out.jobs), on_progress, lambda level, message: print(f"\n==> {message}"))
+            except KeyboardInterrupt:
+                print("\nCancelled.")
+                exit(1)
+            print(f"\rIndexed {out.scan} in {time.perf_counter() - start:.2f}s: {len(result.added)} added, {len(result.changed)} changed, "
+                  f"{len(result.removed)} removed, {result.unchanged + len(result.touched)} unchanged"
+                  + (f", {len(result.failed)} failed" if result.failed else ""))
+
+        for name in out.names:
+            entries = index.where(name)
+            if not entries:
+                print(f"==> Not found: {name}")
+            print_entries(entries)
+
+        if out.hash:
+            entries = index.with_hash(out.hash)
+            if not entries:
+                print(f"==> No file with hash {out.hash}")
+            print_entries(entries)
+
+        if out.changed:
+            if out.since:
+                try:
+                    since = datetime.fromisoformat(out.since).timestamp()
+                except ValueError:
+                    print(f"==> Invalid date: {out.since}")
+                    exit(1)
+            else:
+                since = index.get_last_scan_start()
+                if since is None:
+                    print("==> Nothing was scanned yet")
+                    exit(1)
+            for change in index.changes(since):
+                state = "removed" if change.removed else "changed"
+                print(f"{format_time(change.time)}  {state:8} {change.kind:9} {change.path}")
+    except sqlite3.Error as e:
+        print(f"==> Could not use the index {out.database}: {e}")
+        exit(1)
+    finally:
+        index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,579 @@
+#/usr/bin/env python3
+"""Random access reader and parallel packer for adhoc packages (.mpackage, MPKG).
+
+Mirrors the layout written by GTAdhocToolchain.Packaging.AdhocPackage: a 0x10 header (magic, relocation
+pointer, file count, table of contents offset), then each file as its zero-terminated name followed by
+its raw deflate data, then the table of contents, 12 bytes per file (name offset, data offset, compressed
+size). Names start with '/' and have "gt6" replaced with "%P".
+
+The file is memory mapped and nothing is read until asked for, so looking up one file only touches the
+table of contents entries of the binary search and that file's data, which is inflated as it is streamed.
+
+Packing compresses files in a process pool. Compressed data of files whose contents did not change since
+the previous package is copied over from it as is (in the kernel where possible), found by content hash
+(kept in <package>.hashes.json along with each file's size and mtime, so unchanged files are not even read).
+"""
+import argparse, collections, hashlib, json, mmap, os, struct, sys, time, zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List
+
+MAGIC = b"MPKG"
+HEADER = struct.Struct("<4sIII")
+TOC_ENTRY = struct.Struct("<III")
+
+# Stored names have the project folder name replaced with this
+PROJECT_PLACEHOLDER = "%P"
+PROJECT_NAME = "gt6"
+
+CHUNK_SIZE = 1 << 16
+
+# Like DeflateStream's CompressionLevel.Optimal
+DEFAULT_COMPRESSION_LEVEL = 6
+HASHES_VERSION = 2
+# ProcessPoolExecutor raises ValueError past this many workers on Windows
+MAX_WINDOWS_PROCESSES = 61
+
+class MPackageError(Exception):
+    pass
+
+def get_raw_name(name:str):
+    """The name a file is stored under in a package, given its path within the packed folder."""
+    name = name.replace("\\", "/")
+    if not name.startswith("/"):
+        name = "/" + name
+    return name.replace(PROJECT_NAME, PROJECT_PLACEHOLDER)
+
+def get_project_name(raw_name:str):
+    """The path a stored file is extracted to, relative to the output folder."""
+    return raw_name.replace(PROJECT_PLACEHOLDER, PROJECT_NAME)
+
+class MPackageEntry:
+    __slots__ = ("index", "name", "name_offset", "data_offset", "compressed_size")
+
+    def __init__(self, index:int, name:str, name_offset:int, data_offset:int, compressed_size:int):
+        self.index = index
+        self.name = name
+        self.name_offset = name_offset
+        self.data_offset = data_offset
+        self.compressed_size = compressed_size
+
+    @property
+    def project_name(self):
+        return get_project_name(self.name)
+
+    def __repr__(self):
+        return f"MPackageEntry({self.name!r}, offset=0x{self.data_offset:X}, compressed_size={self.compressed_size})"
+
+class MPackage:
+    """A memory mapped .mpackage, use as a context manager or close() it.
+
+    The packer sorts files ordinally for the game's binary search, so find() does one too. It sorts them
+    by their path on disk though, before separators are normalized and "gt6" becomes "%P", so the stored
+    names are not always in order: a name the binary search misses is looked up again in a full index,
+    built on the first miss."""
+
+    def __init__(self, path:str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < HEADER.size:
+                raise MPackageError(f"{path} is too small to be a mpackage")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+
+        magic, _, self.count, self.toc_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise MPackageError(f"Invalid magic, {path} is not a mpackage (MPKG)")
+        if self.toc_offset + self.count * TOC_ENTRY.size > size:
+            self.close()
+            raise MPackageError(f"Table of contents of {path} is out of bounds")
+        self._index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __len__(self):
+        return self.count
+
+    def _read_toc(self, index:int):
+        return TOC_ENTRY.unpack_from(self._map, self.toc_offset + index * TOC_ENTRY.size)
+
+    def _read_name(self, name_offset:int):
+        end = self._map.find(b"\0", name_offset)
+        if end == -1:
+            raise MPackageError(f"Unterminated file name at 0x{name_offset:X}")
+        return self._map[name_offset:end]
+
+    def entry(self, index:int):
+        """The entry at a table of contents index."""
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        name_offset, data_offset, compressed_size = self._read_toc(index)
+        if data_offset + compressed_size > len(self._map):
+            raise MPackageError(f"Data of file #{index} is out of bounds")
+        name = self._read_name(name_offset).decode("ascii", errors="replace")
+        return MPackageEntry(index, name, name_offset, data_offset, compressed_size)
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self.entry(i)
+
+    def names(self):
+        """Stored names, in table of contents order."""
+        return [self._read_name(self._read_toc(i)[0]).decode("ascii", errors="replace") for i in range(self.count)]
+
+    def _binary_search(self, key:bytes):
+        low, high = 0, self.count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            name = self._read_name(self._read_toc(middle)[0])
+            if name == key:
+                return middle
+            if name < key:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return None
+
+    def find(self, name:str):
+        """The entry of a file by stored ("%P/...") or extracted ("gt6/...") name, None if not in the package."""
+        key = get_raw_name(name).encode("ascii", errors="replace")
+        if self._index is None:
+            index = self._binary_search(key)
+            if index is not None:
+                return self.entry(index)
+            self._index = {self._read_name(self._read_toc(i)[0]): i for i in range(self.count)}
+        index = self._index.get(key)
+        return self.entry(index) if index is not None else None
+
+    def __contains__(self, name:str):
+        return self.find(name) is not None
+
+    def _get_entry(self, entry):
+        if isinstance(entry, MPackageEntry):
+            return entry
+        found = self.find(entry)
+        if found is None:
+            raise KeyError(entry)
+        return found
+
+    def iter_chunks(self, entry, chunk_size:int=CHUNK_SIZE):
+        """Inflates a file (entry or name) as it is iterated, yielding chunks of at most about chunk_size bytes."""
+        entry = self._get_entry(entry)
+        inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+        position = entry.data_offset
+        end = entry.data_offset + entry.compressed_size
+        pending = b""
+        while not inflater.eof:
+            if not pending:
+                if position >= end:
+                    break
+                pending = self._map[position:min(position + chunk_size, end)]
+                position += len(pending)
+            try:
+                data = inflater.decompress(pending, chunk_size)
+            except zlib.error as e:
+                raise MPackageError(f"Could not inflate {entry.name}: {e}") from e
+            pending = inflater.unconsumed_tail
+            if data:
+                yield data
+        # Whatever zlib held back once all the input went in
+        data = inflater.flush()
+        if data:
+            yield data
+        if not inflater.eof:
+            raise MPackageError(f"Compressed data of {entry.name} is truncated")
+
+    def read_compressed(self, entry):
+        """The raw deflate data of a file (entry or name), as stored."""
+        entry = self._get_entry(entry)
+        return self._map[entry.data_offset:entry.data_offset + entry.compressed_size]
+
+    def copy_compressed(self, entry, destination):
+        """Copies the raw deflate data of a file (entry or name) to an unbuffered file, see copy_range."""
+        entry = self._get_entry(entry)
+        copy_range(self._file, destination, entry.data_offset, entry.compressed_size)
+
+    def read(self, entry):
+        """The whole contents of a file (entry or name)."""
+        return b"".join(self.iter_chunks(entry))
+
+    def extract(self, entry, output_path:str):
+        """Writes a file (entry or name) to output_path, returns its size."""
+        size = 0
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with open(output_path, "wb") as f:
+            for chunk in self.iter_chunks(entry):
+                f.write(chunk)
+                size += len(chunk)
+        return size
+
+    def extract_to(self, output_dir:str, entries:List=None):
+        """Extracts files (every one by default) under output_dir like `adhoc unpack` does, yields each entry once written."""
+        for entry in (self if entries is None else (self._get_entry(entry) for entry in entries)):
+            relative = entry.project_name.lstrip("/")
+            output_path = os.path.normpath(os.path.join(output_dir, relative))
+            if os.path.commonpath([os.path.abspath(output_dir), os.path.abspath(output_path)]) != os.path.abspath(output_dir):
+                raise MPackageError(f"Refusing to extract {entry.name} outside of {output_dir}")
+            self.extract(entry, output_path)
+            yield entry
+
+##########
+# packing
+
+def find_package_files(folder:str):
+    """Files of a folder in the order adhoc pack writes them: ordinal order of their full path."""
+    folder = os.path.abspath(folder)
+    return sorted(os.path.join(dirpath, filename) for dirpath, _, filenames in os.walk(folder) for filename in filenames)
+
+def copy_range(source, destination, offset:int, count:int):
+    """Copies count bytes at offset of source to the position of destination (an unbuffered file), then
+    moves destination past them. Done in the kernel with copy_file_range or sendfile where there are."""
+    position = destination.tell()
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied < count:
+                written = os.copy_file_range(source.fileno(), destination.fileno(), count - copied, offset + copied, position + copied)
+                if written == 0:
+                    break
+                copied += written
+        except OSError:
+            # Not supported by this kernel or file system, whatever was copied stays
+            pass
+    if copied < count and sys.platform.startswith("linux"):
+        destination.seek(position + copied)
+        try:
+            while copied < count:
+                written = os.sendfile(destination.fileno(), source.fileno(), offset + copied, count - copied)
+                if written == 0:
+                    break
+                copied += written
+        except OSError:
+            pass
+    if copied < count:
+        source.seek(offset + copied)
+        destination.seek(position + copied)
+        while copied < count:
+            data = source.read(min(count - copied, 1 << 20))
+            if not data:
+                raise OSError(f"Unexpected end of file while copying from {source.name}")
+            destination.write(data)
+            copied += len(data)
+    destination.seek(position + count)
+
+def get_hashes_path(archive_path:str):
+    return archive_path + ".hashes.json"
+
+def _stamp(path:str):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def read_package_hashes(archive_path:str):
+    """{stored name: [content sha1, size, source mtime_ns]} saved along with a package or GPB, None if
+    missing or not for this file. mtime_ns is None when the source file was not known."""
+    try:
+        with open(get_hashes_path(archive_path), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") == HASHES_VERSION and data.get("package") == _stamp(archive_path):
+            return data["files"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+def write_package_hashes(archive_path:str, hashes:dict):
+    temp_path = get_hashes_path(archive_path) + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": HASHES_VERSION, "package": _stamp(archive_path), "files": hashes}, f)
+    os.replace(temp_path, get_hashes_path(archive_path))
+
+def is_unchanged(path:str, stat:os.stat_result, known:list):
+    """Whether a file still has the contents hashed as known ([sha1, size, mtime_ns]), only reading it when
+    its size matches but its mtime does not. Returns (unchanged, sha1 or None if it was not read)."""
+    if known is None or known[1] != stat.st_size:
+        return False, None
+    if known[2] == stat.st_mtime_ns:
+        return True, known[0]
+    digest = hash_file(path)
+    return digest == known[0], digest
+
+def hash_file(path:str):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def limit_processes(processes:int):
+    return min(processes, MAX_WINDOWS_PROCESSES) if sys.platform == "win32" else processes
+
+def _compress_file(path:str, reusable_hashes:frozenset, level:int):
+    """Returns (content sha1, size, raw deflate data), the data being None when it is in reusable_hashes."""
+    digest = hash_file(path)
+    size = os.path.getsize(path)
+    if digest in reusable_hashes:
+        return digest, size, None
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    chunks = []
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            chunks.append(compressor.compress(chunk))
+    chunks.append(compressor.flush())
+    return digest, size, b"".join(chunks)
+
+# Set in each pack worker process by _init_pack_worker
+_reusable_hashes = frozenset()
+_compression_level = DEFAULT_COMPRESSION_LEVEL
+
+def _init_pack_worker(reusable_hashes:frozenset, level:int):
+    global _reusable_hashes, _compression_level
+    _reusable_hashes = reusable_hashes
+    _compression_level = level
+
+def _pack_file(path:str):
+    return _compress_file(path, _reusable_hashes, _compression_level)
+
+def _hash_package_files(package_path:str, indices:List[int]):
+    with MPackage(package_path) as package:
+        hashes = {}
+        for index in indices:
+            entry = package.entry(index)
+            digest = hashlib.sha1()
+            size = 0
+            for chunk in package.iter_chunks(entry, 1 << 20):
+                digest.update(chunk)
+                size += len(chunk)
+            hashes[entry.name] = [digest.hexdigest(), size, None]
+        return hashes
+
+def get_package_hashes(package_path:str, executor:ProcessPoolExecutor=None, batch_size:int=64):
+    """Hashes of a package like read_package_hashes, from its hashes file or else by inflating every file."""
+    hashes = read_package_hashes(package_path)
+    if hashes is not None:
+        return hashes
+    with MPackage(package_path) as package:
+        count = len(package)
+    batches = [list(range(start, min(start + batch_size, count))) for start in range(0, count, batch_size)]
+    hashes = {}
+    results = executor.map(_hash_package_files, [package_path] * len(batches), batches) if executor is not None \
+        else (_hash_package_files(package_path, batch) for batch in batches)
+    for batch_hashes in results:
+        hashes.update(batch_hashes)
+    return hashes
+
+def pack_folder(folder:str, output_path:str, previous_path:str=None, max_workers:int=None, level:int=DEFAULT_COMPRESSION_LEVEL,
+                on_file:Callable[[str, bool], None]=None):
+    """Packs a folder like `adhoc pack` does, compressing up to max_workers files at once. Returns (files, reused).
+
+    previous_path is a package (usually the previous build of this one) whose compressed data is copied
+    as is for files with the same contents, without compressing them again. A file whose size and mtime
+    did not change since that package was written is not even read. on_file(name, reused) is called for
+    each file as it is written. The package is written to a temp file first, so previous_path may be
+    output_path."""
+    folder = os.path.abspath(folder)
+    files = find_package_files(folder)
+    names = [get_raw_name(os.path.relpath(path, folder)) for path in files]
+    max_workers = limit_processes(max_workers or os.cpu_count())
+
+    previous = None
+    previous_hashes = {}
+    if previous_path is not None and os.path.isfile(previous_path):
+        previous_hashes = read_package_hashes(previous_path)
+        if previous_hashes is None:
+            with ProcessPoolExecutor(max_workers) as executor:
+                previous_hashes = get_package_hashes(previous_path, executor)
+        previous = MPackage(previous_path)
+
+    # Files are either copied from the previous package (its entry) or compressed (a future)
+    reusable = {}
+    plan = []
+    to_compress = []
+    try:
+        for name, path in zip(names, files):
+            stat = os.stat(path)
+            known = previous_hashes.get(name)
+            entry = previous.find(name) if previous is not None and known is not None else None
+            unchanged, _ = is_unchanged(path, stat, known) if entry is not None else (False, None)
+            if unchanged:
+                plan.append((name, stat, entry, known[0]))
+            else:
+                plan.append((name, stat, None, path))
+                to_compress.append(path)
+        if previous is not None:
+            for name, known in previous_hashes.items():
+                if known[0] not in reusable:
+                    entry = previous.find(name)
+                    if entry is not None:
+                        reusable[known[0]] = entry
+    except BaseException:
+        if previous is not None:
+            previous.close()
+        raise
+
+    hashes = {}
+    reused = 0
+    temp_path = output_path + ".tmp"
+    reusable_hashes = frozenset(reusable)
+    # Not worth starting processes for a file or two
+    executor = ProcessPoolExecutor(max_workers, initializer=_init_pack_worker, initargs=(reusable_hashes, level)) \
+        if len(to_compress) > 2 and max_workers > 1 else None
+    try:
+        with open(temp_path, "wb", buffering=0) as f:
+            f.write(HEADER.pack(MAGIC, 0, len(files), 0))
+            toc = []
+
+            def write(name, stat, entry, result):
+                nonlocal reused
+                if entry is None:
+                    digest, size, data = result.result() if executor is not None else result
+                    if data is None:
+                        entry = reusable[digest]
+                else:
+                    digest, size, data = result, stat.st_size, None
+
+                name_offset = f.tell()
+                f.write(name.encode("utf-8") + b"\0")
+                data_offset = f.tell()
+                if entry is not None:
+                    previous.copy_compressed(entry, f)
+                    reused += 1
+                else:
+                    f.write(data)
+                if f.tell() > 0xFFFFFFFF:
+                    raise MPackageError("Package would be larger than 4GB")
+                toc.append((name_offset, data_offset, f.tell() - data_offset))
+                hashes[name] = [digest, size, stat.st_mtime_ns]
+                if on_file:
+                    on_file(name, entry is not None)
+
+            # Bounded so that compressed data waiting on a slow file before it does not pile up
+            pending = collections.deque()
+            for name, stat, entry, source in plan:
+                if entry is not None:
+                    result = source
+                elif executor is not None:
+                    result = executor.submit(_pack_file, source)
+                else:
+                    result = _compress_file(source, reusable_hashes, level)
+                pending.append((name, stat, entry, result))
+                if len(pending) >= max_workers * 4:
+                    write(*pending.popleft())
+            while pending:
+                write(*pending.popleft())
+
+            f.write(b"\0" * (-f.tell() % 4))
+            toc_offset = f.tell()
+            f.write(b"".join(TOC_ENTRY.pack(*entry) for entry in toc))
+            f.seek(0x0C)
+            f.write(struct.pack("<I", toc_offset))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if previous is not None:
+            previous.close()
+
+    os.replace(temp_path, output_path)
+    write_package_hashes(output_path, hashes)
+    return len(files), reused
+
+##########
+# main
+
+def pack(out):
+    if not os.path.isdir(out.pack):
+        print(f"==> Folder not found: {out.pack}")
+        exit(1)
+    previous_path = None if out.no_reuse else (out.previous or out.package)
+
+    start = time.perf_counter()
+    def on_file(name, reused):
+        print(f"[:] Adding {name}" + (" (unchanged)" if reused else ""))
+
+    try:
+        count, reused = pack_folder(out.pack, out.package, previous_path, max(1, out.jobs), out.level, on_file)
+    except MPackageError as e:
+        print(f"==> {e}")
+        exit(1)
+    except KeyboardInterrupt:
+        print("Cancelled.")
+        exit(1)
+    print(f"Packed {count} files to {out.package} in {time.perf_counter() - start:.2f}s, {reused} unchanged files were not compressed again")
+
+def main():
+    parser = argparse.ArgumentParser(description="Lists, extracts or prints files of an adhoc package (.mpackage), or packs a folder into one.")
+    parser.add_argument("package", help="Input .mpackage, or output one with --pack")
+    parser.add_argument("-p", "--pack", metavar="FOLDER", help="Packs this folder into the package")
+    parser.add_argument("-j", "--jobs", type=int, default=limit_processes(os.cpu_count()),
+                        help="With --pack, amount of files compressed at once (default is the cpu count, at most 61 on Windows)")
+    parser.add_argument("--level", type=int, default=DEFAULT_COMPRESSION_LEVEL, choices=range(0, 10), metavar="0-9",
+                        help=f"With --pack, deflate compression level (default is {DEFAULT_COMPRESSION_LEVEL})")
+    parser.add_argument("--previous", help="With --pack, package to take unchanged files from (default is the output package, if it exists)")
+    parser.add_argument("--no-reuse", action="store_true", help="With --pack, compresses every file again")
+    parser.add_argument("names", nargs="*", help="Files to extract or print (default is all of them), stored (%%P/...) or extracted (gt6/...) names")
+    parser.add_argument("-l", "--list", action="store_true", help="Lists the files of the package and their compressed size")
+    parser.add_argument("-c", "--cat", action="store_true", help="Writes the given files to stdout instead of extracting them")
+    parser.add_argument("-o", "--output", help="Output folder (default is <package name>_extracted)")
+    out = parser.parse_intermixed_args()
+
+    if out.pack:
+        pack(out)
+        return
+
+    try:
+        package = MPackage(out.package)
+    except FileNotFoundError:
+        print(f"==> File not found: {out.package}")
+        exit(1)
+    except MPackageError as e:
+        print(f"==> {e}")
+        exit(1)
+
+    with package:
+        missing = [name for name in out.names if name not in package]
+        if missing:
+            for name in missing:
+                print(f"==> Not in package: {name}")
+            exit(1)
+
+        try:
+            if out.list:
+                for entry in (package if not out.names else map(package.find, out.names)):
+                    print(f"{entry.compressed_size:10} {entry.name}")
+            elif out.cat:
+                if not out.names:
+                    print("==> No file to print given")
+                    exit(1)
+                for name in out.names:
+                    for chunk in package.iter_chunks(name):
+                        sys.stdout.buffer.write(chunk)
+                sys.stdout.buffer.flush()
+            else:
+                output_dir = out.output or os.path.splitext(os.path.basename(out.package))[0] + "_extracted"
+                count = 0
+                for entry in package.extract_to(output_dir, out.names or None):
+                    print(f"Extracted: {entry.name}")
+                    count += 1
+                print(f"Extracted {count} files to {output_dir}")
+        except MPackageError as e:
+            print(f"==> {e}")
+            exit(1)
+
+if __name__ == "__main__":
+    main()
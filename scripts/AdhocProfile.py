@@ -0,0 +1,276 @@
+#/usr/bin/env python3
+"""GUI profile files (adhocguiconfig_<name>.txt), readable without tkinter.
+
+A profile is one `KEY = value` per line, values being "quoted strings", true/false, bare words or
+["lists", "of", "strings"]. Lines starting with // are comments.
+"""
+import os, re, threading
+from typing import List
+
+PROFILE_PREFIX = "adhocguiconfig_"
+PROFILE_EXTENSION = ".txt"
+
+DEFAULT_MAX_PARALLEL_JOBS = 2
+DEFAULT_SLOW_BUILD_THRESHOLD = 20
+
+QUICK_BUILD_PREFIX = "QUICK_BUILD_LIST_"
+QUICK_BUILD_FIELDS = ("label", "mode", "ad_input", "version", "yaml_input", "output_adc")
+
+# Quoted items of an array value, backslash escapes are skipped over but kept as is
+RE_ARRAY_ITEM = re.compile(r'"((?:\\.|[^"\\])*)"')
+
+def get_profile_name(path:str):
+    return os.path.basename(path).replace(PROFILE_PREFIX, "").replace(PROFILE_EXTENSION, "")
+
+def get_profile_path(name:str, directory:str=""):
+    return os.path.join(directory, f"{PROFILE_PREFIX}{name}{PROFILE_EXTENSION}")
+
+def find_profiles(directory:str="."):
+    return [f for f in os.listdir(directory) if f.startswith(PROFILE_PREFIX) and f.endswith(PROFILE_EXTENSION)]
+
+def get_fingerprints_path(path:str):
+    """Where the Quick Build fingerprints (see AdhocFingerprint) of a profile are kept."""
+    return os.path.splitext(path)[0] + ".fingerprints.json"
+
+def get_history_path(path:str):
+    """Where the build history (see AdhocBuildHistory) of a profile is kept."""
+    return os.path.splitext(path)[0] + ".history.sqlite"
+
+def parse_line(line:str):
+    """Returns (key, value) for a setting line, None for blank lines and comments."""
+    line = line.strip()
+    if not line or line.startswith('//') or '=' not in line:
+        return None
+
+    key, val = line.split('=', 1)
+    key = key.strip()
+    val = val.strip()
+
+    if val.startswith('[') and val.endswith(']'):
+        return key, RE_ARRAY_ITEM.findall(val)
+    elif val.lower() in ('true', 'false'):
+        return key, val.lower() == 'true'
+    else:
+        return key, val.strip('"').strip("'")
+
+def format_line(key:str, value):
+    if isinstance(value, bool):
+        text = "true" if value else "false"
+    elif isinstance(value, (list, tuple)):
+        text = "[" + ", ".join(f'"{item}"' for item in value) + "]"
+    elif isinstance(value, int):
+        text = str(value)
+    else:
+        text = f'"{value}"'
+    return f"{key} = {text}\n"
+
+def parse_config(filepath:str):
+    config = {}
+    if not os.path.exists(filepath):
+        return config
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            setting = parse_line(line)
+            if setting is not None:
+                config[setting[0]] = setting[1]
+    return config
+
+def get_quick_build_entries(config):
+    """QUICK_BUILD_LIST_0.. as dicts, stopping at the first missing index like the GUI always has."""
+    entries = []
+    i = 0
+    while f"{QUICK_BUILD_PREFIX}{i}" in config:
+        entry = config[f"{QUICK_BUILD_PREFIX}{i}"]
+        if isinstance(entry, list) and len(entry) == len(QUICK_BUILD_FIELDS):
+            entries.append(dict(zip(QUICK_BUILD_FIELDS, entry)))
+        i += 1
+    return entries
+
+def get_max_parallel_jobs(config):
+    try:
+        return max(1, int(config.get("MAX_PARALLEL_JOBS", DEFAULT_MAX_PARALLEL_JOBS)))
+    except ValueError:
+        return DEFAULT_MAX_PARALLEL_JOBS
+
+def get_slow_build_threshold(config):
+    """How much slower than usual (in %) a build has to be to get flagged."""
+    try:
+        return max(0, int(config.get("SLOW_BUILD_THRESHOLD", DEFAULT_SLOW_BUILD_THRESHOLD)))
+    except ValueError:
+        return DEFAULT_SLOW_BUILD_THRESHOLD
+
+_REMOVED = object()
+
+class ConfigStore:
+    """A profile loaded once and kept in memory.
+
+    It is read again when the file's mtime or size changes on disk. Changes are written atomically
+    (temp file + rename), keeping comments and the order of untouched lines. save_later() batches
+    several changes into one write after save_delay seconds, flush() writes pending changes right away.
+    A failed save_later() write keeps the changes pending, take_save_error() returns why it failed.
+    Behaves like a read/write dict of the settings."""
+
+    def __init__(self, path:str, save_delay:float=0.5):
+        self.path = path
+        self.save_delay = save_delay
+        self._lock = threading.RLock()
+        self._lines = []
+        self._values = {}
+        self._stamp = None
+        self._pending = {}
+        self._timer = None
+        self._save_error = None
+        self._load()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _load(self):
+        self._stamp = self._stat()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._lines = f.readlines()
+        except FileNotFoundError:
+            self._lines = []
+
+        self._values = {}
+        for line in self._lines:
+            setting = parse_line(line)
+            if setting is not None:
+                self._values[setting[0]] = setting[1]
+        # Changes not saved yet win over what is on disk
+        for key, value in self._pending.items():
+            self._apply(key, value)
+
+    def _apply(self, key:str, value):
+        if value is _REMOVED:
+            self._values.pop(key, None)
+        else:
+            self._values[key] = value
+
+    def _refresh(self):
+        if self._stat() != self._stamp:
+            self._load()
+
+    @property
+    def values(self):
+        """A snapshot of all settings."""
+        with self._lock:
+            self._refresh()
+            return dict(self._values)
+
+    def get(self, key:str, default=None):
+        with self._lock:
+            self._refresh()
+            return self._values.get(key, default)
+
+    def __getitem__(self, key:str):
+        with self._lock:
+            self._refresh()
+            return self._values[key]
+
+    def __contains__(self, key:str):
+        with self._lock:
+            self._refresh()
+            return key in self._values
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._values)
+
+    def __setitem__(self, key:str, value):
+        with self._lock:
+            self._refresh()
+            if key in self._values and self._values[key] == value and key not in self._pending:
+                return
+            self._pending[key] = value
+            self._apply(key, value)
+
+    def __delitem__(self, key:str):
+        with self._lock:
+            self._refresh()
+            self._pending[key] = _REMOVED
+            self._apply(key, _REMOVED)
+
+    def update(self, values:dict):
+        for key, value in values.items():
+            self[key] = value
+
+    def set_quick_build_entries(self, entries:List[dict]):
+        """Replaces every QUICK_BUILD_LIST_n setting."""
+        with self._lock:
+            self._refresh()
+            for key in [key for key in self._values if key.startswith(QUICK_BUILD_PREFIX)]:
+                del self[key]
+            for i, entry in enumerate(entries):
+                self[f"{QUICK_BUILD_PREFIX}{i}"] = [entry[field] for field in QUICK_BUILD_FIELDS]
+
+    def save_later(self):
+        """Writes pending changes after save_delay, calls made in the meantime share the write."""
+        with self._lock:
+            if self._timer is not None or not self._pending:
+                return
+            self._timer = threading.Timer(self.save_delay, self._save_pending)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _save_pending(self):
+        # Timer thread, where a raised error would only print a traceback
+        try:
+            self.flush()
+        except OSError as e:
+            print(f"[Config] Failed to save: {e}")
+            with self._lock:
+                self._save_error = e
+
+    def take_save_error(self):
+        """The OSError the last save_later() write failed with, or None. Cleared once returned, or by a later
+        successful write. The changes are still pending, save_later() or flush() tries writing them again."""
+        with self._lock:
+            error, self._save_error = self._save_error, None
+            return error
+
+    def flush(self):
+        """Writes pending changes now, if any."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._pending:
+                self.save()
+
+    def save(self):
+        """Writes the profile now, raises OSError if it could not be written."""
+        with self._lock:
+            # Merge into what is on disk now, in case something else changed it since it was read
+            self._refresh()
+            written = set()
+            lines = []
+            for line in self._lines:
+                setting = parse_line(line)
+                if setting is None or setting[0] not in self._pending:
+                    lines.append(line if line.endswith("\n") else line + "\n")
+                elif setting[0] not in written and self._pending[setting[0]] is not _REMOVED:
+                    lines.append(format_line(setting[0], self._pending[setting[0]]))
+                    written.add(setting[0])
+            for key, value in self._pending.items():
+                if key not in written and value is not _REMOVED:
+                    lines.append(format_line(key, value))
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            temp_path = os.path.join(directory, f".{os.path.basename(self.path)}.tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.writelines(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+
+            self._pending.clear()
+            self._save_error = None
+            self._load()
@@ -0,0 +1,295 @@
+#/usr/bin/env python3
+"""Runs the Quick Build entries of a GUI profile without the GUI, i.e on build machines without a display.
+
+Entries build in parallel the same way the GUI builds them: through adhoc.exe workers, waiting for entries
+whose output they read, and skipping entries whose inputs did not change since their last successful
+build (the fingerprints are shared with the GUI). Prints a timing table, exits with 1 if any entry did not
+succeed.
+"""
+import argparse, os, threading, time
+from typing import List
+
+from AdhocBuildJobs import JobScheduler, QUEUED, RUNNING, DONE, CANCELLED, SKIPPED
+from AdhocFingerprint import FingerprintStore, get_build_key, get_project_output
+from AdhocProfile import ConfigStore, get_fingerprints_path, get_max_parallel_jobs, get_profile_name, get_profile_path, get_quick_build_entries
+from AdhocWorker import get_worker, format_message
+
+POLL_SECONDS = 0.1
+
+##########
+# entries
+
+def job_succeeded(job):
+    return job.result is None or job.result.ok
+
+def describe_job(job):
+    """Status text of a build job, with its duration and exit code once finished."""
+    if job.state == QUEUED:
+        return "Queued"
+    if job.state == RUNNING:
+        return f"Running {job.elapsed:.1f}s"
+    if job.state in (CANCELLED, SKIPPED):
+        return job.state.capitalize()
+    if job.state == DONE and job.result is None:
+        return "Up to date"
+    exit_code = job.result.exit_code if job.result is not None else "-"
+    return f"{'OK' if job.state == DONE else 'Failed'} {job.elapsed:.1f}s (exit {exit_code})"
+
+def get_entry_input(entry):
+    return entry["yaml_input"] if entry["mode"] == "YAML" else entry["ad_input"]
+
+def get_entry_key(entry):
+    """Identifies an entry's build in the fingerprints and build history."""
+    return get_build_key(entry["mode"], get_entry_input(entry), entry["output_adc"])
+
+def _normalize_path(path):
+    return os.path.normcase(os.path.abspath(path))
+
+def entry_depends_on(entry, other):
+    """Whether a Quick Build entry reads what another one writes.
+
+    That is when its input is the other's output (or inside it, if that output is a folder), or for
+    projects, when the other's output goes into the project's folder."""
+    if not other["output_adc"] or not get_entry_input(entry):
+        return False
+    written = _normalize_path(other["output_adc"])
+    if other["mode"] == "SINGLE":
+        written = os.path.splitext(written)[0] + ".adc"
+    read = _normalize_path(get_entry_input(entry))
+    if read == written or read.startswith(written + os.sep):
+        return True
+    return entry["mode"] == "YAML" and written.startswith(os.path.dirname(read) + os.sep)
+
+def get_entry_dependencies(entries:List[dict], index:int, entry_jobs:dict):
+    """Queued or running jobs (entry_jobs is keyed by id(entry)) of earlier entries producing the input of entries[index]."""
+    depends_on = []
+    for other in entries[:index]:
+        other_job = entry_jobs.get(id(other))
+        if other_job is not None and not other_job.finished_state and entry_depends_on(entries[index], other):
+            depends_on.append(other_job)
+    return depends_on
+
+def record_build(history, log, job, key:str, name:str, kind:str, result, output_path:str):
+    """Adds a finished build to the history, and warns in the log when it was unusually slow."""
+    if history is None or result.cancelled:
+        return
+    from AdhocBuildHistory import HistoryError, get_output_size
+    try:
+        slower = history.record(key, name, kind, result.elapsed, result.peak_rss,
+                                get_output_size(output_path) if result.ok else None, result.exit_code)
+    except HistoryError as e:
+        log.write(job, "WARN", f"[History] Could not record build: {e}")
+        return
+    if slower is not None:
+        log.write(job, "WARN", f"[History] Took {result.elapsed:.2f}s, {slower:.0f}% slower than the median of its last builds")
+
+def prepare_entry(entry:dict, worker, adhoc_path:str, auto_diss:bool, force:bool, fingerprints:FingerprintStore, log,
+                  history=None):
+    """Returns the job function building an entry, or None and the reason it cannot be built.
+
+    log is a LogBuffer or anything with the same write()/writer(). Unless forced, the job does nothing if
+    the entry's inputs have the same fingerprint as on its last successful build and its output is still there.
+    Builds are recorded in history (a BuildHistory) if given."""
+    mode = entry["mode"]
+    yaml_input = entry["yaml_input"]
+    ad_input = entry["ad_input"]
+    output_adc = entry["output_adc"]
+    version = entry["version"]
+
+    if mode == "YAML":
+        if not yaml_input or not output_adc:
+            return None, "YAML input or output path is missing."
+        input_path, build_version = yaml_input, None
+
+    elif mode == "SINGLE":
+        if not ad_input or not output_adc or not version:
+            return None, "Single build requires .ad input, output path, and version."
+        input_path, build_version = ad_input, version
+
+    else:
+        return None, f"Unknown build mode: {mode}"
+
+    def run(job):
+        key = get_entry_key(entry)
+        output_path = os.path.splitext(output_adc)[0] + ".adc" if mode == "SINGLE" else None
+        try:
+            fingerprint, project = fingerprints.fingerprint(input_path, build_version, adhoc_path, {"auto_diss": auto_diss})
+            output_path = get_project_output(project, output_adc) if project is not None else os.path.splitext(output_adc)[0] + ".adc"
+            outputs = [output_path, os.path.splitext(output_path)[0] + ".ad.diss"] if auto_diss else [output_path]
+            if not force and fingerprints.get(key) == fingerprint and all(os.path.isfile(path) for path in outputs):
+                log.write(job, "", f"[Run] Up to date: {output_path}")
+                return None
+        except OSError as e:
+            log.write(job, "WARN", f"[Run] Could not fingerprint inputs, building anyway: {e}")
+            fingerprint = None
+
+        log.write(job, "", f"[Run] Building: {input_path} -> {output_adc}")
+        result = worker.build(input_path, output_adc, build_version, on_log=log.writer(job), job=job)
+        record_build(history, log, job, key, entry["label"], mode, result, output_path)
+        if result.ok and auto_diss:
+            log.write(job, "", f"[Run] Auto-disassemble: {output_adc}")
+            result = worker.disassemble(output_adc, on_log=log.writer(job), job=job)
+
+        fingerprints.set(key, fingerprint if result.ok else None)
+        fingerprints.save()
+        return result
+    return run, None
+
+##########
+# console
+
+class ConsoleLog:
+    """Prints job output as it comes, prefixed with the job's name. Info lines only when verbose."""
+
+    def __init__(self, verbose:bool=False):
+        self.verbose = verbose
+        self._lock = threading.Lock()
+
+    def write(self, job, level:str, text:str):
+        if not self.verbose and level not in ("WARN", "ERROR", "FATAL"):
+            return
+        with self._lock:
+            print(f"[{job.name}] {format_message(level, text)}", flush=True)
+
+    def writer(self, job):
+        return lambda level, text: self.write(job, level, text)
+
+def select_entries(entries:List[dict], selectors:List[str]):
+    """Indices of the entries matching labels or QUICK_BUILD_LIST_n numbers, all of them if there are no selectors."""
+    if not selectors:
+        return list(range(len(entries)))
+
+    indices = set()
+    for selector in selectors:
+        matches = [index for index, entry in enumerate(entries) if entry["label"] == selector]
+        if not matches and selector.isdigit() and int(selector) < len(entries):
+            matches = [int(selector)]
+        if not matches:
+            raise ValueError(f"No Quick Build entry named '{selector}'")
+        indices.update(matches)
+    return sorted(indices)
+
+def print_table(rows:List[tuple]):
+    widths = [max(len(str(row[column])) for row in rows) for column in range(len(rows[0]))]
+    for i, row in enumerate(rows):
+        # Names left aligned, numbers right aligned
+        print("  ".join(str(cell).ljust(width) if column < 2 else str(cell).rjust(width)
+                        for column, (cell, width) in enumerate(zip(row, widths))).rstrip())
+        if i == 0:
+            print("  ".join("-" * width for width in widths))
+
+def get_status(job):
+    if job.state == DONE:
+        return "Up to date" if job.result is None else "OK"
+    return job.state.capitalize() if job.state in (CANCELLED, SKIPPED) else "Failed"
+
+def run_entries(entries:List[dict], indices:List[int], adhoc_path:str, max_jobs:int, auto_diss:bool, force:bool,
+                fingerprints:FingerprintStore, log):
+    """Builds entries and waits for them, returns (index, job) for each entry that was queued and the
+    entries that could not be built as (index, reason)."""
+    worker = get_worker(adhoc_path, max_jobs)
+    scheduler = JobScheduler(max_jobs, succeeded=job_succeeded)
+    entry_jobs = {}
+    jobs = []
+    problems = []
+    for index in indices:
+        entry = entries[index]
+        run, problem = prepare_entry(entry, worker, adhoc_path, auto_diss, force, fingerprints, log)
+        if run is None:
+            problems.append((index, problem))
+            continue
+        job = scheduler.submit(entry["label"], run, depends_on=get_entry_dependencies(entries, index, entry_jobs))
+        entry_jobs[id(entry)] = job
+        jobs.append((index, job))
+
+    try:
+        while scheduler.active_jobs():
+            time.sleep(POLL_SECONDS)
+    except KeyboardInterrupt:
+        print("Cancelling...", flush=True)
+        scheduler.cancel_all()
+        while scheduler.active_jobs():
+            time.sleep(POLL_SECONDS)
+    return jobs, problems
+
+##########
+# main
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds the Quick Build entries of an Adhoc Toolchain GUI profile, without the GUI.")
+    parser.add_argument("profile", help="Profile file (adhocguiconfig_<name>.txt) or profile name")
+    parser.add_argument("entries", nargs='*', help="Labels or numbers (the n of QUICK_BUILD_LIST_n) of the entries to build (default is all of them)")
+    parser.add_argument("-j", "--jobs", type=int, help="Amount of entries built at the same time (default is the profile's MAX_PARALLEL_JOBS)")
+    parser.add_argument("-a", "--adhoc", help="Path to adhoc.exe (default is the profile's ADHOC_DIR)")
+    parser.add_argument("-f", "--force", action="store_true", help="When set, also rebuilds entries whose inputs did not change")
+    parser.add_argument("-l", "--list", action="store_true", help="Lists the profile's entries and exits")
+    parser.add_argument("-v", "--verbose", action="store_true", help="When set, prints all build output instead of only warnings and errors")
+    out = parser.parse_intermixed_args()
+
+    profile_path = out.profile if os.path.isfile(out.profile) else get_profile_path(out.profile)
+    if not os.path.isfile(profile_path):
+        print(f"==> Profile not found: {out.profile}")
+        exit(1)
+
+    config = ConfigStore(profile_path)
+    entries = get_quick_build_entries(config)
+    if out.list:
+        for index, entry in enumerate(entries):
+            print(f"{index:>3}: {entry['label']} ({entry['mode']}: {get_entry_input(entry)} -> {entry['output_adc']})")
+        return
+
+    try:
+        indices = select_entries(entries, out.entries)
+    except ValueError as e:
+        print(f"==> {e}")
+        exit(1)
+    if not indices:
+        print(f"==> Profile '{get_profile_name(profile_path)}' has no Quick Build entries.")
+        exit(1)
+
+    adhoc_path = out.adhoc or config.get("ADHOC_DIR", "")
+    if not os.path.isfile(adhoc_path):
+        print(f"==> adhoc.exe not found at: {adhoc_path}")
+        exit(1)
+
+    max_jobs = max(1, out.jobs) if out.jobs else get_max_parallel_jobs(config)
+    fingerprints = FingerprintStore(get_fingerprints_path(profile_path))
+    print(f"Building {len(indices)} entries of '{get_profile_name(profile_path)}', {max_jobs} at a time...", flush=True)
+
+    start = time.perf_counter()
+    jobs, problems = run_entries(entries, indices, adhoc_path, max_jobs, config.get("AUTO_DISS_ON_QUICKBUILD", False),
+                                 out.force, fingerprints, ConsoleLog(out.verbose))
+    wall_time = time.perf_counter() - start
+
+    rows = [("Entry", "Status", "Time", "Exit")]
+    results = {index: job for index, job in jobs}
+    for index in indices:
+        label = entries[index]["label"]
+        job = results.get(index)
+        if job is None:
+            rows.append((label, "Invalid", "-", "-"))
+            continue
+        elapsed = f"{job.elapsed:.2f}s" if job.elapsed is not None else "-"
+        exit_code = job.result.exit_code if job.result is not None else "-"
+        rows.append((label, get_status(job), elapsed, exit_code))
+    print()
+    print_table(rows)
+
+    failed = [job for _, job in jobs if job.state != DONE]
+    build_time = sum(job.elapsed for _, job in jobs if job.elapsed is not None)
+    print()
+    print(f"{len(jobs) - len(failed)} of {len(indices)} entries succeeded in {wall_time:.2f}s ({build_time:.2f}s of build time)")
+    for index, problem in problems:
+        print(f"==> {entries[index]['label']}: {problem}")
+    for job in failed:
+        if job.error is not None:
+            print(f"==> {job.name}: {job.error}")
+        elif job.result is not None:
+            for line in job.result.errors():
+                print(f"==> {job.name}: {line}")
+
+    if failed or problems:
+        exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
+import time
+STARTUP_START = time.perf_counter()
+
+# Only what the main window needs right away, the rest is imported where it is used
 try:
     import tkinter as tk
-    from tkinter import ttk, filedialog, messagebox, simpledialog
+    from tkinter import ttk, filedialog, messagebox
     import os
+    import sys
     import subprocess
-    import shutil
     import platform
-    from pathlib import Path
-    import threading
-    from threading import Thread
+    from AdhocWorker import get_worker, format_message
+    from AdhocBuildJobs import JobScheduler, LogBuffer, QUEUED, RUNNING, DONE, CANCELLED
+    from AdhocFingerprint import FingerprintStore, get_build_key, get_project_output, read_project
+    from AdhocProfile import ConfigStore, get_fingerprints_path, get_history_path, get_max_parallel_jobs, get_profile_name, get_profile_path, \
+        get_quick_build_entries, get_slow_build_threshold
+    from AdhocQuickBuild import job_succeeded, describe_job, get_entry_input, get_entry_key, get_entry_dependencies, prepare_entry, record_build
 except ImportError as e:
     import sys
     missing = str(e).split()[-1].strip("'")
@@ -19,9 +26,19 @@ except ImportError as e:
     )
     sys.exit(1)
 
+IMPORT_TIME = time.perf_counter() - STARTUP_START
+
+JOB_POLL_MS = 100
+LOG_MAX_LINES = 10000
+LOG_FILTER_MAX_JOBS = 100
+ALL_JOBS = "All jobs"
+
 def launch_main_app(config_file):
-    app = CommandLineWrapperApp(config_file)
-    app.mainloop()
+    # One window at a time: loading another profile closes the window, then opens the next one from here
+    while config_file:
+        app = CommandLineWrapperApp(config_file)
+        app.mainloop()
+        config_file = app.next_config_path
     
 def is_path_in_env(path):
     norm_path = os.path.normpath(path)
@@ -37,6 +54,7 @@ def is_path_in_env(path):
         except subprocess.CalledProcessError:
             return False
     else:
+        from pathlib import Path
         home = Path.home()
         shell = os.environ.get("SHELL", "")
         rc_file = None
@@ -120,10 +138,12 @@ def remove_adhoc_from_path(path, parent_window):
         if removed:
             messagebox.showinfo("Success", "Adhoc Toolchain folder removed from PATH successfully.")
 
+    from threading import Thread
     Thread(target=run).start()
     
     
 def add_to_path_unix(path):
+    from pathlib import Path
     shell = os.environ.get("SHELL", "")
     home = Path.home()
     rc_file = None
@@ -158,6 +178,8 @@ def add_to_path_windows(path):
         return False
 
 def select_config_profile():
+    """Asks for a profile, returns its file or None if the window was closed."""
+    selected_file = {"value": None}
     profile_window = tk.Tk()
     profile_window.title("Select Profile")
     profile_window.geometry("400x150")
@@ -178,8 +200,8 @@ def select_config_profile():
     def use_selected():
         selected = profile_map[selected_profile.get()]
         if selected and os.path.isfile(selected):
+            selected_file["value"] = selected
             profile_window.destroy()
-            launch_main_app(selected)
         else:
             messagebox.showerror("No Profile Selected", "Please select a valid profile.")
 
@@ -195,8 +217,8 @@ def select_config_profile():
                 return
             with open(filename, "w", encoding="utf-8") as f:
                 f.write("// New profile\n")
+            selected_file["value"] = filename
             profile_window.destroy()
-            launch_main_app(filename)
 
         new_win = tk.Toplevel(profile_window)
         new_win.title("Create New Profile")
@@ -215,6 +237,7 @@ def select_config_profile():
     ttk.Button(bottom_frame, text="Create New Profile", command=create_new).pack(side="right", padx=5)
 
     profile_window.mainloop()
+    return selected_file["value"]
     
 def _create_new_config_profile():
     import tkinter.simpledialog as simpledialog
@@ -233,15 +256,7 @@ def _create_new_config_profile():
         
 def _validate_and_initialize_config(filename):
     config_path = os.path.abspath(filename)
-    config_data = {}
-
-    # Read existing if present
-    if os.path.exists(config_path):
-        with open(config_path, "r", encoding="utf-8") as f:
-            for line in f:
-                if "=" in line:
-                    key, val = line.strip().split("=", 1)
-                    config_data[key.strip()] = val.strip().strip('"')
+    config_data = ConfigStore(config_path)
 
     # Prompt for adhoc.exe if not defined
     if "ADHOC_DIR" not in config_data:
@@ -260,14 +275,12 @@ def _validate_and_initialize_config(filename):
             return None
 
         config_data["ADHOC_DIR"] = adhoc_path
-        config_data.setdefault("DEFAULT_TAB", "yaml")
-        config_data.setdefault("INPUT_DIR", "")
-        config_data.setdefault("OUTPUT_DIR", "")
+        for key, default in (("DEFAULT_TAB", "yaml"), ("INPUT_DIR", ""), ("OUTPUT_DIR", "")):
+            if key not in config_data:
+                config_data[key] = default
 
         try:
-            with open(config_path, "w", encoding="utf-8") as f:
-                for key, val in config_data.items():
-                    f.write(f'{key} = "{val}"\n')
+            config_data.save()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to write config file:\n{e}")
             return None
@@ -298,59 +311,6 @@ def _prompt_user_to_select_config(config_files):
     root.mainloop()
     return selected_file["value"]
     
-TAB_KEYS = {
-    "yaml": "YAML",
-    "single": "Single ad",
-    "diss": "Disassemble",
-    "quick": "Quick Build",
-    "setting": "Settings"
-}
-
-def parse_config(filepath):
-    config = {}
-    if not os.path.exists(filepath):
-        return config
-
-    def parse_array(val: str):
-        items = []
-        i = 0
-        n = len(val)
-        while i < n:
-            if val[i] == '"':
-                i += 1
-                start = i
-                while i < n and val[i] != '"':
-                    if val[i] == '\\' and i + 1 < n:  # Skip escaped quotes like \" or \\
-                        i += 2
-                    else:
-                        i += 1
-                items.append(val[start:i])
-                i += 1  # skip ending quote
-            else:
-                i += 1  # skip commas or spaces
-        return items
-
-    with open(filepath, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith('//'):
-                continue
-            if '=' not in line:
-                continue
-
-            key, val = line.split('=', 1)
-            key = key.strip()
-            val = val.strip()
-
-            if val.startswith('[') and val.endswith(']'):
-                config[key] = parse_array(val)
-            elif val.lower() in ('true', 'false'):
-                config[key] = val.lower() == 'true'
-            else:
-                config[key] = val.strip('"').strip("'")
-
-    return config
-    
 def center_window_top(win, parent=None):
     win.update_idletasks()
 
@@ -439,47 +399,40 @@ def add_adhoc_to_path(path, parent_window):
         if added:
             messagebox.showinfo("Success", "Adhoc Toolchain folder added to PATH successfully.")
 
+    from threading import Thread
     Thread(target=run).start()
     
-def show_progress(message, parent):
-    popup = Toplevel(parent)
-    popup.title("Please wait...")
-    popup.geometry("300x100")
-    popup.grab_set()
-    popup.transient(parent)
-    Label(popup, text=message).pack(expand=True)
-    popup.update()
-    return popup
     
+TAB_KEYS = {
+    "yaml": "YAML",
+    "single": "Single ad",
+    "diss": "Disassemble",
+    "quick": "Quick Build",
+    "setting": "Settings"
+}
 
 class QuickBuildTab(ttk.Frame):
-    def __init__(self, parent, config, config_path):
+    def __init__(self, parent, config, config_path, scheduler, log, history):
         super().__init__(parent)
+        self.scheduler = scheduler
+        self.log = log
+        self.history = history
         self.quick_build_entries = []
+        # Keyed by id(entry), so they follow entries being moved around
+        self.entry_jobs = {}
+        # Rows whose job is not finished yet, the only ones update_statuses() has to look at
+        self.watched_rows = set()
+        self.row_entries = {}
         self.auto_diss_var = tk.BooleanVar(value=config.get("AUTO_DISS_ON_QUICKBUILD", False))
+        self.force_rebuild_var = tk.BooleanVar(value=False)
         self.config_path = config_path
+        self.fingerprints = FingerprintStore(get_fingerprints_path(config_path))
         self.config_data = config
         self._load_from_config(config)
         self._build_ui()
 
     def _load_from_config(self, config):
-        i = 0
-        self.quick_build_entries.clear()
-        while True:
-            key = f"QUICK_BUILD_LIST_{i}"
-            if key not in config:
-                break
-            entry = config[key]
-            if isinstance(entry, list) and len(entry) == 6:
-                self.quick_build_entries.append({
-                    "label": entry[0],
-                    "mode": entry[1],
-                    "ad_input": entry[2],
-                    "version": entry[3],
-                    "yaml_input": entry[4],
-                    "output_adc": entry[5]
-                })
-            i += 1
+        self.quick_build_entries[:] = get_quick_build_entries(config)
 
     def _build_ui(self):
         top_frame = ttk.Frame(self)
@@ -488,11 +441,53 @@ class QuickBuildTab(ttk.Frame):
         auto_diss_check = ttk.Checkbutton(top_frame, text="Auto Disassemble on Build", variable=self.auto_diss_var, command=self.save_to_config)
         auto_diss_check.pack(side="left")
 
+        force_rebuild_check = ttk.Checkbutton(top_frame, text="Rebuild Up-to-date Entries", variable=self.force_rebuild_var)
+        force_rebuild_check.pack(side="left", padx=10)
+
         add_button = ttk.Button(top_frame, text="Add Quick Build", command=self._add_dummy_entry)
         add_button.pack(side="right")
 
-        self.list_frame = ttk.Frame(self)
-        self.list_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        build_all_button = ttk.Button(top_frame, text="Build All", command=lambda: self._build_entries(range(len(self.quick_build_entries))))
+        build_all_button.pack(side="right", padx=5)
+
+        build_selected_button = ttk.Button(top_frame, text="Build Selected", command=self._build_selected)
+        build_selected_button.pack(side="right")
+
+        # A Treeview only draws the rows in view and rows are updated one at a time, so the list stays
+        # fast with hundreds of entries
+        list_frame = ttk.Frame(self)
+        list_frame.pack(fill="both", expand=True, padx=10, pady=5)
+
+        self.tree = ttk.Treeview(list_frame, columns=("label", "trend", "status"), show="headings", selectmode="extended")
+        self.tree.heading("label", text="Quick Build", anchor="w")
+        self.tree.heading("trend", text="Build Times", anchor="w")
+        self.tree.heading("status", text="Status", anchor="w")
+        self.tree.column("label", width=300)
+        self.tree.column("trend", width=180, stretch=False)
+        self.tree.column("status", width=200, stretch=False)
+        self.tree.tag_configure(DONE, foreground="green")
+        self.tree.tag_configure(RUNNING, foreground="blue")
+        self.tree.tag_configure("failed", foreground="red")
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="left", fill="y")
+
+        self.tree.bind("<Double-1>", lambda e: self._on_row_double_click(e))
+        self.tree.bind("<Return>", lambda e: self._build_selected())
+        self.tree.bind("<Delete>", lambda e: self._with_focused_row(self._delete_entry))
+
+        # Row actions apply to the focused row
+        row_frame = ttk.Frame(self)
+        row_frame.pack(fill="x", padx=10, pady=(0, 5))
+        ttk.Button(row_frame, text="↑", width=2, command=lambda: self._with_focused_row(self._move_entry, -1)).pack(side="left", padx=2)
+        ttk.Button(row_frame, text="↓", width=2, command=lambda: self._with_focused_row(self._move_entry, 1)).pack(side="left", padx=2)
+        ttk.Button(row_frame, text="Build", width=16, command=lambda: self._with_focused_row(self._run_entry)).pack(side="left", padx=20)
+        ttk.Button(row_frame, text="Go to Source", command=lambda: self._with_focused_row(self._openInput)).pack(side="left", padx=2)
+        ttk.Button(row_frame, text="Go to Output", command=lambda: self._with_focused_row(self._openOutput)).pack(side="left", padx=2)
+        ttk.Button(row_frame, text="Configure", command=lambda: self._with_focused_row(self._open_config)).pack(side="left", padx=2)
+        ttk.Button(row_frame, text="History", command=lambda: self._with_focused_row(self._show_history)).pack(side="left", padx=2)
+        ttk.Button(row_frame, text="Delete", command=lambda: self._with_focused_row(self._delete_entry)).pack(side="left", padx=2)
 
         self._refresh_list()
 
@@ -506,68 +501,163 @@ class QuickBuildTab(ttk.Frame):
             "output_adc": ""
         }
         self.quick_build_entries.append(new_entry)
-        self._refresh_list()
+        self._insert_row(new_entry, "end")
+        self._update_trend(new_entry)
+        self._focus_row(new_entry)
         self._open_config(len(self.quick_build_entries) - 1)
         self.save_to_config()
         
     def _delete_entry(self, index):
-        confirm = messagebox.askyesno("Delete Quick Build", f"Delete '{self.quick_build_entries[index]['label']}'?")
+        entry = self.quick_build_entries[index]
+        confirm = messagebox.askyesno("Delete Quick Build", f"Delete '{entry['label']}'?")
         if confirm:
             del self.quick_build_entries[index]
-            self._refresh_list()
+            self.tree.delete(self._row_id(entry))
+            self.watched_rows.discard(self._row_id(entry))
+            del self.row_entries[self._row_id(entry)]
+            self.entry_jobs.pop(id(entry), None)
             self.save_to_config()
 
+    def _row_id(self, entry):
+        return str(id(entry))
+
+    def _insert_row(self, entry, index):
+        self.tree.insert("", index, iid=self._row_id(entry), values=(entry["label"], "", ""))
+        self.row_entries[self._row_id(entry)] = entry
+        self._update_status(entry)
+
+    def _focus_row(self, entry):
+        row_id = self._row_id(entry)
+        self.tree.selection_set(row_id)
+        self.tree.focus(row_id)
+        self.tree.see(row_id)
+
+    def _with_focused_row(self, action, *args):
+        row_id = self.tree.focus()
+        if not row_id:
+            messagebox.showinfo("Quick Build", "Select a Quick Build entry first.")
+            return
+        action(self.tree.index(row_id), *args)
+
+    def _on_row_double_click(self, event):
+        row_id = self.tree.identify_row(event.y)
+        if row_id:
+            self._run_entry(self.tree.index(row_id))
+
     def _refresh_list(self):
-        for child in self.list_frame.winfo_children():
-            child.destroy()
-    
-        for index, entry in enumerate(self.quick_build_entries):
-            row = ttk.Frame(self.list_frame)
-            row.pack(fill="x", pady=2)
-    
-            label = ttk.Label(row, text=entry["label"], width=30)
-            label.pack(side="left", padx=2)
-    
-            up_btn = ttk.Button(row, text="↑", width=2, command=lambda i=index: self._move_entry(i, -1))
-            up_btn.pack(side="left", padx=2)
-    
-            down_btn = ttk.Button(row, text="↓", width=2, command=lambda i=index: self._move_entry(i, 1))
-            down_btn.pack(side="left", padx=2)
-    
-            run_btn = ttk.Button(row, text="Build", width=16, command=lambda i=index: self._run_entry(i))
-            run_btn.pack(side="left", padx=20)
-            
-            openInput_btn = ttk.Button(row, text="Go to Source", command=lambda i=index: self._openInput(i))
-            openInput_btn.pack(side="left", padx=2)
-            
-            openOutput_btn = ttk.Button(row, text="Go to Output", command=lambda i=index: self._openOutput(i))
-            openOutput_btn.pack(side="left", padx=2)
-    
-            config_btn = ttk.Button(row, text="Configure", command=lambda i=index: self._open_config(i))
-            config_btn.pack(side="left", padx=2)
+        """Rebuilds every row, only needed when the whole list changes."""
+        self.tree.delete(*self.tree.get_children())
+        self.watched_rows.clear()
+        self.row_entries.clear()
+        for entry in self.quick_build_entries:
+            self._insert_row(entry, "end")
+        # One query for every row rather than one each
+        from AdhocBuildHistory import HistoryError
+        try:
+            trends = self.history.get_trends([get_entry_key(entry) for entry in self.quick_build_entries])
+        except HistoryError as e:
+            print(f"[History] Failed to read: {e}")
+            return
+        for entry in self.quick_build_entries:
+            self._show_trend(entry, *trends[get_entry_key(entry)])
+
+    def _update_status(self, entry):
+        job = self.entry_jobs.get(id(entry))
+        row_id = self._row_id(entry)
+        text = describe_job(job) if job is not None else ""
+        if job is None or job.state == QUEUED:
+            tag = ()
+        else:
+            tag = (job.state if job.state in (DONE, RUNNING) else "failed",)
+        if self.tree.set(row_id, "status") != text:
+            self.tree.set(row_id, "status", text)
+            self.tree.item(row_id, tags=tag)
+
+        if job is not None and not job.finished_state:
+            self.watched_rows.add(row_id)
+        elif row_id in self.watched_rows:
+            self.watched_rows.discard(row_id)
+            self._update_trend(entry)
+
+    def _update_trend(self, entry):
+        from AdhocBuildHistory import HistoryError
+        try:
+            times, slower = self.history.get_trend(get_entry_key(entry))
+        except HistoryError as e:
+            print(f"[History] Failed to read: {e}")
+            return
+        self._show_trend(entry, times, slower)
+
+    def _show_trend(self, entry, times, slower):
+        """Shows the entry's last build times, and how much slower than usual the last one was if it was."""
+        from AdhocBuildHistory import sparkline
+        text = sparkline(times)
+        if slower is not None:
+            text += f"  ▲ {slower:.0f}% slower"
+        self.tree.set(self._row_id(entry), "trend", text)
+
+    def _show_history(self, index):
+        from AdhocBuildHistory import HistoryError
+        entry = self.quick_build_entries[index]
+        try:
+            runs = self.history.runs(get_entry_key(entry), limit=100)
+        except HistoryError as e:
+            messagebox.showerror("History", f"Failed to read the build history:\n{e}")
+            return
+        if not runs:
+            messagebox.showinfo("History", f"'{entry['label']}' has not been built yet.")
+            return
     
-            delete_btn = ttk.Button(row, text="Delete", command=lambda i=index: self._delete_entry(i))
-            delete_btn.pack(side="left", padx=2)
+        win = tk.Toplevel(self)
+        win.title(f"History: {entry['label']}")
+        win.geometry("560x320")
+        columns = ("started", "time", "memory", "size", "exit")
+        tree = ttk.Treeview(win, columns=columns, show="headings")
+        for column, text in zip(columns, ("Started", "Build Time", "Peak Memory", "Output Size", "Exit Code")):
+            tree.heading(column, text=text, anchor="w")
+            tree.column(column, width=100 if column != "started" else 150)
+        scrollbar = ttk.Scrollbar(win, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="left", fill="y")
+    
+        for run in reversed(runs):
+            tree.insert("", "end", values=(
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run.started)),
+                f"{run.wall_time:.2f}s",
+                f"{run.peak_rss / (1024 * 1024):.0f} MB" if run.peak_rss else "-",
+                f"{run.output_size / 1024:.1f} KB" if run.output_size is not None else "-",
+                run.exit_code))
+        center_window_top(win, self.winfo_toplevel())
+
+    def update_statuses(self):
+        """Refreshes the status column of entries whose job is queued or running."""
+        for row_id in list(self.watched_rows):
+            self._update_status(self.row_entries[row_id])
 
     def _move_entry(self, index, direction):
         new_index = index + direction
         if 0 <= new_index < len(self.quick_build_entries):
-            self.quick_build_entries[index], self.quick_build_entries[new_index] = \
-                self.quick_build_entries[new_index], self.quick_build_entries[index]
-            self._refresh_list()
+            entries = self.quick_build_entries
+            entries[index], entries[new_index] = entries[new_index], entries[index]
+            self.tree.move(self._row_id(entries[new_index]), "", new_index)
+            self._focus_row(entries[new_index])
             self.save_to_config()
 
     def _run_entry(self, index):
-        entry = self.quick_build_entries[index]
-    
-        mode = entry["mode"]
-        yaml_input = entry["yaml_input"]
-        ad_input = entry["ad_input"]
-        output_adc = entry["output_adc"]
-        version = entry["version"]
-    
-        # Read full config to get ADHOC_DIR and AUTO_DISS_ON_QUICKBUILD
-        config = parse_config(self.config_path)
+        self._build_entries([index])
+
+    def _build_selected(self):
+        indices = [self.tree.index(row_id) for row_id in self.tree.selection()]
+        if not indices:
+            messagebox.showinfo("Build Selected", "No Quick Build entries are selected.")
+            return
+        self._build_entries(indices)
+
+    def _build_entries(self, indices):
+        """Queues builds for entries, an entry waits for any earlier entry whose output it reads."""
+        # The store picks up edits made to the profile outside of the GUI
+        config = self.config_data
         adhoc_path = config.get("ADHOC_DIR", "")
         auto_diss = config.get("AUTO_DISS_ON_QUICKBUILD", False)
     
@@ -575,36 +665,48 @@ class QuickBuildTab(ttk.Frame):
             messagebox.showerror("Error", f"adhoc.exe not found at:\n{adhoc_path}")
             return
     
-        args = [adhoc_path, "build"]
-    
-        if mode == "YAML":
-            if not yaml_input or not output_adc:
-                messagebox.showwarning("Missing Input", "YAML input or output path is missing.")
-                return
-            args += ["-i", yaml_input, "-o", output_adc]
-    
-        elif mode == "SINGLE":
-            if not ad_input or not output_adc or not version:
-                messagebox.showwarning("Missing Input", "Single build requires .ad input, output path, and version.")
-                return
-            args += ["-i", ad_input, "-o", output_adc, "-v", version]
+        worker = get_worker(adhoc_path, get_max_parallel_jobs(config))
+        indices = sorted(indices)
+        problems = []
+        batch = []
+        for index in indices:
+            entry = self.quick_build_entries[index]
+            run, problem = prepare_entry(entry, worker, adhoc_path, auto_diss, self.force_rebuild_var.get(), self.fingerprints, self.log, self.history)
+            if run is None:
+                problems.append(f"{entry['label']}: {problem}")
+                continue
     
-        else:
-            messagebox.showerror("Error", f"Unknown build mode: {mode}")
+            # Earlier entries that are queued or running (from this batch or before) and produce our input
+            depends_on = get_entry_dependencies(self.quick_build_entries, index, self.entry_jobs)
+    
+            on_done = self._on_entry_done if len(indices) == 1 else lambda job, batch=batch: self._on_batch_entry_done(job, batch)
+            job = self.scheduler.submit(entry["label"], run, on_done=on_done, depends_on=depends_on)
+            self.entry_jobs[id(entry)] = job
+            self._update_status(entry)
+            batch.append(job)
+    
+        if problems:
+            messagebox.showwarning("Missing Input", "\n".join(problems))
+
+    def _on_entry_done(self, job):
+        if job.state == CANCELLED:
+            self.log.write(job, "", "[Run] Cancelled")
+        elif job.error is not None:
+            messagebox.showerror("Build Failed", f"Build failed:    \n{job.error}")
+        elif job.result is not None and not job.result.ok:
+            messagebox.showerror("Build Failed", f"Build failed for {job.name}:    \n" + "\n".join(job.result.errors()))
+        #else:
+        #    messagebox.showinfo("Success", f"Build complete for: {job.name}")
+
+    def _on_batch_entry_done(self, job, batch):
+        # One summary for the whole batch rather than a popup per failed entry
+        self.log.write(job, "", f"[Run] {describe_job(job)}")
+        if not all(batch_job.finished_state and batch_job.on_done is None for batch_job in batch if batch_job is not job):
             return
-    
-        print(f"[Run] Executing: {' '.join(args)}")
-    
-        try:
-            subprocess.run(args, check=True)
-    
-            if auto_diss:
-                print(f"[Run] Auto-disassemble: {adhoc_path} {output_adc}")
-                subprocess.run([adhoc_path, output_adc], check=True)
-    
-            #messagebox.showinfo("Success", f"Build complete for: {entry['label']}")
-        except subprocess.CalledProcessError as e:
-            messagebox.showerror("Build Failed", f"Build failed:    \n{e}")
+        failed = [batch_job for batch_job in batch if batch_job.state != DONE]
+        if failed:
+            messagebox.showerror("Build Failed", f"{len(failed)} of {len(batch)} builds did not succeed:\n" +
+                "\n".join(f"{batch_job.name}: {describe_job(batch_job)}" for batch_job in failed))
 
     def _open_config(self, index):
         entry = self.quick_build_entries[index]
@@ -772,7 +874,8 @@ class QuickBuildTab(ttk.Frame):
             entry["version"] = version_var.get()
             entry["yaml_input"] = yaml_input_var.get()
             entry["output_adc"] = output_adc_var.get()
-            self._refresh_list()
+            self.tree.set(self._row_id(entry), "label", entry["label"])
+            self._update_trend(entry)
             self.save_to_config()
             win.destroy()
     
@@ -782,45 +885,15 @@ class QuickBuildTab(ttk.Frame):
         center_window(win, self.winfo_toplevel())
 
     def save_to_config(self):
-        try:
-            with open(self.config_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-        except FileNotFoundError:
-            lines = []
-    
-        # Strip out any existing QUICK_BUILD_LIST_x lines
-        lines = [line for line in lines if not line.strip().startswith("QUICK_BUILD_LIST_")]
-    
-        # Re-add updated quick build list
-        for i, entry in enumerate(self.quick_build_entries):
-            quoted_list = [
-                f'"{entry["label"]}"',
-                f'"{entry["mode"]}"',
-                f'"{entry["ad_input"]}"',
-                f'"{entry["version"]}"',
-                f'"{entry["yaml_input"]}"',
-                f'"{entry["output_adc"]}"'
-            ]
-            line = f'QUICK_BUILD_LIST_{i} = [{", ".join(quoted_list)}]\n'
-            lines.append(line)
-    
-        # Add/replace AUTO_DISS_ON_QUICKBUILD
-        self.config_data["AUTO_DISS_ON_QUICKBUILD"] = str(self.auto_diss_var.get()).lower()
-        lines = [line for line in lines if not line.strip().startswith("AUTO_DISS_ON_QUICKBUILD")]
-        lines.append(f"AUTO_DISS_ON_QUICKBUILD = {self.config_data['AUTO_DISS_ON_QUICKBUILD']}\n")
-    
-        try:
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                f.writelines(lines)
-            print("[Config] Saved successfully.")
-        except Exception as e:
-            print(f"[Config] Failed to save: {e}")
+        # Edits often come in bursts (moving entries around), they are written out together
+        self.config_data.set_quick_build_entries(self.quick_build_entries)
+        self.config_data["AUTO_DISS_ON_QUICKBUILD"] = self.auto_diss_var.get()
+        self.config_data.save_later()
             
             
     def _openInput(self, index):
         entry = self.quick_build_entries[index]
-        path = entry["yaml_input"] if entry["mode"] == "YAML" else entry["ad_input"]
-        folder = os.path.dirname(path)
+        folder = os.path.dirname(get_entry_input(entry))
         if folder and os.path.exists(folder):
             self._open_folder(folder)
         else:
@@ -847,16 +920,24 @@ class QuickBuildTab(ttk.Frame):
             
 class CommandLineWrapperApp(tk.Tk):
     def __init__(self, config_path):
+        self.startup_start = self.startup_mark = time.perf_counter()
+        self.startup_times = []
         super().__init__()
-        profile_name = config_path.replace("adhocguiconfig_", "").replace(".txt", "")
+        # Set by "Load Profile", launch_main_app opens it once this window is closed
+        self.next_config_path = None
+        self._mark_startup("Tk")
+        profile_name = get_profile_name(config_path)
         self.title(f"Adhoc Toolchain GUI Wrapper - {profile_name}")
         if platform.system() == "Windows":
-            self.geometry("800x600")
+            self.geometry("960x780")
         else:
-            self.geometry("880x600") # Linux needs a lil more width otherwise delete button gets cut off
+            self.geometry("1040x780") # Linux needs a lil more width otherwise delete button gets cut off
         # Load config
         self.config_path = config_path
-        self.config_data = parse_config(self.config_path)
+        self.config_data = ConfigStore(self.config_path)
+        # Opened by _get_history once something needs it
+        self.history = None
+        self._mark_startup("config")
     
         # First-time setup: No config or missing ADHOC_DIR
         if not self.config_data or "ADHOC_DIR" not in self.config_data:
@@ -882,20 +963,187 @@ class CommandLineWrapperApp(tk.Tk):
             self.config_data["ADHOC_DIR"] = adhoc_path
             self._write_initial_config()
     
+        self.scheduler = JobScheduler(get_max_parallel_jobs(self.config_data), succeeded=job_succeeded)
+        self.log = LogBuffer(LOG_MAX_LINES)
+        self._build_status_bar()
+        self.panes = ttk.PanedWindow(self, orient="vertical")
+        self.panes.pack(expand=True, fill="both")
         self.create_tabs()
+        self.panes.add(self._build_log_panel(), weight=1)
+        self._poll_id = self.after(JOB_POLL_MS, self._poll_jobs)
     
-        # Select default tab
+        # Select default tab, the only one built before the window shows
         tab_key = self.config_data.get("DEFAULT_TAB", "yaml").lower()
         tab_name = TAB_KEYS.get(tab_key, "YAML")
         if tab_name in TAB_KEYS.values():
             idx = list(TAB_KEYS.values()).index(tab_name)
             self.tab_control.select(idx)
+        self._build_tab(self.tab_control.select())
+        self._mark_startup("widgets")
+        self.after_idle(self._report_startup)
+
+    def _mark_startup(self, phase):
+        now = time.perf_counter()
+        self.startup_times.append((phase, now - self.startup_mark))
+        self.startup_mark = now
+
+    def _report_startup(self):
+        # Idle callbacks run after the window is first drawn
+        self.update_idletasks()
+        self._mark_startup("first draw")
+        total = self.startup_mark - self.startup_start
+        phases = ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.startup_times)
+        print(f"[Startup] Window shown in {total * 1000:.0f} ms ({phases}), imports took {IMPORT_TIME * 1000:.0f} ms")
             
+    def destroy(self):
+        if hasattr(self, "scheduler"):
+            self.after_cancel(self._poll_id)
+            self.scheduler.shutdown()
+        try:
+            self.config_data.flush()
+        except OSError as e:
+            print(f"[Config] Failed to save: {e}")
+        if self.history is not None:
+            self.history.close()
+        super().destroy()
+
+    def _get_history(self):
+        # Main thread only, jobs are handed the history when they are submitted
+        if self.history is None:
+            from AdhocBuildHistory import BuildHistory
+            self.history = BuildHistory(get_history_path(self.config_path), get_slow_build_threshold(self.config_data))
+        return self.history
+
+    def _build_status_bar(self):
+        bar = ttk.Frame(self, padding=(5, 2))
+        bar.pack(side="bottom", fill="x")
+        self.status_var = tk.StringVar(value="Idle")
+        ttk.Label(bar, textvariable=self.status_var).pack(side="left")
+        self.cancel_button = ttk.Button(bar, text="Cancel", command=self.scheduler.cancel_all, state="disabled")
+        self.cancel_button.pack(side="right")
+
+    def _poll_jobs(self):
+        # Job callbacks run here, on the Tk thread
+        self.scheduler.poll()
+        if self.quick_build_widget is not None:
+            self.quick_build_widget.update_statuses()
+        if getattr(self, "dis_progress", None) is not None:
+            self._poll_disassemble_progress()
+        self._poll_log()
+        save_error = self.config_data.take_save_error()
+        if save_error is not None:
+            # Not from here, the dialog would hold up polling
+            self.after_idle(self._report_save_error, save_error)
+        running, queued = self.scheduler.counts()
+        if running or queued:
+            names = ", ".join(job.name for job in self.scheduler.active_jobs() if job.state == RUNNING)
+            self.status_var.set(f"Running {running}, queued {queued}: {names}")
+            self.cancel_button.configure(state="normal")
+        else:
+            self.status_var.set("Idle")
+            self.cancel_button.configure(state="disabled")
+        self._poll_id = self.after(JOB_POLL_MS, self._poll_jobs)
+
+    def _report_save_error(self, error):
+        if messagebox.askretrycancel("Save Failed", f"Failed to save the profile, your changes are not saved yet:\n{error}"):
+            self.config_data.save_later()
+
+    def _build_log_panel(self):
+        frame = ttk.Frame(self.panes, padding=(5, 2))
+    
+        toolbar = ttk.Frame(frame)
+        toolbar.pack(fill="x")
+        ttk.Label(toolbar, text="Log:").pack(side="left")
+        self.log_filter_var = tk.StringVar(value=ALL_JOBS)
+        self.log_filter = ttk.Combobox(toolbar, textvariable=self.log_filter_var, values=[ALL_JOBS], state="readonly", width=50)
+        self.log_filter.pack(side="left", padx=5)
+        self.log_filter.bind("<<ComboboxSelected>>", lambda event: self._rebuild_log_view())
+        ttk.Button(toolbar, text="Clear", command=self._clear_log).pack(side="right")
+    
+        text_frame = ttk.Frame(frame)
+        text_frame.pack(fill="both", expand=True, pady=(2, 0))
+        self.log_text = tk.Text(text_frame, height=10, wrap="none", state="disabled")
+        scrollbar = ttk.Scrollbar(text_frame, orient="vertical", command=self.log_text.yview)
+        self.log_text.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.log_text.pack(side="left", fill="both", expand=True)
+        self.log_text.tag_configure("error", foreground="red")
+        self.log_text.tag_configure("warn", foreground="dark orange")
+    
+        self.log_seq = 0
+        # Filter label -> job id, in the order jobs first logged
+        self.log_jobs = {}
+        return frame
+
+    def _get_log_filter(self):
+        return self.log_jobs.get(self.log_filter_var.get())
+
+    def _poll_log(self):
+        lines = self.log.since(self.log_seq)
+        if not lines:
+            return
+        self.log_seq = lines[-1].seq
+    
+        new_jobs = False
+        for line in lines:
+            label = f"#{line.job_id} {line.job_name}"
+            if line.job_id and label not in self.log_jobs:
+                self.log_jobs[label] = line.job_id
+                new_jobs = True
+        if new_jobs:
+            for label in list(self.log_jobs)[:-LOG_FILTER_MAX_JOBS]:
+                del self.log_jobs[label]
+            self.log_filter.configure(values=[ALL_JOBS] + list(self.log_jobs))
+    
+        job_id = self._get_log_filter()
+        self._append_log_lines([line for line in lines if job_id is None or line.job_id == job_id])
+
+    def _append_log_lines(self, lines):
+        if not lines:
+            return
+        follow = self.log_text.yview()[1] >= 0.999
+        self.log_text.configure(state="normal")
+        for line in lines:
+            tag = "error" if line.level in ("ERROR", "FATAL") else "warn" if line.level == "WARN" else ""
+            prefix = f"[{line.job_name}] " if line.job_name else ""
+            self.log_text.insert("end", prefix + format_message(line.level, line.text) + "\n", tag)
+    
+        # Same bound as the buffer, so a long build does not grow the widget forever
+        excess = int(self.log_text.index("end-1c").split(".")[0]) - 1 - LOG_MAX_LINES
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+        self.log_text.configure(state="disabled")
+        if follow:
+            self.log_text.see("end")
+
+    def _rebuild_log_view(self):
+        self.log_text.configure(state="normal")
+        self.log_text.delete("1.0", "end")
+        self.log_text.configure(state="disabled")
+        self._append_log_lines(self.log.lines(self._get_log_filter()))
+
+    def _clear_log(self):
+        self.log.clear()
+        self.log_jobs.clear()
+        self.log_filter.configure(values=[ALL_JOBS])
+        self.log_filter_var.set(ALL_JOBS)
+        self._rebuild_log_view()
+
+    def _show_job_result(self, job, action):
+        if job.state == CANCELLED:
+            self.log.write(job, "", "[Jobs] Cancelled")
+        elif job.error is not None:
+            messagebox.showerror(f"{action} Failed", f"{action} failed:\n{job.error}")
+        elif job.result.ok:
+            messagebox.showinfo("Success", f"{action} completed successfully.")
+        else:
+            messagebox.showerror(f"{action} Failed", f"{action} failed:\n" + "\n".join(job.result.errors()))
+
     def _write_initial_config(self):
         try:
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                f.write(f'ADHOC_DIR = "{self.config_data["ADHOC_DIR"]}"\n')
-                f.write('DEFAULT_TAB = yaml\n')
+            if "DEFAULT_TAB" not in self.config_data:
+                self.config_data["DEFAULT_TAB"] = "yaml"
+            self.config_data.save()
             print(f"[Init] Created new config: {self.config_path}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to write initial config:\n{e}")
@@ -916,58 +1164,53 @@ class CommandLineWrapperApp(tk.Tk):
             return
     
         self.config_data["ADHOC_DIR"] = exe_path
-        self._write_config(self.config_data)
+        self._write_config()
         print("[Setup] Saved ADHOC_DIR:", exe_path)
         
-    def _write_config(self, config_dict):
-        lines = []
-    
-        # Save ADHOC_DIR
-        if "ADHOC_DIR" in config_dict:
-            lines.append(f'ADHOC_DIR = "{config_dict["ADHOC_DIR"]}"\n')
-    
-        # Preserve DEFAULT_TAB if present
-        if "DEFAULT_TAB" in config_dict:
-            lines.append(f'DEFAULT_TAB = {config_dict["DEFAULT_TAB"]}\n')
-    
-        # Preserve AUTO_DISS_ON_QUICKBUILD
-        if "AUTO_DISS_ON_QUICKBUILD" in config_dict:
-            lines.append(f'AUTO_DISS_ON_QUICKBUILD = {"true" if config_dict["AUTO_DISS_ON_QUICKBUILD"] else "false"}\n')
-    
+    def _write_config(self):
         try:
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                f.writelines(lines)
+            self.config_data.save()
         except Exception as e:
             messagebox.showerror("Write Failed", f"Failed to save config.txt:\n{e}")
 
     def create_tabs(self):
-        self.tab_control = ttk.Notebook(self)
-        self.tab_control.pack(expand=True, fill="both")
+        self.tab_control = ttk.Notebook(self.panes)
+        self.panes.add(self.tab_control, weight=3)
+        # Tabs are filled in the first time they are selected, see _build_tab
+        self.tab_builders = {}
+        self.quick_build_widget = None
 
         # Tab 1: YAML
         self.yaml_tab = ttk.Frame(self.tab_control)
         self.tab_control.add(self.yaml_tab, text="YAML")
-        self._populate_yaml_tab()
+        self.tab_builders[str(self.yaml_tab)] = self._populate_yaml_tab
 
         # Tab 2: Single ad
         self.single_ad_tab = ttk.Frame(self.tab_control)
         self.tab_control.add(self.single_ad_tab, text="Single ad")
-        self._populate_single_ad_tab()
+        self.tab_builders[str(self.single_ad_tab)] = self._populate_single_ad_tab
 
         # Tab 3: Disassemble
         self.disassemble_tab = ttk.Frame(self.tab_control)
         self.tab_control.add(self.disassemble_tab, text="Disassemble")
-        self._populate_disassemble_tab()
+        self.tab_builders[str(self.disassemble_tab)] = self._populate_disassemble_tab
 
         # Tab 4: Quick Build
         self.quick_build_tab = ttk.Frame(self.tab_control)
         self.tab_control.add(self.quick_build_tab, text="Quick Build")
-        self._populate_quick_build_tab()
+        self.tab_builders[str(self.quick_build_tab)] = self._populate_quick_build_tab
 
         # Tab 5: Settings
         self.settings_tab = ttk.Frame(self.tab_control)
         self.tab_control.add(self.settings_tab, text="Settings")
-        self._populate_settings_tab()
+        self.tab_builders[str(self.settings_tab)] = self._populate_settings_tab
+
+        self.tab_control.bind("<<NotebookTabChanged>>", lambda e: self._build_tab(self.tab_control.select()))
+
+    def _build_tab(self, tab):
+        populate = self.tab_builders.pop(str(tab), None)
+        if populate is not None:
+            populate()
 
     def _populate_yaml_tab(self):
         frame = ttk.Frame(self.yaml_tab, padding=10)
@@ -1051,20 +1294,45 @@ class CommandLineWrapperApp(tk.Tk):
         frame.pack(fill="both", expand=True)
     
         self.dis_input_var = tk.StringVar()
+        self.dis_force_var = tk.BooleanVar(value=False)
+        self.dis_progress_var = tk.StringVar()
     
-        # Input .adc
-        ttk.Label(frame, text="Input .adc:").grid(row=0, column=0, sticky="w")
+        # Input .adc, or a folder of them
+        ttk.Label(frame, text="Input .adc or folder:").grid(row=0, column=0, sticky="w")
         input_row = ttk.Frame(frame)
         input_row.grid(row=1, column=0, columnspan=2, sticky="ew", pady=2)
         input_entry = ttk.Entry(input_row, textvariable=self.dis_input_var)
         input_entry.pack(side="left", fill="x", expand=True)
         ttk.Button(input_row, text="Browse", command=lambda: self._browse_file(self.dis_input_var, [("ADC files", "*.adc")])).pack(side="left", padx=5)
+        ttk.Button(input_row, text="Browse Folder", command=self._browse_disassemble_folder).pack(side="left")
+        frame.columnconfigure(0, weight=1)
+    
+        ttk.Checkbutton(frame, text="Redo files whose .ad.diss is up to date (folders)", variable=self.dis_force_var).grid(row=2, column=0, sticky="w", pady=(5, 0))
     
         # Run button
-        ttk.Button(frame, text="Run", command=self._run_disassemble).grid(row=2, column=0, pady=20, sticky="w")
+        ttk.Button(frame, text="Run", command=self._run_disassemble).grid(row=3, column=0, pady=20, sticky="w")
+    
+        # Folder progress
+        self.dis_progress_bar = ttk.Progressbar(frame, mode="determinate")
+        self.dis_progress_bar.grid(row=4, column=0, columnspan=2, sticky="ew")
+        ttk.Label(frame, textvariable=self.dis_progress_var).grid(row=5, column=0, columnspan=2, sticky="w", pady=2)
+        # Latest (finished, total, text) reported by the running folder job, shown from _poll_jobs
+        self.dis_progress = None
+
+    def _browse_disassemble_folder(self):
+        folder = filedialog.askdirectory(title="Select a folder of .adc files")
+        if folder:
+            self.dis_input_var.set(folder)
+
+    def _poll_disassemble_progress(self):
+        progress, self.dis_progress = self.dis_progress, None
+        if progress is not None:
+            finished, total, text = progress
+            self.dis_progress_bar.configure(maximum=max(total, 1), value=finished)
+            self.dis_progress_var.set(text)
 
     def _populate_quick_build_tab(self):
-        self.quick_build_widget = QuickBuildTab(self.quick_build_tab, self.config_data, self.config_path)
+        self.quick_build_widget = QuickBuildTab(self.quick_build_tab, self.config_data, self.config_path, self.scheduler, self.log, self._get_history())
         self.quick_build_widget.pack(fill="both", expand=True)
 
     def _populate_settings_tab(self):
@@ -1098,23 +1366,33 @@ class CommandLineWrapperApp(tk.Tk):
         self.default_tab_var = tk.StringVar(value=TAB_KEYS.get(self.config_data.get("DEFAULT_TAB", "yaml"), "YAML"))
         ttk.Combobox(frame, textvariable=self.default_tab_var, values=tab_names, state="readonly").grid(row=7, column=0, sticky="w")
     
+        # Parallel builds
+        ttk.Label(frame, text="Max parallel builds:").grid(row=8, column=0, sticky="w", pady=(10, 0))
+        self.max_jobs_var = tk.StringVar(value=str(get_max_parallel_jobs(self.config_data)))
+        ttk.Spinbox(frame, from_=1, to=32, textvariable=self.max_jobs_var, width=5).grid(row=9, column=0, sticky="w")
+    
+        # Build history
+        ttk.Label(frame, text="Flag builds slower than usual by (%):").grid(row=8, column=1, columnspan=2, sticky="w", pady=(10, 0))
+        self.slow_threshold_var = tk.StringVar(value=str(get_slow_build_threshold(self.config_data)))
+        ttk.Spinbox(frame, from_=0, to=1000, increment=5, textvariable=self.slow_threshold_var, width=5).grid(row=9, column=1, sticky="w")
+    
         # 3. Credits box
         credits_text = (
             "Adhoc Toolchain GUI Wrapper by Silentwarior112\n"
             "Built for modding workflows\n"
         )
-        ttk.Label(frame, text="Credits:").grid(row=8, column=0, sticky="w", pady=(20, 0))
+        ttk.Label(frame, text="Credits:").grid(row=10, column=0, sticky="w", pady=(20, 0))
         credits_box = tk.Text(frame, height=5, width=50, wrap="word")
-        credits_box.grid(row=9, column=0, sticky="w")
+        credits_box.grid(row=11, column=0, sticky="w")
         credits_box.insert("1.0", credits_text)
         credits_box.configure(state="disabled") 
     
         # Save settings button
-        ttk.Button(frame, text="Save Settings", command=self._save_settings).grid(row=10, column=0, pady=20, sticky="w")
+        ttk.Button(frame, text="Save Settings", command=self._save_settings).grid(row=12, column=0, pady=20, sticky="w")
         
         # Profile management buttons
-        ttk.Button(frame, text="Load Profile", command=self._load_profile_from_settings).grid(row=10, column=1, pady=20, sticky="w")
-        ttk.Button(frame, text="Create New Profile", command=self._create_new_profile_from_settings).grid(row=10, column=2, pady=20, sticky="w")
+        ttk.Button(frame, text="Load Profile", command=self._load_profile_from_settings).grid(row=12, column=1, pady=20, sticky="w")
+        ttk.Button(frame, text="Create New Profile", command=self._create_new_profile_from_settings).grid(row=12, column=2, pady=20, sticky="w")
         
         # Add Adhoc Toolchain to environment variables
         ttk.Label(frame, text="Add Adhoc Toolchain to environment variables").grid(row=15, column=0, sticky="w")
@@ -1185,9 +1463,9 @@ class CommandLineWrapperApp(tk.Tk):
     
         def on_confirm():
             popup.destroy()
+            # Opened by launch_main_app once this window is gone
+            self.next_config_path = profile_map[selected_name.get()]
             self.destroy()
-            selected_file = profile_map[selected_name.get()]
-            launch_main_app(selected_file)
     
         ttk.Button(popup, text="Load", command=on_confirm).pack(pady=5)
     
@@ -1196,29 +1474,20 @@ class CommandLineWrapperApp(tk.Tk):
         self.config_data["ADHOC_DIR"] = self.adhoc_path_var.get()
         self.config_data["INPUT_DIR"] = self.input_dir_var.get()
         self.config_data["OUTPUT_DIR"] = self.output_dir_var.get()
+        self.config_data["MAX_PARALLEL_JOBS"] = get_max_parallel_jobs({"MAX_PARALLEL_JOBS": self.max_jobs_var.get()})
+        self.config_data["SLOW_BUILD_THRESHOLD"] = get_slow_build_threshold({"SLOW_BUILD_THRESHOLD": self.slow_threshold_var.get()})
+        if self.history is not None:
+            self.history.slow_threshold = self.config_data["SLOW_BUILD_THRESHOLD"]
     
         tab_key = [k for k, v in TAB_KEYS.items() if v == self.default_tab_var.get()]
         self.config_data["DEFAULT_TAB"] = tab_key[0] if tab_key else "yaml"
     
-        # Rewrite config file
-        try:
-            with open(self.config_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-        except FileNotFoundError:
-            lines = []
-    
-        # Remove affected lines
-        lines = [line for line in lines if not line.strip().startswith(("ADHOC_DIR", "DEFAULT_TAB", "INPUT_DIR", "OUTPUT_DIR"))]
-    
-        # Add updated lines
-        lines.append(f'ADHOC_DIR = "{self.config_data["ADHOC_DIR"]}"\n')
-        lines.append(f'DEFAULT_TAB = {self.config_data["DEFAULT_TAB"]}\n')
-        lines.append(f'INPUT_DIR = "{self.config_data["INPUT_DIR"]}"\n')
-        lines.append(f'OUTPUT_DIR = "{self.config_data["OUTPUT_DIR"]}"\n')
+        max_jobs = self.config_data["MAX_PARALLEL_JOBS"]
+        self.scheduler.set_max_workers(max_jobs)
+        get_worker(self.config_data["ADHOC_DIR"], max_jobs)
     
         try:
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                f.writelines(lines)
+            self.config_data.save()
             messagebox.showinfo("Settings Saved", "Settings have been saved successfully.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save settings:\n{e}")
@@ -1229,7 +1498,7 @@ class CommandLineWrapperApp(tk.Tk):
             var.set(path)
 
     def _run_yaml(self):
-        config = parse_config(self.config_path)
+        config = self.config_data
         adhoc_path = config.get("ADHOC_DIR", "")
         yaml = self.yaml_input_var.get()
         out = self.yaml_output_var.get()
@@ -1242,18 +1511,23 @@ class CommandLineWrapperApp(tk.Tk):
             messagebox.showwarning("Missing Paths", "Please specify both input .yaml and output .adc paths.")
             return
     
-        args = [adhoc_path, "build", "-i", yaml, "-o", out]
-        print("[YAML Run]", " ".join(args))
-    
-        try:
-            subprocess.run(args, check=True)
-            messagebox.showinfo("Success", "Build completed successfully.")
-        except subprocess.CalledProcessError as e:
-            messagebox.showerror("Build Failed", f"Build failed:\n{e}")
+        worker = get_worker(adhoc_path, get_max_parallel_jobs(config))
+        history = self._get_history()
+        def run(job):
+            self.log.write(job, "", f"[YAML Run] {yaml} -> {out}")
+            result = worker.build(yaml, out, on_log=self.log.writer(job), job=job)
+            try:
+                output_path = get_project_output(read_project(yaml), out)
+            except OSError:
+                output_path = None
+            record_build(history, self.log, job, get_build_key("YAML", yaml, out), os.path.basename(yaml), "YAML", result, output_path)
+            return result
+        self.scheduler.submit(f"YAML: {os.path.basename(yaml)}", run,
+            on_done=lambda job: self._show_job_result(job, "Build"))
             
             
     def _run_single_ad(self):
-        config = parse_config(self.config_path)
+        config = self.config_data
         adhoc_path = config.get("ADHOC_DIR", "")
     
         ad_input = self.single_ad_input_var.get()
@@ -1268,18 +1542,20 @@ class CommandLineWrapperApp(tk.Tk):
             messagebox.showwarning("Missing Input", "Please specify .ad input, output path, and version.")
             return
     
-        args = [adhoc_path, "build", "-i", ad_input, "-o", output, "-v", version]
-        print("[Single Run]", " ".join(args))
-    
-        try:
-            subprocess.run(args, check=True)
-            messagebox.showinfo("Success", "Build completed successfully.")
-        except subprocess.CalledProcessError as e:
-            messagebox.showerror("Build Failed", f"Build failed:\n{e}")
+        worker = get_worker(adhoc_path, get_max_parallel_jobs(config))
+        history = self._get_history()
+        def run(job):
+            self.log.write(job, "", f"[Single Run] {ad_input} -> {output} (version {version})")
+            result = worker.build(ad_input, output, version, on_log=self.log.writer(job), job=job)
+            record_build(history, self.log, job, get_build_key("SINGLE", ad_input, output), os.path.basename(ad_input), "SINGLE", result,
+                         os.path.splitext(output)[0] + ".adc")
+            return result
+        self.scheduler.submit(f"Single: {os.path.basename(ad_input)}", run,
+            on_done=lambda job: self._show_job_result(job, "Build"))
             
             
     def _run_disassemble(self):
-        config = parse_config(self.config_path)
+        config = self.config_data
         adhoc_path = config.get("ADHOC_DIR", "")
     
         adc_input = self.dis_input_var.get()
@@ -1289,24 +1565,53 @@ class CommandLineWrapperApp(tk.Tk):
             return
     
         if not adc_input:
-            messagebox.showwarning("Missing Input", "Please specify the .adc input file.")
+            messagebox.showwarning("Missing Input", "Please specify the .adc input file or folder.")
             return
     
-        args = [adhoc_path, adc_input]
-    
-        print("[Disassemble Run]", " ".join(args))
+        if os.path.isdir(adc_input):
+            self._run_disassemble_folder(adhoc_path, adc_input, get_max_parallel_jobs(config), self.dis_force_var.get())
+            return
     
-        try:
-            subprocess.run(args, check=True)
-            messagebox.showinfo("Success", "Disassembly completed successfully.")
-        except subprocess.CalledProcessError as e:
-            messagebox.showerror("Disassembly Failed", f"Disassembly failed:\n{e}")
+        worker = get_worker(adhoc_path, get_max_parallel_jobs(config))
+        def run(job):
+            self.log.write(job, "", f"[Disassemble Run] {adc_input}")
+            return worker.disassemble(adc_input, on_log=self.log.writer(job), job=job)
+        self.scheduler.submit(f"Disassemble: {os.path.basename(adc_input)}", run,
+            on_done=lambda job: self._show_job_result(job, "Disassembly"))
+            
+    def _run_disassemble_folder(self, adhoc_path, folder, max_workers, force):
+        from AdhocBatchDisassemble import disassemble_folder
+
+        def on_progress(progress):
+            # Worker thread, picked up by _poll_jobs
+            self.dis_progress = (progress.finished, progress.total, progress.describe())
+    
+        def run(job):
+            self.log.write(job, "", f"[Disassemble Run] {folder} ({max_workers} workers)")
+            progress = disassemble_folder(adhoc_path, folder, max_workers, force, on_progress, self.log.writer(job), job)
+            self.log.write(job, "", f"[Disassemble Run] {progress.describe()}")
+            return progress
+    
+        def on_done(job):
+            progress = job.result
+            if job.state == CANCELLED:
+                self.dis_progress_var.set("Cancelled")
+            elif job.error is not None:
+                messagebox.showerror("Disassembly Failed", f"Disassembly failed:\n{job.error}")
+            elif progress.failed:
+                messagebox.showerror("Disassembly Failed", f"{len(progress.failed)} of {progress.total} files could not be disassembled, see the log.")
+    
+        self.dis_progress_var.set("Looking for .adc files...")
+        self.dis_progress_bar.configure(value=0)
+        self.scheduler.submit(f"Disassemble: {os.path.basename(os.path.normpath(folder))}/", run, on_done=on_done)
 
 if __name__ == "__main__":
-    selected_config_file = select_config_profile()
+    # A profile given on the command line skips the profile selection window
+    if len(sys.argv) > 1:
+        selected_config_file = sys.argv[1] if os.path.isfile(sys.argv[1]) else get_profile_path(sys.argv[1])
+    else:
+        selected_config_file = select_config_profile()
     if selected_config_file is None:
         exit()
 
-    CONFIG_FILE = selected_config_file
-    app = CommandLineWrapperApp()
-    app.mainloop()
+    launch_main_app(selected_config_file)
@@ -0,0 +1,336 @@
+#/usr/bin/env python3
+"""Client for the long-lived `adhoc.exe worker` process.
+
+Starting adhoc.exe costs more than compiling most scripts, so jobs are sent to worker processes that
+stay alive between them. Jobs and their results are JSON lines over the worker's stdin/stdout:
+
+    -> {"id": 1, "command": "build", "args": {"input": "a.ad", "output": "a.adc", "version": 12}}
+    <- {"id": 1, "event": "log", "level": "Info", "message": "[GTAdhocToolchain.CLI.Program] : ..."}
+    <- {"id": 1, "event": "done", "exitCode": 0, "elapsedMs": 35, "peakWorkingSet": 104857600, "peakIsPerJob": true}
+
+If the worker crashes during a job, that job is rerun as a regular adhoc.exe process and the worker is
+restarted for the next one. adhoc.exe builds without the worker command are always run as a process.
+"""
+import atexit, json, os, subprocess, sys, threading, time
+from typing import Callable, List
+
+LOG_LEVELS = ("TRACE", "DEBUG", "INFO", "WARN", "ERROR", "FATAL")
+# Levels kept in WorkerResult.messages, everything else only goes to on_log
+KEPT_LEVELS = ("WARN", "ERROR", "FATAL")
+
+class WorkerResult:
+    """Outcome of one job, messages are the (level, message) warnings and errors in the order they were logged.
+
+    peak_rss is the peak resident memory in bytes of the process that ran the job, None if unknown."""
+    __slots__ = ("exit_code", "elapsed", "messages", "used_worker", "cancelled", "peak_rss")
+
+    def __init__(self, exit_code:int, elapsed:float, messages:List[tuple], used_worker:bool, cancelled:bool=False, peak_rss:int=None):
+        self.exit_code = exit_code
+        self.elapsed = elapsed
+        self.messages = messages
+        self.used_worker = used_worker
+        self.cancelled = cancelled
+        self.peak_rss = peak_rss
+
+    @property
+    def ok(self):
+        return self.exit_code == 0
+
+    def errors(self):
+        """Error lines, formatted like the console output."""
+        return [format_message(level, message) for level, message in self.messages if level in ("ERROR", "FATAL")]
+
+def format_message(level:str, message:str):
+    """Formats a message like adhoc.exe prints it to the console."""
+    return f"{level} {message}" if level else message
+
+def parse_output_line(line:str):
+    """Splits a console line printed by adhoc.exe into (level, message), level is empty for non log lines."""
+    level, _, message = line.partition(" ")
+    if level in LOG_LEVELS:
+        return level, message
+    return "", line
+
+def _keep_message(messages:List[tuple], level:str, message:str, on_log):
+    if level in KEPT_LEVELS:
+        messages.append((level, message))
+    if on_log:
+        on_log(level, message)
+
+def _parse_event(line:str):
+    if not line.startswith("{"):
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+def _get_windows_peak_rss(process:subprocess.Popen):
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + \
+            [(name, ctypes.c_size_t) for name in ("PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    # The process handle stays valid after exit until Popen closes it
+    if ctypes.windll.psapi.GetProcessMemoryInfo(wintypes.HANDLE(int(process._handle)), ctypes.byref(counters), counters.cb):
+        return counters.PeakWorkingSetSize
+    return None
+
+def _wait_process(process:subprocess.Popen):
+    """Waits for a process, returns its peak resident memory in bytes, None if it could not be read."""
+    if hasattr(os, "wait4"):
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+        except ChildProcessError:
+            process.wait()
+            return None
+        process.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is in bytes on macOS, KiB elsewhere
+        return usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+
+    process.wait()
+    try:
+        return _get_windows_peak_rss(process)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+class WorkerUnsupported(Exception):
+    pass
+
+class _WorkerProcess:
+    """One running `adhoc.exe worker`."""
+
+    def __init__(self, adhoc_path:str):
+        self.next_id = 1
+        self.on_stderr = None
+        self.process = subprocess.Popen(
+            [adhoc_path, "worker"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+        )
+        threading.Thread(target=self._read_stderr, name="AdhocWorkerStderr", daemon=True).start()
+
+        # The banner comes first, the worker is usable once it says it is ready
+        for line in self.process.stdout:
+            event = _parse_event(line)
+            if event is not None and event.get("event") == "ready":
+                return
+
+        # Exited without ever being ready: this adhoc.exe has no worker command
+        self.process.wait()
+        raise WorkerUnsupported(adhoc_path)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def _read_stderr(self):
+        # Unhandled exceptions and runtime errors, reported to whichever job is running
+        for line in self.process.stderr:
+            on_stderr = self.on_stderr
+            if on_stderr is not None:
+                on_stderr("ERROR", line.rstrip("\r\n"))
+
+    def run(self, command:str, args:dict, on_log):
+        """Returns the job's WorkerResult, or None if the worker died before finishing it."""
+        job_id = self.next_id
+        self.next_id += 1
+        messages = []
+        start = time.perf_counter()
+        self.on_stderr = lambda level, message: _keep_message(messages, level, message, on_log)
+        try:
+            self.process.stdin.write(json.dumps({"id": job_id, "command": command, "args": args}) + "\n")
+            self.process.stdin.flush()
+            for line in self.process.stdout:
+                event = _parse_event(line)
+                if event is None or event.get("id") != job_id:
+                    continue
+                if event["event"] == "log":
+                    _keep_message(messages, event["level"].upper(), event["message"], on_log)
+                elif event["event"] == "done":
+                    # Where the worker cannot reset its peak (Windows), it is the worker's lifetime peak, not the job's
+                    peak_rss = event.get("peakWorkingSet") if event.get("peakIsPerJob") else None
+                    return WorkerResult(event["exitCode"], time.perf_counter() - start, messages, True, peak_rss=peak_rss)
+        except (OSError, ValueError):
+            pass
+        finally:
+            self.on_stderr = None
+
+        self.kill()
+        return None
+
+    def kill(self):
+        if self.alive():
+            self.process.kill()
+        self.process.wait()
+
+    def close(self):
+        if not self.alive():
+            return
+        try:
+            self.process.stdin.write(json.dumps({"command": "exit"}) + "\n")
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            self.kill()
+
+class AdhocWorkerClient:
+    """Runs build/disassemble jobs through warm `adhoc.exe worker` processes.
+
+    Up to max_workers jobs run at once, each on its own worker process, further calls wait for one to
+    be free. on_log, if set, gets each (level, message) as soon as it is logged. job, if set, is an
+    AdhocBuildJobs.Job: cancelling it kills the process running the job."""
+
+    def __init__(self, adhoc_path:str="adhoc.exe", max_workers:int=1):
+        self.adhoc_path = adhoc_path
+        self.max_workers = max_workers
+        self.supported = True
+        self._idle = []
+        self._busy = set()
+        self._starting = 0
+        self._condition = threading.Condition()
+        atexit.register(self.close)
+
+    def build(self, input_path:str, output_path:str=None, version=None, base_include_folder:str=None,
+              write_exceptions_to_file:bool=False, on_log:Callable[[str, str], None]=None, job=None):
+        """Compiles a .ad script or .yaml project."""
+        args = {"input": os.path.abspath(input_path)}
+        command = [self.adhoc_path, "build", "-i", input_path]
+        if output_path:
+            args["output"] = os.path.abspath(output_path)
+            command += ["-o", output_path]
+        if version:
+            args["version"] = int(version)
+            command += ["-v", str(version)]
+        if base_include_folder:
+            args["baseIncludeFolder"] = base_include_folder
+            command += ["-b", base_include_folder]
+        if write_exceptions_to_file:
+            args["writeExceptionsToFile"] = True
+            command.append("--write-exceptions-to-file")
+        return self.run("build", args, command, on_log, job)
+
+    def disassemble(self, input_path:str, on_log:Callable[[str, str], None]=None, job=None, convert_gpb_files:bool=True):
+        """Disassembles a .adc next to itself (.ad.diss), or unpacks a .gpb, like `adhoc.exe <file>`.
+
+        A .gpb is unpacked to a folder named after it, next to it, textures being converted unless
+        convert_gpb_files is False."""
+        args = {"input": os.path.abspath(input_path)}
+        command = [self.adhoc_path, input_path]
+        if not convert_gpb_files:
+            args["convertGpbFiles"] = False
+            command = [self.adhoc_path, "unpack", "-i", input_path, "-o", os.path.splitext(input_path)[0]]
+        return self.run("disassemble", args, command, on_log, job)
+
+    def run(self, command:str, args:dict, fallback_command:List[str], on_log:Callable[[str, str], None]=None, job=None):
+        """Runs a job on a worker, or as fallback_command when workers are not usable.
+
+        Raises FileNotFoundError if adhoc.exe could not be started at all."""
+        if job is not None and job.cancelled:
+            return WorkerResult(-1, 0.0, [], False, cancelled=True)
+
+        worker = self._acquire()
+        if worker is not None:
+            kill = worker.kill
+            if job is not None:
+                job.add_cancel_callback(kill)
+            try:
+                result = worker.run(command, args, on_log)
+            finally:
+                if job is not None:
+                    job.remove_cancel_callback(kill)
+                self._release(worker)
+
+            if job is not None and job.cancelled:
+                return WorkerResult(-1, 0.0, [], True, cancelled=True)
+            if result is not None:
+                return result
+            if on_log:
+                on_log("WARN", "adhoc.exe worker exited unexpectedly, running the job as a separate process.")
+
+        return self._run_process(fallback_command, on_log, job)
+
+    def close(self):
+        """Stops idle workers and kills the ones still running a job."""
+        with self._condition:
+            idle, busy = self._idle, list(self._busy)
+            self._idle = []
+        for worker in idle:
+            worker.close()
+        for worker in busy:
+            worker.kill()
+
+    def _acquire(self):
+        with self._condition:
+            while True:
+                if not self.supported:
+                    return None
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive():
+                        self._busy.add(worker)
+                        return worker
+                if len(self._busy) + self._starting < self.max_workers:
+                    self._starting += 1
+                    break
+                self._condition.wait()
+
+        worker = None
+        try:
+            worker = _WorkerProcess(self.adhoc_path)
+        except WorkerUnsupported:
+            self.supported = False
+        finally:
+            with self._condition:
+                self._starting -= 1
+                if worker is not None:
+                    self._busy.add(worker)
+                self._condition.notify_all()
+        return worker
+
+    def _release(self, worker:_WorkerProcess):
+        with self._condition:
+            self._busy.discard(worker)
+            if worker.alive():
+                self._idle.append(worker)
+            self._condition.notify()
+
+    def _run_process(self, command:List[str], on_log, job):
+        start = time.perf_counter()
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding="utf-8", errors="replace")
+        if job is not None:
+            job.add_cancel_callback(process.kill)
+
+        messages = []
+        for line in process.stdout:
+            level, message = parse_output_line(line.rstrip("\r\n"))
+            _keep_message(messages, level, message, on_log)
+        peak_rss = _wait_process(process)
+
+        if job is not None:
+            job.remove_cancel_callback(process.kill)
+            if job.cancelled:
+                return WorkerResult(-1, time.perf_counter() - start, messages, False, cancelled=True)
+        return WorkerResult(process.returncode, time.perf_counter() - start, messages, False, peak_rss=peak_rss)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_worker(adhoc_path:str="adhoc.exe", max_workers:int=None):
+    """Returns the shared client for an adhoc.exe path, so every caller in the process reuses its workers."""
+    with _clients_lock:
+        client = _clients.get(adhoc_path)
+        if client is None:
+            client = _clients[adhoc_path] = AdhocWorkerClient(adhoc_path)
+        if max_workers:
+            client.max_workers = max_workers
+        return client
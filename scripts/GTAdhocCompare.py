@@ -1,7 +1,13 @@
 #/usr/bin/env python3
-import argparse, re, subprocess, os, tempfile, shutil
-from difflib import HtmlDiff
+import argparse, re, os, sys, tempfile, shutil, html, hashlib, json, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import List
+from urllib.parse import quote
+
+from AdhocDiff import diff_sections
+from AdhocFile import AdhocFile, AdhocFileError, INS, READER_VERSION
+from AdhocFingerprint import get_dependencies
+from AdhocWorker import get_worker
 
 #NEW_FILE = "D:\\git\\GTAdhocScripts\\projects\\gt5\\arcade\\ArcadeProjectComponent.ad.diss"
 #ORIG_FILE = "D:\\gtmodding\\GT5VOL_211\\projects\\gt5\\arcade\\arcade.ad.diss"
@@ -14,6 +20,13 @@ RE_INSTRUCTION = r"\d*\| *\d*\| *\d*\| *(.*)"
 RE_INSTRUCTION_COMPONENTS_TO_DROP = r", (?:Index:|Local:|Static:|PushAt:)(\d*)"
 RE_INSTRUCTION_JUMP = r"(?:Jump To Func Ins |Jump(?:To)?=)(\d*)"
 
+# In order of preference when a folder has more than one form of the same script
+NEW_FILE_EXTENSIONS = [".ad", ".adc", ".ad.diss"]
+ORIG_FILE_EXTENSIONS = [".adc", ".ad.diss"]
+
+# ProcessPoolExecutor raises ValueError past this many workers on Windows
+MAX_WINDOWS_PROCESSES = 61
+
 HTML_STYLING = """
 <style type="text/css">
     .diff {font-size: 12px;}
@@ -27,182 +40,918 @@ HTML_STYLING = """
 </style>
 """
 
+# Same classes and look as difflib.HtmlDiff, which the reports used to be made with
+REPORT_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+<meta http-equiv="Content-Type" content="text/html; charset=utf-8" />
+<title>%(title)s</title>%(refresh)s
+""" + HTML_STYLING + """
+<style type="text/css">
+    table.diff {font-family:Courier; border:medium;}
+    .diff_header {background-color:#e0e0e0}
+    td.diff_header {text-align:right}
+    .diff_next {background-color:#c0c0c0}
+    .diff_add {background-color:#aaffaa}
+    .diff_chg {background-color:#ffff77}
+    .diff_sub {background-color:#ffaaaa}
+    td.diff_text {white-space: pre-wrap; word-break: break-all; max-width: 120ch;}
+</style>
+</head>
+<body>
+"""
+
+TABLE_HEADER = """<table class="diff" id="top" cellspacing="0" cellpadding="0" rules="groups">
+<colgroup></colgroup> <colgroup></colgroup> <colgroup></colgroup>
+<colgroup></colgroup> <colgroup></colgroup> <colgroup></colgroup>
+<thead><tr><th class="diff_next"><br /></th><th colspan="2" class="diff_header">%(fromdesc)s</th><th class="diff_next"><br /></th><th colspan="2" class="diff_header">%(todesc)s</th></tr></thead>
+<tbody>
+"""
+
+TABLE_FOOTER = """</tbody>
+</table>
+"""
+
+REPORT_FOOTER = """<table class="diff" summary="Legends">
+    <tr> <th colspan="2"> Legends </th> </tr>
+    <tr> <td> <table border="" summary="Colors">
+                  <tr><th> Colors </th> </tr>
+                  <tr><td class="diff_add">&nbsp;Added&nbsp;</td></tr>
+                  <tr><td class="diff_chg">Changed</td> </tr>
+                  <tr><td class="diff_sub">Deleted</td> </tr>
+              </table></td>
+         <td> <table border="" summary="Links">
+                  <tr><th colspan="2"> Links </th> </tr>
+                  <tr><td>(f)irst change</td> </tr>
+                  <tr><td>(n)ext change</td> </tr>
+                  <tr><td>(t)op</td> </tr>
+              </table></td> </tr>
+</table>
+</body>
+</html>
+"""
+
+INDEX_STYLING = """
+<style type="text/css">
+    body {background: #202124; color:#D6D6D6; font-family: monospace; font-size: 12px;}
+    table {border-collapse: collapse;}
+    th, td {padding: 2px 8px; text-align: left; border-bottom: 1px solid #333333;}
+    th {background-color:#252526;}
+    .identical {color:#66CC66;}
+    .differs {color:#CCCC00;}
+    .failed {color:#FF6666;}
+    a {color:#AAAAFF}
+</style>
+"""
+
+# Per-subroutine fingerprints of the last run of a report, kept in its pages folder
+REPORT_STATE_NAME = "state.json"
+
+# Bump when normalization changes, invalidates every cached disassembly
+CACHE_VERSION = 2
+DEFAULT_CACHE_SIZE_MB = 256
+
+# Silences per-file progress prints, set for batch workers
+QUIET = False
+
+# Added to every report page in watch mode so browsers pick up rebuilds
+REFRESH_TAG = ""
+WATCH_REFRESH_SECONDS = 2
+WATCH_POLL_SECONDS = 0.25
+
+
 ##########
 # helpers
 
+class CompareError(Exception):
+    pass
+
 def error(str:str):
     print(f"[E] {str}")
 
 def warn(str:str):
     print(f"[W] {str}")
 
-def check_re(regex:str, prettyName:List[str], shouldError:bool=False):
-    global newfile, origfile
-    new_re = re.search(regex, newfile)
-    orig_re = re.search(regex, origfile)
-    for i in range(len(new_re.groups())):
-        if new_re.group(i+1) != orig_re.group(i+1):
-            if shouldError:
-                error(f"Mismatched {prettyName[i]}: {new_re.group(i+1)} new / {orig_re.group(i+1)} orig")
-            else:
-                warn(f"Mismatched {prettyName[i]}: {new_re.group(i+1)} new / {orig_re.group(i+1)} orig")
+def info(str:str):
+    if not QUIET:
+        print(str)
+
+def print_messages(messages:List[tuple]):
+    for level, message in messages:
+        if level == "E":
+            error(message)
+        else:
+            warn(message)
 
-    newfile = newfile[new_re.end():]
-    origfile = origfile[orig_re.end():]
+def check_header(new_header:dict, orig_header:dict):
+    """Compares the header values of both disassemblies, returns the mismatches found."""
+    mismatches = []
+    for name, value in new_header.items():
+        if value != orig_header[name]:
+            mismatches.append({"name": name, "new": value, "original": orig_header[name]})
+    return mismatches
 
 def get_temp_path(path:str, subdirectory:str):
-    directory = os.path.join(tempfile.gettempdir(), "GTAdhocCompare")
+    directory = os.path.join(tempfile.gettempdir(), "GTAdhocCompare", subdirectory)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, os.path.basename(path))
+
+def build_script(path:str, temp_path:str, name:str):
+    """Compiles a .ad source with the adhoc.exe worker, returns the .adc path."""
     try:
-        os.mkdir(directory)
-    except FileExistsError:
-        pass
+        result = get_worker().build(path, temp_path)
+    except FileNotFoundError:
+        raise CompareError("When providing an .ad file, adhoc.exe must be on the $PATH or in cwd.")
+    if not result.ok:
+        raise CompareError(f"Compilation error while running adhoc.exe to turn '{name}' .ad into a .adc:\r\n" +
+            "\r\n".join(result.errors()))
+    info(f"Ran adhoc.exe to turn '{name}' .ad into a .adc")
+    return temp_path[:-3]+".adc"
+
+def disassemble(path:str, temp_path:str, name:str):
+    """Disassembles a .adc with the adhoc.exe worker, returns the .ad.diss path."""
+    if path != temp_path:
+        shutil.copyfile(path, temp_path)
+        path = temp_path
     try:
-        directory = os.path.join(directory, subdirectory)
-        os.mkdir(directory)
-    except FileExistsError:
-        pass
-    return os.path.join(directory, os.path.basename(path))
+        result = get_worker().disassemble(path)
+    except FileNotFoundError:
+        raise CompareError("When providing an .adc (or .ad) file, adhoc.exe must be on the $PATH or in cwd.")
+    if not result.ok:
+        raise CompareError(f"Disassembly error while running adhoc.exe to turn '{name}' .adc into a .ad.diss")
+    info(f"Ran adhoc.exe to turn '{name}' .adc into a .ad.diss")
+    return path[:-4]+".ad.diss"
+
+class InstructionNormalizer:
+    """Turns disassembly lines into the normalized instruction texts that get compared.
+
+    Patterns are compiled once and both sides of a comparison share the same instance. Every method
+    is a generator, so listings are streamed line by line from their file."""
+    def __init__(self, showjump:bool, showleave:bool):
+        self.showjump = showjump
+        self.showleave = showleave
+        self.re_version = re.compile(RE_VERSION)
+        self.re_root_instructions = re.compile(RE_ROOT_INSTRUCTIONS)
+        self.re_instruction = re.compile(RE_INSTRUCTION)
+        # Components to drop and jump targets in one pass, jumps only when they are hidden
+        if showjump:
+            self.re_components = re.compile(RE_INSTRUCTION_COMPONENTS_TO_DROP)
+        else:
+            self.re_components = re.compile(f"{RE_INSTRUCTION_COMPONENTS_TO_DROP}|{RE_INSTRUCTION_JUMP}")
+
+    def _replace_component(self, match:re.Match):
+        return "" if match.group(0)[0] == "," else "Jump:UNK"
+
+    def read_header(self, lines):
+        """Consumes lines up to the root instruction count, returns the header values."""
+        header = {}
+        for name, regex in (("version", self.re_version), ("root instruction count", self.re_root_instructions)):
+            for line in lines:
+                match = regex.search(line)
+                if match is not None:
+                    header[name] = match.group(1)
+                    break
+            else:
+                raise CompareError(f"Could not find {name} in disassembly, is it a .ad.diss file?")
+        return header
+
+    def extract(self, lines):
+        """Yields the instruction text of every listing line holding an instruction, except LEAVEs unless shown."""
+        search = self.re_instruction.search
+        showleave = self.showleave
+        for line in lines:
+            match = search(line)
+            if match is None:
+                continue
+            text = match.group(1)
+            if not showleave and text.startswith("LEAVE:"):
+                continue
+            yield text
+
+    def normalize(self, texts):
+        """Yields instruction texts with components that differ between builds dropped."""
+        sub = self.re_components.sub
+        replace = self._replace_component
+        for text in texts:
+            # Most instructions have neither, skip the regex for them
+            if "," in text or "Jump" in text:
+                text = sub(replace, text)
+            yield text
+
+    def normalize_listing(self, lines):
+        """Reads the header of a .ad.diss listing, returns it along with a generator of its normalized instructions."""
+        header = self.read_header(lines)
+        return header, self.normalize(self.extract(lines))
+
+def read_disassembly(path:str, normalizer:InstructionNormalizer):
+    """Reads a .ad.diss listing, returns its header values and normalized instructions."""
+    with open(path, "r", encoding= 'utf-8') as f:
+        header, instructions = normalizer.normalize_listing(iter(f))
+        return header, list(instructions)
+
+def read_compiled(path:str, normalizer:InstructionNormalizer):
+    """Reads a .adc with the built-in reader, returns the same as read_disassembly without going through adhoc.exe."""
+    adc = AdhocFile.read_from_file(path)
+    header = {"version": str(adc.version), "root instruction count": str(adc.root_instruction_count)}
+    texts = (record.text for record in adc.iter_instructions() if normalizer.showleave or record.type != INS["LEAVE"])
+    return header, list(normalizer.normalize(texts))
+
+def load_script(path:str, temp_path:str, name:str, out, normalizer:InstructionNormalizer, messages:List[tuple]):
+    """Returns the header values and normalized instructions of a .ad, .adc or .ad.diss file."""
+    if path.endswith(".ad"):
+        path = temp_path = build_script(path, temp_path, name)
+
+    if path.endswith(".adc"):
+        if not out.adhocdisasm:
+            try:
+                return read_compiled(path, normalizer)
+            except AdhocFileError as exception:
+                messages.append(("W", f"Could not read '{name}' .adc ({exception}), falling back to adhoc.exe"))
+        path = disassemble(path, temp_path, name)
+
+    return read_disassembly(path, normalizer)
+
+def benchmark_normalizer(path:str, showjump:bool=False, showleave:bool=False, repeat:int=5):
+    """Times the normalizer against the original per line regex loop on a .ad.diss file, in lines per second."""
+    with open(path, "r", encoding= 'utf-8') as f:
+        text = f.read()
+    line_count = text.count("\n") + 1
+
+    def original():
+        lines = []
+        for line in text.split("\n"):
+            re_instr = re.search(RE_INSTRUCTION, line)
+            if (line == "" or re_instr is None):
+                continue
+            if ((not showleave) and re.search(RE_LEAVE, line) is not None):
+                continue
+            line2 = re.sub(RE_INSTRUCTION_COMPONENTS_TO_DROP, "", re_instr.group(1))
+            re_jump = re.search(RE_INSTRUCTION_JUMP, line2)
+            if re_jump is not None and showjump is False:
+                line2 = re.sub(RE_INSTRUCTION_JUMP, "Jump:UNK", line2)
+            lines.append(line2)
+        return lines
+
+    def streamed():
+        normalizer = InstructionNormalizer(showjump, showleave)
+        with open(path, "r", encoding= 'utf-8') as f:
+            return list(normalizer.normalize(normalizer.extract(f)))
+
+    results = {}
+    for name, function in (("original", original), ("normalizer", streamed)):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = function()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = output
+        print(f"{name:>10}: {line_count / best:,.0f} lines/s ({best * 1000:.1f} ms for {line_count} lines)")
+
+    if results["original"] != results["normalizer"]:
+        print("==> Outputs differ!")
+
+def apply_limiter(newlines:List[str], origlines:List[str], limiter:int):
+    if len(newlines) > len(origlines) + limiter:
+        newlines = newlines[:len(origlines) + limiter]
+    elif len(origlines) > len(newlines) + limiter:
+        origlines = origlines[:len(newlines) + limiter]
+    return newlines, origlines
 
 ##########
-# main
+# cache
+
+def get_cache_dir():
+    return os.path.join(tempfile.gettempdir(), "GTAdhocCompare", "cache")
+
+def get_toolchain_version(out):
+    """Identifies what produces the disassembly, so cache entries from an older reader or adhoc.exe are not reused."""
+    if not out.adhocdisasm:
+        return f"reader{READER_VERSION}"
+    adhoc_path = shutil.which("adhoc.exe") or shutil.which("adhoc")
+    if adhoc_path is None:
+        return "adhoc"
+    stat = os.stat(adhoc_path)
+    return f"adhoc-{stat.st_size}-{stat.st_mtime_ns}"
+
+def get_cache_key(path:str, out):
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        sha1.update(f.read())
+    sha1.update(f"|{CACHE_VERSION}|{get_toolchain_version(out)}|{out.showjump}|{out.showleave}".encode())
+    return sha1.hexdigest()
 
-parser = argparse.ArgumentParser(
-    description="Compares two .adc files. "+\
-        "Usually used with one original PDI file, "+\
-        "and one reverse engineered and GTAdhocCompiler compiled file."
-)
-parser.add_argument("new_file", help="Reverse engineered file (.ad.diss, .adc, .ad)")
-parser.add_argument("original_file", help="Original PDI file (.ad.diss, .adc)")
-parser.add_argument("output_file", nargs='?', help="Output HTML file (default is 'comparison.html')")
-parser.add_argument("-L", "--limiter", type=int, help="Amount of line difference to limit (useful for testing while writing)")
-parser.add_argument("-j", "--showjump", action="store_true", help="When set, doesn't obfuscate jump instructions (can cause lots of 'differences' due to LEAVE instructions)")
-parser.add_argument("-l", "--showleave", action="store_true", help="When set, leaves LEAVE instructions in the output (will cause a lot of 'differences')")
-parser.add_argument("-t", "--tempdir", action="store_true", help="When set, uses the system temporary directory for all files generated.")
-out = parser.parse_args()
-NEW_FILE = out.new_file # type: str
-ORIG_FILE = out.original_file # type: str
-NEW_FILE_TEMP = NEW_FILE
-ORIG_FILE_TEMP = ORIG_FILE
-
-if out.tempdir:
-    NEW_FILE_TEMP = get_temp_path(NEW_FILE, "NEW_FILE")
-    ORIG_FILE_TEMP = get_temp_path(ORIG_FILE, "ORIG_FILE")
-
-if NEW_FILE.endswith(".ad"):
+def cache_get(key:str):
+    """Returns the cached header and normalized lines for a key, or None."""
+    path = os.path.join(get_cache_dir(), key + ".json")
     try:
-        subprocess.run(
-            ["adhoc.exe", "build", "-i", NEW_FILE, "-o", NEW_FILE_TEMP],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        print("Ran adhoc.exe to turn 'new_file' .ad into a .adc")
-    except FileNotFoundError:
-        print("==> When providing an .ad file, adhoc.exe must be on the $PATH or in cwd.")
-        exit(1)
-    except subprocess.CalledProcessError as exception:
-        print("Compilation error while running adhoc.exe to turn 'new_file' .ad into a .adc:")
-        print("\r\n".join(filter(lambda line: "ERROR " in line, exception.output.splitlines())))
-        exit(1)
-    NEW_FILE_TEMP = NEW_FILE_TEMP[:-3]+".adc"
-    NEW_FILE = NEW_FILE_TEMP
+        with open(path, "r", encoding= 'utf-8') as f:
+            entry = json.load(f)
+        os.utime(path) # Keep recently used entries from being evicted
+    except (OSError, ValueError):
+        return None
+    return entry["header"], entry["lines"]
 
-if NEW_FILE.endswith(".adc"):
-    if NEW_FILE != NEW_FILE_TEMP:
-        shutil.copyfile(NEW_FILE, NEW_FILE_TEMP)
-        NEW_FILE = NEW_FILE_TEMP
+def cache_put(key:str, header:dict, lines:List[str]):
+    directory = get_cache_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, key + ".json")
+    # Workers may write the same entry at once, only ever expose complete files
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding= 'utf-8') as f:
+        json.dump({"header": header, "lines": lines}, f)
+    os.replace(temp_path, path)
+
+def get_cache_entries():
+    """Returns (path, size, mtime) of every cache entry, least recently used first."""
+    entries = []
     try:
-        subprocess.run(
-            ["adhoc.exe", NEW_FILE],
-            capture_output=True,
-            check=True,
-        )
-        print("Ran adhoc.exe to turn 'new_file' .adc into a .ad.diss")
+        with os.scandir(get_cache_dir()) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
     except FileNotFoundError:
-        print("==> When providing an .adc (or .ad) file, adhoc.exe must be on the $PATH or in cwd.")
-        exit(1)
-    NEW_FILE = NEW_FILE[:-4]+".ad.diss"
+        pass
+    entries.sort(key=lambda entry: entry[2])
+    return entries
+
+def prune_cache(max_size_mb:int):
+    """Evicts the least recently used entries until the cache fits in max_size_mb."""
+    entries = get_cache_entries()
+    total = sum(size for _, size, _ in entries)
+    limit = max_size_mb * 1024 * 1024
+    for path, size, _ in entries:
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+def print_cache_stats():
+    entries = get_cache_entries()
+    total = sum(size for _, size, _ in entries)
+    print(f"Cache folder: {get_cache_dir()}")
+    print(f"Entries: {len(entries)}")
+    print(f"Size: {total / (1024 * 1024):.2f} MB")
+    if entries:
+        print(f"Least recently used: {time.ctime(entries[0][2])}")
+        print(f"Most recently used: {time.ctime(entries[-1][2])}")
+
+def clear_cache():
+    entries = get_cache_entries()
+    shutil.rmtree(get_cache_dir(), ignore_errors=True)
+    print(f"Removed {len(entries)} cache entries")
+
+def load_normalized(path:str, temp_path:str, name:str, out, normalizer:InstructionNormalizer, messages:List[tuple]):
+    """load_script going through the cache for inputs whose disassembly only depends on their content."""
+    key = None
+    if not out.nocache and (path.endswith(".adc") or path.endswith(".ad.diss")):
+        key = get_cache_key(path, out)
+        cached = cache_get(key)
+        if cached is not None:
+            info(f"Using cached disassembly for '{name}'")
+            return cached
+
+    header, lines = load_script(path, temp_path, name, out, normalizer, messages)
+    if key is not None:
+        cache_put(key, header, lines)
+    return header, lines
+
+##########
+# report
+
+def mark_change(orig_line:str, new_line:str):
+    """Highlights the differing middle of two paired lines."""
+    prefix = 0
+    limit = min(len(orig_line), len(new_line))
+    while prefix < limit and orig_line[prefix] == new_line[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and orig_line[-1 - suffix] == new_line[-1 - suffix]:
+        suffix += 1
+
+    def mark(line:str):
+        middle = line[prefix:len(line) - suffix]
+        return html.escape(line[:prefix]) + \
+            (f'<span class="diff_chg">{html.escape(middle)}</span>' if middle else "") + \
+            html.escape(line[len(line) - suffix:])
+    return mark(orig_line), mark(new_line)
+
+def write_rows(f, origlines:List[str], newlines:List[str], opcodes:List[tuple]):
+    """Writes the table rows of a report, one per aligned line pair."""
+    changes = [opcode for opcode in opcodes if opcode[0] != "equal"]
+    change = 0
+
+    def row(orig_index, orig_text, new_index, new_text, next_link=""):
+        orig_number = "" if orig_index is None else orig_index + 1
+        new_number = "" if new_index is None else new_index + 1
+        f.write(f'<tr><td class="diff_next">{next_link}</td><td class="diff_header">{orig_number}</td><td class="diff_text">{orig_text}</td>'
+                f'<td class="diff_next"></td><td class="diff_header">{new_number}</td><td class="diff_text">{new_text}</td></tr>\n')
+
+    if not changes:
+        f.write('<tr><td class="diff_next"><a href="#top">t</a></td><td colspan="5">No Differences Found</td></tr>\n')
+    else:
+        f.write('<tr><td class="diff_next"><a href="#chg0">f</a></td><td colspan="5"></td></tr>\n')
 
-if ORIG_FILE.endswith(".adc"):
-    if ORIG_FILE != ORIG_FILE_TEMP:
-        shutil.copyfile(ORIG_FILE, ORIG_FILE_TEMP)
-        ORIG_FILE = ORIG_FILE_TEMP
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            for k in range(i2 - i1):
+                row(i1 + k, html.escape(origlines[i1 + k]), j1 + k, html.escape(newlines[j1 + k]))
+            continue
+
+        change += 1
+        next_link = f'<a id="chg{change - 1}" href="#chg{change}">n</a>' if change < len(changes) else f'<a id="chg{change - 1}" href="#top">t</a>'
+        for k in range(max(i2 - i1, j2 - j1)):
+            i = i1 + k if i1 + k < i2 else None
+            j = j1 + k if j1 + k < j2 else None
+            if i is not None and j is not None:
+                orig_text, new_text = mark_change(origlines[i], newlines[j])
+            else:
+                orig_text = "" if i is None else f'<span class="diff_sub">{html.escape(origlines[i])}</span>'
+                new_text = "" if j is None else f'<span class="diff_add">{html.escape(newlines[j])}</span>'
+            row(i, orig_text, j, new_text, next_link if k == 0 else "")
+
+def count_changes(opcodes:List[tuple]):
+    """Amount of inserted, deleted and changed lines of a diff."""
+    counts = {"inserted": 0, "deleted": 0, "changed": 0}
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "insert":
+            counts["inserted"] += j2 - j1
+        elif tag == "delete":
+            counts["deleted"] += i2 - i1
+        elif tag == "replace":
+            counts["changed"] += max(i2 - i1, j2 - j1)
+    return counts
+
+def get_pages_dir(output_file:str):
+    """Folder holding the per-subroutine pages of a report."""
+    return (output_file[:-5] if output_file.endswith(".html") else output_file) + "_files"
+
+def get_page_name(index:int):
+    return f"{index:04d}.html"
+
+def write_page(path:str, section, origlines:List[str], newlines:List[str], fromdesc:str, todesc:str, nav:str):
+    with open(path, "w", encoding= 'utf-8') as f:
+        f.write(REPORT_HEADER % {"title": html.escape(section.name), "refresh": REFRESH_TAG})
+        f.write(nav)
+        f.write(TABLE_HEADER % {"fromdesc": html.escape(fromdesc), "todesc": html.escape(todesc)})
+        write_rows(f, origlines, newlines, section.opcodes)
+        f.write(TABLE_FOOTER)
+        f.write(nav)
+        f.write(REPORT_FOOTER)
+
+def hash_lines(lines:List[str], start:int, end:int):
+    return hashlib.sha1("\n".join(lines[start:end]).encode()).hexdigest()
+
+def load_report_state(pages_dir:str, options:str):
+    """Returns the sections of the previous run of a report, if it was made with the same options."""
     try:
-        subprocess.run(
-            ["adhoc.exe", ORIG_FILE],
-            capture_output=True,
-            check=True,
-        )
-        print("Ran adhoc.exe to turn 'original_file' .adc into a .ad.diss")
-    except FileNotFoundError:
-        print("==> When providing an .adc file, adhoc.exe must be on the $PATH or in cwd.")
+        with open(os.path.join(pages_dir, REPORT_STATE_NAME), "r", encoding= 'utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return state["sections"] if state.get("options") == options else []
+
+def save_report_state(pages_dir:str, options:str, sections:List[dict]):
+    path = os.path.join(pages_dir, REPORT_STATE_NAME)
+    with open(path + ".tmp", "w", encoding= 'utf-8') as f:
+        json.dump({"options": options, "sections": sections}, f)
+    os.replace(path + ".tmp", path)
+
+def write_report(output_file:str, origlines:List[str], newlines:List[str], sections:list, fromdesc:str, todesc:str, options:str=""):
+    """Writes one page per section as it is diffed, then the report index at output_file linking to them.
+    Returns the summary dict of every section.
+
+    Sections whose instructions are the same as in the previous run of this report reuse its diff,
+    and its page too if that didn't move, so only edited subroutines are diffed again."""
+    pages_dir = get_pages_dir(output_file)
+    os.makedirs(pages_dir, exist_ok=True)
+    pages_link = quote(os.path.basename(pages_dir))
+    index_link = quote(os.path.basename(output_file))
+
+    options = f"{options}|{fromdesc}|{todesc}"
+    previous = {(entry["name"], entry["orig_hash"], entry["new_hash"]): entry for entry in load_report_state(pages_dir, options)}
+    state = []
+    reused = 0
+
+    summaries = []
+    for k, section in enumerate(sections):
+        orig_hash = hash_lines(origlines, section.a_start, section.a_end)
+        new_hash = hash_lines(newlines, section.b_start, section.b_end)
+        entry = previous.get((section.name, orig_hash, new_hash))
+        if entry is not None:
+            section.set_relative_opcodes(entry["opcodes"])
+            reused += 1
+
+        # Line numbers and navigation are part of the page, rewrite it if any of them changed
+        page_path = os.path.join(pages_dir, get_page_name(k))
+        layout = [k, section.a_start, section.b_start, k == len(sections) - 1]
+        if entry is None or entry["layout"] != layout or not os.path.exists(page_path):
+            nav = [f'<a href="../{index_link}">Index</a>']
+            if k > 0:
+                nav.append(f'<a href="{get_page_name(k - 1)}">Previous</a>')
+            if k < len(sections) - 1:
+                nav.append(f'<a href="{get_page_name(k + 1)}">Next</a>')
+            nav = f'<p>{" | ".join(nav)} | <b>{html.escape(section.name)}</b></p>\n'
+            write_page(page_path, section, origlines, newlines, fromdesc, todesc, nav)
+
+        state.append({"name": section.name, "orig_hash": orig_hash, "new_hash": new_hash,
+                      "opcodes": section.get_relative_opcodes(), "layout": layout})
+
+        summaries.append({
+            "name": section.name,
+            "page": get_page_name(k),
+            "orig_count": section.a_end - section.a_start,
+            "new_count": section.b_end - section.b_start,
+            "matched": section.matched(),
+            "identical": section.is_equal(),
+            **count_changes(section.opcodes),
+        })
+
+    matched = sum(summary["matched"] for summary in summaries)
+    total = max(len(origlines), len(newlines))
+    changed = [summary for summary in summaries if not summary["identical"]]
+    with open(output_file, "w", encoding= 'utf-8') as f:
+        f.write(f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{html.escape(os.path.basename(todesc))}</title>{REFRESH_TAG}')
+        f.write(INDEX_STYLING)
+        f.write('</head><body>\n')
+        f.write(f"<p>Original: {html.escape(fromdesc)}<br>New: {html.escape(todesc)}</p>\n")
+        f.write(f"<h3>{len(summaries)} sections - {len(changed)} changed - {100 * matched / total if total else 100:.2f}% matched</h3>\n")
+        for title, rows, is_open in ((f"{len(changed)} changed", changed, " open"),
+                                     (f"{len(summaries) - len(changed)} unchanged", [summary for summary in summaries if summary["identical"]], "")):
+            f.write(f"<details{is_open}><summary>{title}</summary>\n")
+            f.write("<table><tr><th>Function</th><th>Status</th><th>Original Instructions</th><th>New Instructions</th></tr>\n")
+            for summary in rows:
+                status, text = describe_result(summary)
+                f.write(f'<tr class="{status}"><td><a href="{pages_link}/{summary["page"]}">{html.escape(summary["name"])}</a></td><td>{text}</td>'
+                        f'<td>{summary["orig_count"]}</td><td>{summary["new_count"]}</td></tr>\n')
+            f.write("</table></details>\n")
+        f.write("</body></html>\n")
+
+    # Pages of sections that no longer exist
+    for name in os.listdir(pages_dir):
+        if name.endswith(".html") and name[:-5].isdigit() and int(name[:-5]) >= len(sections):
+            os.remove(os.path.join(pages_dir, name))
+    save_report_state(pages_dir, options, state)
+    if previous:
+        info(f"Reused {reused}/{len(sections)} subroutine diffs from the previous run")
+    return summaries
+
+##########
+# comparison
+
+def compare_files(new_file:str, orig_file:str, output_file:str, out, temp_subdirectory:str="", original:tuple=None):
+    """Compares one reverse engineered script against the original and writes the HTML report.
+    original can hold the already loaded (header, lines) of orig_file. Returns a summary dict of the comparison."""
+    NEW_FILE = new_file
+    ORIG_FILE = orig_file
+    NEW_FILE_TEMP = NEW_FILE
+    ORIG_FILE_TEMP = ORIG_FILE
+
+    if out.tempdir:
+        NEW_FILE_TEMP = get_temp_path(NEW_FILE, os.path.join("NEW_FILE", temp_subdirectory))
+        ORIG_FILE_TEMP = get_temp_path(ORIG_FILE, os.path.join("ORIG_FILE", temp_subdirectory))
+
+    messages = []
+    normalizer = InstructionNormalizer(out.showjump, out.showleave)
+    new_header, newlines = load_normalized(NEW_FILE, NEW_FILE_TEMP, "new_file", out, normalizer, messages)
+    if original is not None:
+        orig_header, origlines = original
+    else:
+        orig_header, origlines = load_normalized(ORIG_FILE, ORIG_FILE_TEMP, "original_file", out, normalizer, messages)
+    mismatches = check_header(new_header, orig_header)
+    messages += [("E", f"Mismatched {mismatch['name']}: {mismatch['new']} new / {mismatch['original']} orig") for mismatch in mismatches]
+
+    if out.limiter is not None:
+        newlines, origlines = apply_limiter(newlines, origlines, out.limiter)
+
+    info("Building comparison...")
+
+    options = f"{CACHE_VERSION}|{out.showjump}|{out.showleave}|{out.limiter}|{REFRESH_TAG}"
+    sections = write_report(output_file, origlines, newlines, diff_sections(origlines, newlines), ORIG_FILE, NEW_FILE, options)
+    return {
+        "new_file": new_file,
+        "original_file": orig_file,
+        "output_file": output_file,
+        "messages": messages,
+        "header_mismatches": mismatches,
+        "new_count": len(newlines),
+        "orig_count": len(origlines),
+        "matched": sum(section["matched"] for section in sections),
+        "inserted": sum(section["inserted"] for section in sections),
+        "deleted": sum(section["deleted"] for section in sections),
+        "changed": sum(section["changed"] for section in sections),
+        "identical": newlines == origlines,
+        "sections": sections,
+    }
+
+##########
+# ndjson
+
+def open_ndjson(path:str):
+    """Opens the NDJSON output, '-' being stdout."""
+    if path == "-":
+        # Keep stdout for records only, everything meant for humans goes to stderr
+        stream = sys.stdout
+        sys.stdout = sys.stderr
+        return stream
+    return open(path, "w", encoding= 'utf-8')
+
+def get_match_percent(matched:int, orig_count:int, new_count:int):
+    total = max(orig_count, new_count)
+    return round(100 * matched / total, 2) if total else 100.0
+
+def write_ndjson(f, result:dict, key:str=None):
+    """Writes the records of one compared file, one per subroutine then one for the file, and flushes them."""
+    key = key if key is not None else result.get("key", result["new_file"])
+    for section in result.get("sections", []):
+        record = {"type": "subroutine", "key": key, "name": section["name"]}
+        record.update({name: section[name] for name in ("orig_count", "new_count", "matched", "inserted", "deleted", "changed", "identical")})
+        record["matched_percent"] = get_match_percent(section["matched"], section["orig_count"], section["new_count"])
+        f.write(json.dumps(record) + "\n")
+
+    record = {
+        "type": "file",
+        "key": key,
+        "status": describe_result(result)[0],
+        "new_file": result["new_file"],
+        "original_file": result["original_file"],
+        "output_file": result["output_file"],
+    }
+    if result["output_file"] is not None:
+        record.update({name: result[name] for name in ("orig_count", "new_count", "matched", "inserted", "deleted", "changed", "identical")})
+        record["matched_percent"] = get_match_percent(result["matched"], result["orig_count"], result["new_count"])
+        record["header_mismatches"] = result["header_mismatches"]
+    record["messages"] = [{"level": level, "message": message} for level, message in result["messages"]]
+    f.write(json.dumps(record) + "\n")
+    f.flush()
+
+##########
+# batch mode
+
+def find_scripts(root:str, extensions:List[str]):
+    """Maps each script's relative path (without extension) to its preferred file."""
+    scripts = {}
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            lower = filename.lower()
+            for rank, extension in enumerate(extensions):
+                if lower.endswith(extension):
+                    path = os.path.join(dirpath, filename)
+                    key = os.path.relpath(path, root)[:-len(extension)].replace("\\", "/").lower()
+                    if key not in scripts or rank < scripts[key][0]:
+                        scripts[key] = (rank, path)
+                    break
+    return {key: path for key, (_, path) in scripts.items()}
+
+def limit_processes(processes:int):
+    return min(processes, MAX_WINDOWS_PROCESSES) if sys.platform == "win32" else processes
+
+def _init_worker(refresh_tag:str):
+    global QUIET, REFRESH_TAG
+    QUIET = True
+    REFRESH_TAG = refresh_tag
+
+def _compare_worker(key:str, new_file:str, orig_file:str, output_file:str, out):
+    try:
+        result = compare_files(new_file, orig_file, output_file, out, os.path.dirname(key))
+    except CompareError as e:
+        result = {"new_file": new_file, "original_file": orig_file, "output_file": None, "messages": [("E", str(e))]}
+    except Exception as e:
+        result = {"new_file": new_file, "original_file": orig_file, "output_file": None, "messages": [("E", f"{type(e).__name__}: {e}")]}
+    result["key"] = key
+    return result
+
+def describe_result(result:dict):
+    if result.get("output_file", "") is None:
+        return "failed", "Failed"
+    if result["identical"]:
+        return "identical", "Identical"
+    total = max(result["new_count"], result["orig_count"])
+    return "differs", f"{100 * result['matched'] / total:.2f}% matched"
+
+def write_index(output_dir:str, results:List[dict], only_orig:List[str], only_new:List[str]):
+    index_path = os.path.join(output_dir, "index.html")
+    counts = {"identical": 0, "differs": 0, "failed": 0}
+    rows = []
+    for result in sorted(results, key=lambda r: r["key"]):
+        status, text = describe_result(result)
+        counts[status] += 1
+        name = html.escape(result["key"])
+        if result["output_file"] is not None:
+            link = quote(os.path.relpath(result["output_file"], output_dir).replace("\\", "/"))
+            name = f'<a href="{link}">{name}</a>'
+        messages = "<br>".join(html.escape(f"[{level}] {message}") for level, message in result["messages"])
+        rows.append(f'<tr class="{status}"><td>{name}</td><td>{text}</td>'
+                    f'<td>{result.get("orig_count", "")}</td><td>{result.get("new_count", "")}</td><td>{messages}</td></tr>')
+
+    with open(index_path, "w", encoding='utf-8') as f:
+        f.write(f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>GTAdhocCompare</title>{REFRESH_TAG}')
+        f.write(INDEX_STYLING)
+        f.write('</head><body>\n')
+        f.write(f"<h3>{len(results)} compared - {counts['identical']} identical, {counts['differs']} differing, {counts['failed']} failed</h3>\n")
+        f.write("<table><tr><th>Script</th><th>Status</th><th>Original Instructions</th><th>New Instructions</th><th>Messages</th></tr>\n")
+        f.write("\n".join(rows))
+        f.write("</table>\n")
+        for title, keys in ((f"{len(only_orig)} only in original", only_orig), (f"{len(only_new)} only in new", only_new)):
+            if keys:
+                f.write(f"<details><summary>{title}</summary><pre>{html.escape(chr(10).join(keys))}</pre></details>\n")
+        f.write("</body></html>\n")
+    return index_path
+
+def compare_directories(new_dir:str, orig_dir:str, output_dir:str, out, ndjson=None):
+    new_scripts = find_scripts(new_dir, NEW_FILE_EXTENSIONS)
+    orig_scripts = find_scripts(orig_dir, ORIG_FILE_EXTENSIONS)
+    keys = sorted(new_scripts.keys() & orig_scripts.keys())
+    only_orig = sorted(orig_scripts.keys() - new_scripts.keys())
+    only_new = sorted(new_scripts.keys() - orig_scripts.keys())
+    if not keys:
+        raise CompareError("No scripts with matching relative paths found between both folders.")
+
+    print(f"Comparing {len(keys)} scripts ({len(only_orig)} only in original, {len(only_new)} only in new)...")
+    results = []
+    with ProcessPoolExecutor(max_workers=limit_processes(out.processes), initializer=_init_worker, initargs=(REFRESH_TAG,)) as pool:
+        futures = []
+        jobs = {}
+        for key in keys:
+            output_file = os.path.join(output_dir, key + ".html")
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            jobs[key] = (new_scripts[key], orig_scripts[key], output_file, os.path.dirname(key))
+            futures.append(pool.submit(_compare_worker, key, new_scripts[key], orig_scripts[key], output_file, out))
+
+        for i, future in enumerate(as_completed(futures)):
+            result = future.result()
+            results.append(result)
+            print(f"[{i+1}/{len(keys)}] {result['key']}: {describe_result(result)[1]}")
+            if ndjson is not None:
+                write_ndjson(ndjson, result)
+
+    index_path = write_index(output_dir, results, only_orig, only_new)
+    if out.watch:
+        print(f"Built {index_path}")
+        results_by_key = {result["key"]: result for result in results}
+
+        def on_rebuilt(rebuilt:List[dict]):
+            results_by_key.update((result["key"], result) for result in rebuilt)
+            write_index(output_dir, list(results_by_key.values()), only_orig, only_new)
+
+        watch_comparisons(jobs, out, ndjson, on_rebuilt)
+    return index_path
+
+##########
+# watch mode
+
+def get_mtimes(paths):
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            mtimes[path] = None
+    return mtimes
+
+def watch_comparisons(jobs:dict, out, ndjson=None, on_rebuilt=None):
+    """Keeps comparing jobs (key -> (new_file, orig_file, output_file, temp_subdirectory)) again whenever one of their files changes.
+
+    Saves are debounced, only jobs depending on a changed file (includes too) are compared again, in
+    this process, and originals stay loaded in memory until they change themselves."""
+    normalizer = InstructionNormalizer(out.showjump, out.showleave)
+    originals = {}
+
+    def load_original(orig_file:str, temp_subdirectory:str):
+        mtime = os.stat(orig_file).st_mtime_ns
+        if orig_file not in originals or originals[orig_file][0] != mtime:
+            temp_path = get_temp_path(orig_file, os.path.join("ORIG_FILE", temp_subdirectory)) if out.tempdir else orig_file
+            originals[orig_file] = (mtime, load_normalized(orig_file, temp_path, "original_file", out, normalizer, []))
+        return originals[orig_file][1]
+
+    dependencies = {key: get_dependencies(new_file) | {os.path.abspath(orig_file)} for key, (new_file, orig_file, _, _) in jobs.items()}
+    mtimes = get_mtimes(set().union(*dependencies.values()))
+    print(f"Watching {len(mtimes)} files for changes, press Ctrl+C to stop...")
+
+    try:
+        while True:
+            time.sleep(WATCH_POLL_SECONDS)
+            current = get_mtimes(mtimes.keys())
+            if current == mtimes:
+                continue
+
+            # Wait for saves to settle before rebuilding
+            quiet_since = time.monotonic()
+            while time.monotonic() - quiet_since < out.debounce / 1000:
+                time.sleep(WATCH_POLL_SECONDS)
+                latest = get_mtimes(mtimes.keys())
+                if latest != current:
+                    current = latest
+                    quiet_since = time.monotonic()
+
+            changed = {path for path in current if current[path] != mtimes[path]}
+            affected = [key for key in jobs if dependencies[key] & changed]
+            results = []
+            for key in affected:
+                new_file, orig_file, output_file, temp_subdirectory = jobs[key]
+                start = time.perf_counter()
+                try:
+                    result = compare_files(new_file, orig_file, output_file, out, temp_subdirectory, load_original(orig_file, temp_subdirectory))
+                except CompareError as e:
+                    result = {"new_file": new_file, "original_file": orig_file, "output_file": None, "messages": [("E", str(e))]}
+                except Exception as e:
+                    result = {"new_file": new_file, "original_file": orig_file, "output_file": None, "messages": [("E", f"{type(e).__name__}: {e}")]}
+                result["key"] = key
+                results.append(result)
+                print(f"[{time.strftime('%H:%M:%S')}] {key}: {describe_result(result)[1]} ({time.perf_counter() - start:.2f}s)")
+                print_messages(result["messages"])
+                if ndjson is not None:
+                    write_ndjson(ndjson, result)
+                dependencies[key] = get_dependencies(new_file) | {os.path.abspath(orig_file)}
+
+            if on_rebuilt is not None and results:
+                on_rebuilt(results)
+            mtimes = get_mtimes(set().union(*dependencies.values()))
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+
+##########
+# main
+
+def main():
+    global REFRESH_TAG
+    parser = argparse.ArgumentParser(
+        description="Compares two .adc files, or two folders of them. "+\
+            "Usually used with one original PDI file, "+\
+            "and one reverse engineered and GTAdhocCompiler compiled file."
+    )
+    parser.add_argument("new_file", nargs='?', help="Reverse engineered file (.ad.diss, .adc, .ad), or folder of them")
+    parser.add_argument("original_file", nargs='?', help="Original PDI file (.ad.diss, .adc), or folder of them")
+    parser.add_argument("output_file", nargs='?', help="Output HTML file (default is 'comparison.html'), or output folder when comparing folders (default is 'comparison')")
+    parser.add_argument("-L", "--limiter", type=int, help="Amount of line difference to limit (useful for testing while writing)")
+    parser.add_argument("-j", "--showjump", action="store_true", help="When set, doesn't obfuscate jump instructions (can cause lots of 'differences' due to LEAVE instructions)")
+    parser.add_argument("-l", "--showleave", action="store_true", help="When set, leaves LEAVE instructions in the output (will cause a lot of 'differences')")
+    parser.add_argument("-t", "--tempdir", action="store_true", help="When set, uses the system temporary directory for all files generated.")
+    parser.add_argument("-a", "--adhocdisasm", action="store_true", help="When set, disassembles .adc files with adhoc.exe instead of the built-in reader")
+    parser.add_argument("-p", "--processes", type=int, default=limit_processes(os.cpu_count()), help="Amount of worker processes when comparing folders (default is the cpu count, at most 61 on Windows)")
+    parser.add_argument("-n", "--nocache", action="store_true", help="When set, doesn't read or write the disassembly cache")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE_MB, help=f"Maximum size of the disassembly cache in MB, least recently used entries are evicted past it (default is {DEFAULT_CACHE_SIZE_MB})")
+    parser.add_argument("--cache-stats", action="store_true", help="Prints disassembly cache statistics and exits")
+    parser.add_argument("--cache-clear", action="store_true", help="Clears the disassembly cache and exits")
+    parser.add_argument("--ndjson", metavar="PATH", help="Also writes per file and per subroutine statistics as NDJSON to PATH ('-' for stdout), as each file completes")
+    parser.add_argument("-w", "--watch", action="store_true", help="Keeps running, comparing again whenever a new file (or one it includes) or original file changes")
+    parser.add_argument("--debounce", type=int, default=500, help="Milliseconds without further changes to wait for before comparing again in watch mode (default is 500)")
+    parser.add_argument("--benchmark", metavar="AD_DISS_FILE", help="Times line normalization of a .ad.diss file against the original regex loop and exits")
+    out = parser.parse_args()
+
+    if out.benchmark:
+        benchmark_normalizer(out.benchmark, out.showjump, out.showleave)
+        return
+
+    if out.cache_stats or out.cache_clear:
+        if out.cache_stats:
+            print_cache_stats()
+        if out.cache_clear:
+            clear_cache()
+        return
+
+    if out.new_file is None or out.original_file is None:
+        parser.error("the following arguments are required: new_file, original_file")
+
+    ndjson = open_ndjson(out.ndjson) if out.ndjson else None
+    if out.watch:
+        REFRESH_TAG = f'<meta http-equiv="refresh" content="{WATCH_REFRESH_SECONDS}">'
+
+    if os.path.isdir(out.new_file) or os.path.isdir(out.original_file):
+        if not (os.path.isdir(out.new_file) and os.path.isdir(out.original_file)):
+            print("==> 'new_file' and 'original_file' must both be folders to compare folders.")
+            exit(1)
+        try:
+            index_path = compare_directories(out.new_file, out.original_file, out.output_file or "comparison", out, ndjson)
+        except CompareError as e:
+            print(f"==> {e}")
+            exit(1)
+        finally:
+            prune_cache(out.cache_size)
+        print(f"Built {index_path}")
+        return
+
+    output_file = out.output_file or 'comparison.html'
+    try:
+        result = compare_files(out.new_file, out.original_file, output_file, out)
+    except CompareError as e:
+        if ndjson is not None:
+            write_ndjson(ndjson, {"new_file": out.new_file, "original_file": out.original_file, "output_file": None, "messages": [("E", str(e))]})
+        print(f"==> {e}")
         exit(1)
-    ORIG_FILE = ORIG_FILE[:-4]+".ad.diss"
-
-newfile = ""
-with open(NEW_FILE, "r", encoding= 'utf-8') as f:
-    newfile = f.read()
-
-origfile = ""
-with open(ORIG_FILE, "r", encoding= 'utf-8') as f:
-    origfile = f.read()
-
-check_re(RE_VERSION, ["version"], True)
-check_re(RE_ROOT_INSTRUCTIONS, ["root instruction count"], True)
-
-newlines = newfile.split("\n")
-origlines = origfile.split("\n")
-
-newlines2 = []
-origlines2 = []
-
-for line in newlines:
-    # any line with an instruction which is not a leave
-    re_instr = re.search(RE_INSTRUCTION, line)
-    if (line == "" or re_instr is None):
-        continue
-    if ((not out.showleave) and re.search(RE_LEAVE, line) is not None):
-        continue
-
-    line2 = re.sub(RE_INSTRUCTION_COMPONENTS_TO_DROP, "", re_instr.group(1))
-    re_jump = re.search(RE_INSTRUCTION_JUMP, line2)
-    if re_jump is not None and out.showjump is False:
-        line2 = re.sub(RE_INSTRUCTION_JUMP, f"Jump:UNK", line2) # re_jump.group(1)
-    
-    newlines2.append(line2)
-
-newlines = newlines2
-
-for line in origlines:
-    # any line with an instruction which is not a leave
-    re_instr = re.search(RE_INSTRUCTION, line)
-    if (line == "" or re_instr is None):
-        continue
-    if ((not out.showleave) and re.search(RE_LEAVE, line) is not None):
-        continue
-
-    line2 = re.sub(RE_INSTRUCTION_COMPONENTS_TO_DROP, "", re_instr.group(1))
-    
-    re_jump = re.search(RE_INSTRUCTION_JUMP, line2)
-    if re_jump is not None and out.showjump is False:
-        line2 = re.sub(RE_INSTRUCTION_JUMP, f"Jump:UNK", line2) # re_jump.group(1)
-
-    origlines2.append(line2)
-
-origlines = origlines2
-
-if out.limiter is not None:
-    if len(newlines) > len(origlines) + out.limiter:
-        newlines = newlines[:len(origlines) + out.limiter]
-    elif len(origlines) > len(newlines) + out.limiter:
-        origlines = origlines[:len(newlines) + out.limiter]
-
-print("Building comparison...")
-
-differ = HtmlDiff(4, 120)
-html = differ.make_file(origlines, newlines, ORIG_FILE, NEW_FILE)
-with open(out.output_file or 'comparison.html', "w", encoding= 'utf-8') as f:
-    html = html.replace('<style type="text/css">', HTML_STYLING+'<style type="text/css">')
-    f.write(html)
-
-print(f"Built {out.output_file or 'comparison.html'}")
+    finally:
+        prune_cache(out.cache_size)
+    if ndjson is not None:
+        write_ndjson(ndjson, result)
+    print_messages(result["messages"])
+    print(f"Built {output_file}")
+
+    if out.watch:
+        watch_comparisons({out.new_file: (out.new_file, out.original_file, output_file, "")}, out, ndjson)
+
+if __name__ == "__main__":
+    main()